@@ -0,0 +1,293 @@
+"""
+Tabela Descritiva em Fluxo, sem Carregar a Base
+===============================================
+
+``desc_ic`` precisa da base inteira em memória. Para bases maiores que a
+memória disponível (como a pesquisa de vários anos reunida), este módulo
+calcula a mesma tabela lendo os dados em blocos e mantendo, por categoria,
+apenas a contagem, a média e a soma dos quadrados dos desvios (M2).
+
+Cada bloco é resumido de forma vetorizada e combinado ao acumulado com a
+fórmula de Chan para a atualização de Welford em lote, que é estável
+numericamente e permite combinar acumulados calculados separadamente (um por
+arquivo, por processo etc.). A memória usada depende do tamanho do bloco, não
+do tamanho da base.
+
+As fontes podem ser arquivos CSV no formato de ``base2.csv`` (com as mesmas
+regras de limpeza de ``dados.py``) ou snapshots colunares (``snapshot.py``);
+um CSV com snapshot atualizado é lido pelo snapshot::
+
+    python agregacao.py Cargo base2.csv
+    python agregacao.py Experiencia pesquisa_2022.csv pesquisa_2023.csv --bloco 500000
+"""
+
+# Imports necessários
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from dados import COLUNAS_BASE, COLUNAS_OBRIGATORIAS, caminho_dados
+from funcoes import ajustar_ordem, tabela_ic
+
+# Linhas lidas por bloco
+TAMANHO_BLOCO = 250_000
+
+
+class MomentosGrupos:
+    """
+    Contagem, média e M2 do salário por categoria, acumulados em blocos.
+
+    Com categorias fixas, valores fora delas são ignorados (como em
+    ``desc_ic``); sem categorias, elas são incluídas na ordem em que aparecem.
+
+    Attributes:
+        categorias (list): Categorias, na ordem da tabela
+        contagem (np.ndarray): Observações de cada categoria
+        media (np.ndarray): Média de cada categoria
+        m2 (np.ndarray): Soma dos quadrados dos desvios em relação à média
+
+    Example:
+        >>> momentos = MomentosGrupos(ajustar_ordem('Cargo'))
+        >>> momentos.atualizar(bloco['Salario'], bloco['Cargo'])
+        >>> momentos.combinar(outros_momentos).tabela('Cargo')
+    """
+
+    def __init__(self, categorias=None):
+        self.fixas = categorias is not None
+        self.categorias = []
+        self._posicoes = {}
+        self.contagem = np.zeros(0, dtype=np.int64)
+        self.media = np.zeros(0)
+        self.m2 = np.zeros(0)
+        if categorias is not None:
+            self._incluir(list(categorias))
+
+    def _incluir(self, novas):
+        for categoria in novas:
+            self._posicoes[categoria] = len(self.categorias)
+            self.categorias.append(categoria)
+        extra = len(self.categorias) - len(self.contagem)
+        self.contagem = np.concatenate([self.contagem, np.zeros(extra, dtype=np.int64)])
+        self.media = np.concatenate([self.media, np.zeros(extra)])
+        self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+
+    def posicoes(self, categorias):
+        """
+        Converte rótulos de categoria nas posições do acumulado.
+
+        Args:
+            categorias (array-like): Rótulos (valores ausentes permitidos)
+
+        Returns:
+            np.ndarray: Posição de cada rótulo, ou -1 para valores ausentes e
+            categorias ignoradas
+        """
+        codigos, unicos = pd.factorize(categorias)
+        if not self.fixas:
+            self._incluir([categoria for categoria in unicos if categoria not in self._posicoes])
+        mapa = np.array([self._posicoes.get(categoria, -1) for categoria in unicos] + [-1],
+                        dtype=np.int64)
+        # O código -1 (valor ausente) cai na última posição do mapa, que vale -1
+        return mapa[codigos]
+
+    def _acumular(self, contagem, media, m2):
+        # Combinação de Chan: médias ponderadas pelas contagens e M2 corrigido
+        # pela distância entre as médias das duas partes
+        total = self.contagem + contagem
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peso = np.where(contagem > 0, contagem / total, 0.0)
+            delta = np.where(contagem > 0, media - self.media, 0.0)
+        self.media = self.media + delta * peso
+        self.m2 = self.m2 + np.where(contagem > 0, m2, 0.0) + delta ** 2 * self.contagem * peso
+        self.contagem = total
+
+    def atualizar(self, salario, categorias):
+        """
+        Acrescenta um bloco de linhas ao acumulado.
+
+        Args:
+            salario (array-like): Salários do bloco
+            categorias (array-like): Categoria de cada linha do bloco
+
+        Returns:
+            MomentosGrupos: O próprio acumulado
+        """
+        salario = np.asarray(salario, dtype='float64')
+        posicoes = self.posicoes(categorias)
+        validas = (posicoes >= 0) & ~np.isnan(salario)
+        posicoes, salario = posicoes[validas], salario[validas]
+
+        tamanho = len(self.categorias)
+        contagem = np.bincount(posicoes, minlength=tamanho)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.bincount(posicoes, weights=salario, minlength=tamanho) / contagem
+        desvios = salario - media[posicoes]
+        m2 = np.bincount(posicoes, weights=desvios ** 2, minlength=tamanho)
+
+        self._acumular(contagem, media, m2)
+        return self
+
+    def combinar(self, outro):
+        """
+        Incorpora outro acumulado (de outro arquivo ou processo).
+
+        Args:
+            outro (MomentosGrupos): Acumulado a combinar
+
+        Returns:
+            MomentosGrupos: O próprio acumulado
+        """
+        posicoes = self.posicoes(pd.Index(outro.categorias, dtype=object))
+        validas = posicoes >= 0
+        tamanho = len(self.categorias)
+
+        contagem = np.zeros(tamanho, dtype=np.int64)
+        media = np.zeros(tamanho)
+        m2 = np.zeros(tamanho)
+        contagem[posicoes[validas]] = outro.contagem[validas]
+        media[posicoes[validas]] = outro.media[validas]
+        m2[posicoes[validas]] = outro.m2[validas]
+
+        self._acumular(contagem, media, m2)
+        return self
+
+    def tabela(self, variavel):
+        """
+        Monta a tabela no formato de ``desc_ic``.
+
+        Args:
+            variavel (str): Nome da variável (índice da tabela)
+
+        Returns:
+            pd.DataFrame: Tamanho, média, desvio padrão e intervalo de confiança
+            de cada categoria com observações
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            desvio = np.sqrt(self.m2 / (self.contagem - 1))
+        desvio[self.contagem < 2] = np.nan
+        media = np.where(self.contagem > 0, self.media, np.nan)
+        return tabela_ic(variavel, self.categorias, self.contagem, media, desvio)
+
+
+def _blocos_csv(caminho, variavel, tamanho_bloco):
+    # Lê só a variável e as colunas obrigatórias, com os tipos de dados.py
+    colunas = list(dict.fromkeys([variavel, 'Salario', *COLUNAS_OBRIGATORIAS]))
+    tipos = {coluna: COLUNAS_BASE[coluna] for coluna in colunas if coluna in COLUNAS_BASE}
+    leitor = pd.read_csv(caminho, sep=',', encoding='utf-8', usecols=colunas, dtype=tipos,
+                         chunksize=tamanho_bloco)
+    with leitor:
+        for bloco in leitor:
+            bloco = bloco.dropna(subset=COLUNAS_OBRIGATORIAS)
+            yield bloco['Salario'].to_numpy(dtype='float64'), bloco[variavel].array
+
+
+def _blocos_snapshot(diretorio, variavel, tamanho_bloco):
+    # As colunas são mapeadas em memória e lidas uma fatia de linhas por vez
+    manifesto = snapshot.ler_manifesto(diretorio)
+    if manifesto is None:
+        raise FileNotFoundError(f'Snapshot não encontrado em {diretorio}')
+    colunas = {coluna['nome']: coluna for coluna in manifesto['colunas']}
+    pasta_lote = snapshot.pasta_colunas(diretorio, manifesto)
+
+    def abrir(nome):
+        return np.load(os.path.join(pasta_lote, colunas[nome]['arquivo']), mmap_mode='r')
+
+    salario = abrir('Salario')
+    obrigatorias = [abrir(nome) for nome in COLUNAS_OBRIGATORIAS]
+    valores = abrir(variavel)
+    tipo = None
+    if colunas[variavel]['tipo'] == 'categoria':
+        tipo = pd.CategoricalDtype(colunas[variavel]['categorias'])
+
+    for inicio in range(0, manifesto['linhas'], tamanho_bloco):
+        fatia = slice(inicio, inicio + tamanho_bloco)
+        validas = np.ones(len(salario[fatia]), dtype=bool)
+        for coluna in obrigatorias:
+            validas &= ~pd.isna(coluna[fatia])
+
+        categorias = np.asarray(valores[fatia])[validas]
+        if tipo is not None:
+            categorias = pd.Categorical.from_codes(categorias, dtype=tipo)
+        yield np.asarray(salario[fatia], dtype='float64')[validas], categorias
+
+
+def blocos(fonte, variavel, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê o salário e a variável de uma fonte em blocos de linhas.
+
+    Args:
+        fonte (str): Arquivo CSV ou diretório de snapshot (caminhos relativos
+            ao diretório do projeto)
+        variavel (str): Variável de análise
+        tamanho_bloco (int): Linhas por bloco
+
+    Yields:
+        tuple: (salários, categorias) de cada bloco, já sem as linhas
+        descartadas pela limpeza da base
+    """
+    caminho = caminho_dados(fonte)
+    if os.path.isdir(caminho):
+        return _blocos_snapshot(caminho, variavel, tamanho_bloco)
+
+    valido = snapshot.snapshot_valido(caminho)
+    if valido is not None:
+        return _blocos_snapshot(valido[0], variavel, tamanho_bloco)
+    return _blocos_csv(caminho, variavel, tamanho_bloco)
+
+
+def momentos_em_fluxo(variavel, fontes, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Acumula os momentos por categoria lendo as fontes em blocos.
+
+    Args:
+        variavel (str): Variável de análise
+        fontes (str | list): Uma ou mais fontes (ver ``blocos``), reunidas
+        tamanho_bloco (int): Linhas por bloco
+
+    Returns:
+        MomentosGrupos: Momentos de todas as fontes
+    """
+    if isinstance(fontes, str):
+        fontes = [fontes]
+
+    ordem = ajustar_ordem(variavel)
+    momentos = MomentosGrupos(ordem or None)
+    for fonte in fontes:
+        for salario, categorias in blocos(fonte, variavel, tamanho_bloco):
+            momentos.atualizar(salario, categorias)
+    return momentos
+
+
+def desc_ic_em_fluxo(variavel, fontes, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Calcula a tabela de ``desc_ic`` sem carregar as bases em memória.
+
+    Args:
+        variavel (str): Variável de análise
+        fontes (str | list): Uma ou mais fontes (CSV ou snapshot), reunidas
+        tamanho_bloco (int): Linhas por bloco
+
+    Returns:
+        pd.DataFrame: Mesmo resultado de ``desc_ic`` sobre as fontes reunidas
+
+    Example:
+        >>> desc_ic_em_fluxo('Cargo', ['pesquisa_2022.csv', 'pesquisa_2023.csv'])
+    """
+    return momentos_em_fluxo(variavel, fontes, tamanho_bloco).tabela(variavel)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tabela descritiva calculada em blocos')
+    parser.add_argument('variavel', help='Variável de análise (ex.: Cargo)')
+    parser.add_argument('fontes', nargs='+', help='Arquivos CSV ou diretórios de snapshot')
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help='Linhas por bloco')
+    argumentos = parser.parse_args()
+
+    print(desc_ic_em_fluxo(argumentos.variavel, argumentos.fontes, argumentos.bloco).to_string())
+
+
+if __name__ == '__main__':
+    main()
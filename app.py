@@ -11,6 +11,16 @@ Data: 28/08/2025
 
 import streamlit as st
 
+from importacao import relatorio_inicializacao
+
+# Relatório do tempo de importação dos módulos (RELATORIO_IMPORTACOES=1), antes
+# de qualquer outro módulo do projeto ser importado
+relatorio_inicializacao()
+
+# Aquecimento dos caches em segundo plano, uma vez por processo (AQUECER_CACHE=0 desativa)
+from aquecimento import aquecer_em_segundo_plano
+aquecer_em_segundo_plano()
+
 # Configuração da página principal
 st.set_page_config(
     page_title="Dashboard Profissionais de Dados",
@@ -0,0 +1,192 @@
+"""
+Aquecimento dos Caches na Inicialização
+=======================================
+
+O primeiro visitante depois de cada deploy paga pela leitura das bases, pela
+construção do cubo e dos índices e pela renderização de todos os gráficos da
+visão padrão. O aquecimento faz esse trabalho antes, com as mesmas chaves usadas
+pelas páginas, para que a primeira visita já encontre tudo em cache:
+
+- página salarial: tabela de ``desc_ic`` e os três gráficos (intervalos de
+  confiança, densidade e boxplot) de cada variável, sem filtros;
+- página do cientista de dados: os gráficos das quatro seções.
+
+Os gráficos são aquecidos no modo de ``MODO_GRAFICOS`` (imagens ou
+especificações Vega-Lite, ver ``graficos_vega.py``).
+
+Pode ser executado na inicialização do servidor, em segundo plano (ver
+``aquecer_em_segundo_plano``, chamado pelo ``app.py``), ou como etapa de linha
+de comando::
+
+    python aquecimento.py             # mede o aquecimento
+    python aquecimento.py --snapshot  # gera os snapshots antes
+
+Os caches ficam na memória do processo, então pela linha de comando o
+aquecimento serve para medir os tempos e, com ``--snapshot``, para deixar os
+snapshots colunares prontos para os processos do servidor.
+"""
+
+# Imports necessários
+import logging
+import os
+import sys
+import threading
+import time
+
+from cache_graficos import cache
+from consultas import backend_consultas
+from dados import (carregar_base, carregar_indice, carregar_respostas, fonte_salarios,
+                   versao_dados)
+from funcoes import (SECOES_CIENTISTA, VARIAVEIS_ANALISE, barras_respostas, boxplot,
+                     grafico_density, graf_ic)
+from graficos_vega import grafico_no_modo
+
+logger = logging.getLogger(__name__)
+
+_iniciado = False
+_trava = threading.Lock()
+
+
+def _configurar_logger():
+    # Manipulador próprio, em nível INFO: no servidor o logger raiz só
+    # repassa avisos, e o progresso do aquecimento seria descartado
+    with _trava:
+        if not logger.handlers:
+            manipulador = logging.StreamHandler()
+            manipulador.setFormatter(logging.Formatter('%(message)s'))
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(manipulador)
+
+
+def _medir(relatorio, artefato, funcao, *args, **kwargs):
+    # Executa um passo do aquecimento e registra o tempo gasto
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    segundos = time.perf_counter() - inicio
+    relatorio.append({'artefato': artefato, 'segundos': segundos})
+    logger.info('Aquecido %s em %.3f s', artefato, segundos)
+    return resultado
+
+
+def aquecer_salarios(caminho=None, variaveis=VARIAVEIS_ANALISE):
+    """
+    Calcula e guarda os artefatos da visão sem filtros da página salarial.
+
+    Args:
+        caminho (str | particoes.Selecao): Base salarial (padrão: a mesma fonte
+            da página sem filtros, ver ``dados.fonte_salarios``)
+        variaveis (list): Variáveis de análise a aquecer
+
+    Returns:
+        list: Um dicionário por artefato, com ``artefato`` e ``segundos``
+    """
+    caminho = fonte_salarios() if caminho is None else caminho
+    nome = caminho if isinstance(caminho, str) else 'armazém particionado'
+    relatorio = []
+    base = _medir(relatorio, f'base {nome}', carregar_base, caminho)
+    _medir(relatorio, 'índices dos filtros', carregar_indice, caminho)
+    versao = versao_dados(caminho)
+    consultas = backend_consultas()
+
+    # Mesmas chaves da página: variável, filtros vazios e versão dos dados
+    for variavel in variaveis:
+        tabela = _medir(relatorio, f'desc_ic {variavel}', consultas.desc_ic, caminho, variavel)
+        _medir(relatorio, f'graf_ic {variavel}', grafico_no_modo,
+               graf_ic, variavel, {}, versao, base, tabela=tabela)
+        _medir(relatorio, f'grafico_density {variavel}', grafico_no_modo,
+               grafico_density, variavel, {}, versao, base)
+        _medir(relatorio, f'boxplot {variavel}', grafico_no_modo,
+               boxplot, variavel, {}, versao, base)
+    return relatorio
+
+
+def aquecer_cientista(secoes=SECOES_CIENTISTA):
+    """
+    Renderiza e guarda os gráficos das seções da página do cientista de dados.
+
+    Args:
+        secoes (list): Seções no formato de ``SECOES_CIENTISTA``
+
+    Returns:
+        list: Um dicionário por artefato, com ``artefato`` e ``segundos``
+    """
+    relatorio = []
+    for titulo, arquivo, fatia, cor in secoes:
+        base = _medir(relatorio, f'respostas {arquivo}', carregar_respostas, arquivo)
+        _medir(relatorio, f'barras {titulo}', grafico_no_modo,
+               barras_respostas, titulo, None, versao_dados(arquivo),
+               base.colunas[fatia], base, cor)
+    return relatorio
+
+
+def aquecer():
+    """
+    Aquece os caches das duas páginas e registra o resumo no log.
+
+    Returns:
+        dict: ``artefatos`` (lista com o tempo de cada um), ``segundos``
+        (tempo total) e ``cache`` (estatísticas do cache de gráficos)
+
+    Example:
+        >>> resumo = aquecer()
+        >>> resumo['segundos']
+    """
+    inicio = time.perf_counter()
+    artefatos = aquecer_salarios() + aquecer_cientista()
+    resumo = {
+        'artefatos': artefatos,
+        'segundos': time.perf_counter() - inicio,
+        'cache': cache.estatisticas(),
+    }
+    logger.info('Aquecimento concluído em %.2f s: %d artefatos, %d imagens (%.1f MB) em cache',
+                resumo['segundos'], len(artefatos), resumo['cache']['itens'],
+                resumo['cache']['bytes'] / 2 ** 20)
+    return resumo
+
+
+def _aquecer_com_log():
+    try:
+        aquecer()
+    except Exception:
+        # Uma falha no aquecimento não impede o funcionamento das páginas
+        logger.exception('Falha no aquecimento dos caches')
+
+
+def aquecer_em_segundo_plano():
+    """
+    Inicia o aquecimento em uma thread, uma única vez por processo.
+
+    Desativado com a variável de ambiente ``AQUECER_CACHE=0``.
+
+    Returns:
+        threading.Thread | None: Thread do aquecimento, ou None se ele já foi
+        iniciado ou está desativado
+    """
+    global _iniciado
+    if os.environ.get('AQUECER_CACHE', '1') == '0':
+        return None
+    with _trava:
+        if _iniciado:
+            return None
+        _iniciado = True
+
+    _configurar_logger()
+    thread = threading.Thread(target=_aquecer_com_log, name='aquecimento', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    # Executa o aquecimento pela linha de comando e imprime o relatório
+    _configurar_logger()
+    if '--snapshot' in sys.argv[1:]:
+        import snapshot
+        snapshot.main()
+
+    resumo = aquecer()
+    print(f"Total: {resumo['segundos']:.2f} s, {resumo['cache']['itens']} imagens em cache")
+
+
+if __name__ == '__main__':
+    main()
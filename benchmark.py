@@ -0,0 +1,257 @@
+"""
+Benchmark das Funções do Dashboard em Bases Escaladas
+=====================================================
+
+Mede ``desc_ic``, ``graf_ic``, ``grafico_density``, ``boxplot``,
+``hipoteses`` e ``plot_distribuicao``, além do caminho completo de
+renderização da página salarial, em bases de 5 mil a 10 milhões de linhas.
+
+As bases escaladas são obtidas sorteando linhas da base salarial com
+reposição, o que preserva as categorias e a distribuição dos salários. Para
+cada função e tamanho são medidos:
+
+- tempo de parede (média e mínimo de várias repetições, sem instrumentação);
+- pico de memória alocada durante uma chamada e saldo de blocos de memória
+  que ela deixa retidos (alocados e não liberados ao final), em uma execução
+  separada sob ``tracemalloc``. O saldo não conta as alocações temporárias,
+  cujo efeito aparece no pico.
+
+Os gráficos são medidos até a imagem codificada (``codificar``), que é o custo pago
+pela página. Os resultados são gravados em JSON para comparação entre
+execuções::
+
+    python benchmark.py                              # 5k, 100k, 1M e 10M linhas
+    python benchmark.py --linhas 5000 100000 --repeticoes 5
+    python benchmark.py --comparar resultados_benchmark/anterior.json
+"""
+
+# Imports necessários
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cubo import CuboEstatisticas
+from dados import DIRETORIO, carregar_base
+from funcoes import (boxplot, desc_ic, grafico_density, graf_ic, hipoteses,
+                     matriz_hipoteses, plano_consulta, plot_distribuicao)
+from renderizacao import codificar
+
+# Tamanhos padrão das bases, em linhas
+TAMANHOS = [5_000, 100_000, 1_000_000, 10_000_000]
+
+# Variável e categorias usadas nas medições
+VARIAVEL = 'Cargo'
+CATEGORIAS_TESTE = ('Cientista de dados', 'Analista de Dados')
+
+DIRETORIO_RESULTADOS = os.path.join(DIRETORIO, 'resultados_benchmark')
+
+
+def escalar_base(base, linhas, semente=0):
+    """
+    Gera uma base com o número de linhas pedido, sorteando linhas com reposição.
+
+    Args:
+        base (pd.DataFrame): Base salarial original
+        linhas (int): Número de linhas da base escalada
+        semente (int): Semente do sorteio
+
+    Returns:
+        pd.DataFrame: Base com as mesmas colunas e tipos
+    """
+    rng = np.random.default_rng(semente)
+    sorteio = rng.integers(0, len(base), size=linhas)
+    return base.take(sorteio).reset_index(drop=True)
+
+
+def pagina_completa(variavel, base):
+    # Caminho da página salarial sem cache: cubo, tabela, os três gráficos e o
+    # teste de hipóteses com o gráfico das distribuições, com um único plano
+    # de consulta compartilhado como na página
+    cubo = CuboEstatisticas.de_base(base, [variavel])
+    tabela = cubo.desc_ic(variavel)
+    plano = plano_consulta(variavel, base)
+    codificar(graf_ic(variavel, base, tabela=tabela, plano=plano))
+    codificar(grafico_density(variavel, base, plano=plano))
+    codificar(boxplot(variavel, base, plano=plano))
+
+    momentos = plano.momentos
+    matriz = matriz_hipoteses(variavel, base, momentos=momentos)
+    hipoteses(variavel, *CATEGORIAS_TESTE, base, matriz=matriz, plano=plano)
+    codificar(plot_distribuicao(variavel, base, *CATEGORIAS_TESTE, momentos=momentos))
+
+
+# Casos medidos: nome -> função que recebe a base
+CASOS = {
+    'desc_ic': lambda base: desc_ic(VARIAVEL, base),
+    'graf_ic': lambda base: codificar(graf_ic(VARIAVEL, base)),
+    'grafico_density': lambda base: codificar(grafico_density(VARIAVEL, base)),
+    'boxplot': lambda base: codificar(boxplot(VARIAVEL, base)),
+    'hipoteses': lambda base: hipoteses(VARIAVEL, *CATEGORIAS_TESTE, base),
+    'plot_distribuicao': lambda base: codificar(plot_distribuicao(VARIAVEL, base, *CATEGORIAS_TESTE)),
+    'pagina_completa': lambda base: pagina_completa(VARIAVEL, base),
+}
+
+
+def medir_tempo(funcao, base, repeticoes):
+    # Tempo de parede de cada repetição, após uma chamada de aquecimento
+    funcao(base)
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao(base)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def medir_memoria(funcao, base):
+    """
+    Mede a memória de uma chamada sob ``tracemalloc``.
+
+    Returns:
+        dict: ``pico_mb`` (pico de memória alocada durante a chamada) e
+        ``blocos_retidos`` (saldo de blocos alocados menos liberados, ou seja,
+        os que continuam alocados ao final)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        funcao(base)
+        _, pico = tracemalloc.get_traced_memory()
+        depois = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diferencas = depois.compare_to(antes, 'filename')
+    blocos = sum(diferenca.count_diff for diferenca in diferencas)
+    return {'pico_mb': pico / 2 ** 20, 'blocos_retidos': blocos}
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRETORIO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadados_ambiente():
+    # Data, commit e versões do ambiente, gravados junto com os resultados
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'processadores': os.cpu_count(),
+    }
+
+
+def executar(tamanhos=TAMANHOS, casos=None, repeticoes=3):
+    """
+    Executa o benchmark de cada caso em cada tamanho de base.
+
+    Args:
+        tamanhos (list): Números de linhas das bases escaladas
+        casos (list): Nomes dos casos (padrão: todos de ``CASOS``)
+        repeticoes (int): Repetições cronometradas por caso
+
+    Returns:
+        dict: ``metadados`` (ambiente e commit) e ``resultados`` (um
+        dicionário por caso e tamanho)
+
+    Example:
+        >>> resultado = executar([5000], ['desc_ic'], repeticoes=5)
+        >>> resultado['resultados'][0]['tempo_medio_s']
+    """
+    casos = casos or list(CASOS)
+    original = carregar_base()
+    resultados = []
+
+    for linhas in tamanhos:
+        base = escalar_base(original, linhas)
+        for nome in casos:
+            tempos = medir_tempo(CASOS[nome], base, repeticoes)
+            memoria = medir_memoria(CASOS[nome], base)
+            resultado = {
+                'caso': nome,
+                'linhas': linhas,
+                'repeticoes': repeticoes,
+                'tempo_medio_s': float(np.mean(tempos)),
+                'tempo_min_s': float(np.min(tempos)),
+                **memoria,
+            }
+            resultados.append(resultado)
+            print(f"{nome:<18} {linhas:>11,} linhas  {resultado['tempo_medio_s'] * 1000:>10.1f} ms"
+                  f"  pico {resultado['pico_mb']:>8.1f} MB  {resultado['blocos_retidos']:>7} blocos retidos",
+                  flush=True)
+        del base
+        gc.collect()
+
+    return {'metadados': metadados_ambiente(), 'resultados': resultados}
+
+
+def comparar(atual, anterior):
+    """
+    Compara dois resultados do benchmark, caso a caso.
+
+    Args:
+        atual (dict): Resultado de ``executar``
+        anterior (dict): Resultado de uma execução anterior (JSON carregado)
+
+    Returns:
+        pd.DataFrame: Tempos médios e a razão atual / anterior de cada caso e
+        tamanho presente nos dois resultados
+    """
+    colunas = ['caso', 'linhas', 'tempo_medio_s', 'pico_mb']
+    tabela_atual = pd.DataFrame(atual['resultados'])[colunas]
+    tabela_anterior = pd.DataFrame(anterior['resultados'])[colunas]
+    tabela = tabela_atual.merge(tabela_anterior, on=['caso', 'linhas'],
+                                suffixes=('_atual', '_anterior'))
+    tabela['razao_tempo'] = tabela['tempo_medio_s_atual'] / tabela['tempo_medio_s_anterior']
+    tabela['razao_memoria'] = tabela['pico_mb_atual'] / tabela['pico_mb_anterior']
+    return tabela
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das funções do dashboard')
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS,
+                        help='Tamanhos das bases escaladas')
+    parser.add_argument('--casos', nargs='+', choices=list(CASOS), help='Casos a medir')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', help='Arquivo JSON de saída '
+                        '(padrão: resultados_benchmark/<data>.json)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    argumentos = parser.parse_args()
+
+    resultado = executar(argumentos.linhas, argumentos.casos, argumentos.repeticoes)
+
+    saida = argumentos.saida
+    if saida is None:
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        nome = datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+        saida = os.path.join(DIRETORIO_RESULTADOS, nome)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f'Resultados gravados em {saida}')
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)
+        print(comparar(resultado, anterior).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
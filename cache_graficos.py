@@ -0,0 +1,163 @@
+"""
+Cache de Gráficos Renderizados
+==============================
+
+Guarda as imagens já renderizadas dos gráficos do dashboard, compartilhadas
+entre todas as sessões do processo. A chave de cada imagem é formada pela
+função do gráfico, pela variável analisada, pela impressão digital dos filtros
+ativos e pela versão dos dados carregados, então uma nova versão da base nunca
+reaproveita imagens antigas.
+
+O cache descarta as imagens usadas há mais tempo (LRU) quando o total de bytes
+passa do orçamento, configurável pela variável de ambiente
+``CACHE_GRAFICOS_MB`` (padrão: 64 MB).
+"""
+
+# Imports necessários
+import os
+import threading
+from collections import OrderedDict
+
+from renderizacao import codificar
+
+# Orçamento padrão de memória do cache, em megabytes
+ORCAMENTO_PADRAO_MB = 64
+
+
+class CacheGraficos:
+    """
+    Cache LRU de imagens com orçamento de memória em bytes.
+
+    Attributes:
+        orcamento (int): Total máximo de bytes guardados
+        acertos (int): Consultas respondidas pelo cache
+        falhas (int): Consultas que exigiram renderização
+        descartes (int): Imagens removidas para respeitar o orçamento
+
+    Example:
+        >>> cache = CacheGraficos(orcamento=32 * 2 ** 20)
+        >>> cache.guardar(('graf_ic', 'Cargo'), imagem)
+        >>> cache.obter(('graf_ic', 'Cargo'))
+    """
+
+    def __init__(self, orcamento):
+        self.orcamento = orcamento
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        # Retorna a imagem da chave (ou None), marcando-a como usada recentemente
+        with self._trava:
+            imagem = self._itens.get(chave)
+            if imagem is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return imagem
+
+    def guardar(self, chave, imagem):
+        # Imagens maiores que o orçamento inteiro não são guardadas
+        if len(imagem) > self.orcamento:
+            return
+        with self._trava:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._itens[chave] = imagem
+            self._bytes += len(imagem)
+
+            while self._bytes > self.orcamento:
+                _, descartada = self._itens.popitem(last=False)
+                self._bytes -= len(descartada)
+                self.descartes += 1
+
+    def limpar(self):
+        # Remove todas as imagens, mantendo os contadores
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        """
+        Retorna o uso e os contadores do cache.
+
+        Returns:
+            dict: ``itens``, ``bytes``, ``orcamento``, ``acertos``, ``falhas``,
+            ``descartes`` e ``taxa_acerto``
+        """
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'orcamento': self.orcamento,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'descartes': self.descartes,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            }
+
+
+def impressao_filtros(filtros):
+    """
+    Calcula a impressão digital de um conjunto de filtros.
+
+    Args:
+        filtros (dict): Filtros ativos (vazio ou None quando não há filtro)
+
+    Returns:
+        tuple: Pares (nome, valor) ordenados, utilizável como chave
+    """
+    if not filtros:
+        return ()
+    return tuple(sorted((nome, valor if not isinstance(valor, list) else tuple(valor))
+                        for nome, valor in filtros.items()))
+
+
+def _orcamento_configurado():
+    try:
+        megabytes = float(os.environ.get('CACHE_GRAFICOS_MB', ORCAMENTO_PADRAO_MB))
+    except ValueError:
+        megabytes = ORCAMENTO_PADRAO_MB
+    return int(megabytes * 2 ** 20)
+
+
+# Cache compartilhado pelo processo
+cache = CacheGraficos(_orcamento_configurado())
+
+
+def grafico_em_cache(funcao, variavel, filtros, versao, *args, variante=None, **kwargs):
+    """
+    Retorna a imagem do gráfico, renderizando-a apenas se não estiver em cache.
+
+    Args:
+        funcao (callable): Função do gráfico, chamada como
+            ``funcao(variavel, *args, **kwargs)`` e que retorna uma Figure
+        variavel (str): Variável de análise
+        filtros (dict): Filtros ativos, usados na chave
+        versao: Versão dos dados (ver ``dados.versao_dados``)
+        variante: Opção extra do gráfico que muda a imagem (entra na chave)
+
+    Returns:
+        bytes | None: Imagem SVG ou PNG (ver ``renderizacao.codificar``), ou
+        None se a função não gerou figura
+
+    Example:
+        >>> imagem = grafico_em_cache(boxplot, 'Cargo', {}, versao, base)
+    """
+    chave = (funcao.__name__, variavel, impressao_filtros(filtros), versao, variante)
+    imagem = cache.obter(chave)
+    if imagem is not None:
+        return imagem
+
+    fig = funcao(variavel, *args, **kwargs)
+    if fig is None:
+        return None
+    imagem = codificar(fig, funcao.__name__)
+    cache.guardar(chave, imagem)
+    return imagem
@@ -0,0 +1,356 @@
+"""
+Teste de Carga com Sessões Simultâneas
+======================================
+
+Simula vários usuários usando o dashboard ao mesmo tempo, sem navegador, com o
+``AppTest`` do Streamlit. Cada sessão é uma thread que percorre um roteiro de
+interações sobre ``app.py``, ``paginas/app2.py`` ou ``paginas/cientista.py``
+(trocar a variável, mover a faixa de idade, escolher um estado, aplicar os
+filtros e executar o teste de hipóteses), como um visitante novo a cada
+iteração.
+
+Todas as sessões rodam no mesmo processo, como no servidor do Streamlit, e
+compartilham a base, os índices e os caches. São medidos:
+
+- latência de cada execução da página (rerun), com p50, p95 e p99 por passo
+  do roteiro e no total;
+- memória residente (RSS) do processo e figuras do matplotlib ainda vivas
+  (e abertas no registro do pyplot) ao longo do teste.
+
+Os resultados são gravados em JSON para dimensionar réplicas e comparar
+versões::
+
+    python carga.py --sessoes 8 --iteracoes 5
+    python carga.py --sessoes 16 --roteiros salarios --rampa 10
+
+O roteiro ``navegacao`` abre o ``app.py``, que inicia o aquecimento dos caches
+em segundo plano, como em um servidor recém-iniciado (``AQUECER_CACHE=0``
+desativa).
+"""
+
+# Imports necessários
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+
+from benchmark import metadados_ambiente
+from dados import DIRETORIO
+from funcoes import VARIAVEIS_ANALISE
+from renderizacao import estatisticas, memoria_residente
+
+DIRETORIO_RESULTADOS = os.path.join(DIRETORIO, 'resultados_carga')
+
+# Percentis de latência do relatório
+PERCENTIS = (50, 95, 99)
+
+
+def _clicar(at, rotulo):
+    next(botao for botao in at.button if botao.label == rotulo).click()
+
+
+def _abrir(at, rng):
+    # Sem interação: a execução seguinte é a abertura (ou recarga) da página
+    pass
+
+
+def _mudar_variavel(at, rng):
+    seletor = next(s for s in at.selectbox if s.label == 'Escolha a variável para análise')
+    seletor.set_value(rng.choice(VARIAVEIS_ANALISE))
+
+
+def _mover_idade(at, rng):
+    # Faixa de pelo menos dez anos, para que a maioria dos filtros tenha dados
+    slider = at.slider(key='idade_slider')
+    minimo, maximo = int(slider.min), int(slider.max)
+    inicio = rng.randint(minimo, maximo - 10)
+    slider.set_value((inicio, rng.randint(inicio + 10, maximo)))
+
+
+def _escolher_estado(at, rng):
+    seletor = at.selectbox(key='estado_select')
+    seletor.set_value(rng.choice(seletor.options))
+
+
+def _aplicar_filtros(at, rng):
+    _clicar(at, 'Aplicar filtros')
+
+
+def _executar_teste(at, rng):
+    _clicar(at, 'Executar teste')
+
+
+def _ir_para(pagina):
+    def passo(at, rng):
+        at.switch_page(pagina)
+    return passo
+
+
+# Roteiros: nome -> (script inicial, lista de passos (nome, função)). Cada
+# passo altera os widgets e é seguido de uma execução da página
+ROTEIROS = {
+    'salarios': ('paginas/app2.py', [
+        ('abrir', _abrir),
+        ('variavel', _mudar_variavel),
+        ('idade', _mover_idade),
+        ('estado', _escolher_estado),
+        ('aplicar_filtros', _aplicar_filtros),
+        ('teste', _executar_teste),
+    ]),
+    'cientista': ('paginas/cientista.py', [
+        ('abrir', _abrir),
+        ('recarregar', _abrir),
+    ]),
+    'navegacao': ('app.py', [
+        ('abrir', _abrir),
+        ('cientista', _ir_para('paginas/cientista.py')),
+        ('sobre', _ir_para('paginas/sobre.py')),
+        ('salarios', _ir_para('paginas/app2.py')),
+        ('variavel', _mudar_variavel),
+    ]),
+}
+
+
+@contextmanager
+def _runtime_compartilhado():
+    # O AppTest cria um Runtime global a cada execução e o apaga ao final. Com
+    # várias sessões em threads, uma execução pode encontrar o Runtime apagado
+    # por outra (st.image e st.dataframe o consultam). Durante o teste, a
+    # consulta devolve o último Runtime visto enquanto o atual estiver vazio
+    ultimo = []
+
+    def instancia(cls):
+        if cls._instance is not None:
+            ultimo[:] = [cls._instance]
+        if not ultimo:
+            raise RuntimeError("Runtime hasn't been created!")
+        return ultimo[0]
+
+    def existe(cls):
+        return cls._instance is not None or bool(ultimo)
+
+    with patch.object(Runtime, 'instance', classmethod(instancia)), \
+            patch.object(Runtime, 'exists', classmethod(existe)):
+        # Uma execução que consulta o Runtime antes das sessões começarem
+        AppTest.from_string('import streamlit as st\nst.dataframe([1])').run()
+        yield
+
+
+def _amostrar_memoria(inicio, intervalo, parar, amostras):
+    # Registra o RSS e as figuras vivas a cada intervalo até o fim do teste;
+    # em um teste longo, os dois devem ficar estáveis
+    while True:
+        figuras = estatisticas()
+        amostras.append({'segundos': time.perf_counter() - inicio,
+                         'rss_mb': memoria_residente() / 2 ** 20,
+                         'figuras_vivas': figuras['figuras_vivas'],
+                         'figuras_pyplot': figuras['figuras_pyplot']})
+        if parar.wait(intervalo):
+            return
+
+
+def _sessao(numero, roteiro, iteracoes, pausa, timeout, atraso, inicio, registros):
+    # Uma sessão: a cada iteração, um visitante novo percorre o roteiro inteiro
+    arquivo, passos = ROTEIROS[roteiro]
+    rng = random.Random(numero)
+    time.sleep(atraso)
+
+    for iteracao in range(iteracoes):
+        at = AppTest.from_file(os.path.join(DIRETORIO, arquivo), default_timeout=timeout)
+        for nome, passo in passos:
+            erro = None
+            comeco = time.perf_counter()
+            try:
+                passo(at, rng)
+                at.run()
+                if at.exception:
+                    erro = at.exception[0].message
+            except Exception as e:
+                erro = f'{type(e).__name__}: {e}'
+            fim = time.perf_counter()
+
+            registros.append({
+                'sessao': numero,
+                'roteiro': roteiro,
+                'iteracao': iteracao,
+                'passo': nome,
+                'inicio_s': comeco - inicio,
+                'latencia_ms': (fim - comeco) * 1000,
+                'erro': erro,
+            })
+            # Depois de um erro a página não está no estado esperado pelo roteiro
+            if erro is not None:
+                break
+            if pausa:
+                time.sleep(pausa)
+
+
+def _percentis(latencias):
+    resumo = {'execucoes': len(latencias)}
+    for percentil in PERCENTIS:
+        resumo[f'p{percentil}_ms'] = float(np.percentile(latencias, percentil))
+    resumo['max_ms'] = float(np.max(latencias))
+    return resumo
+
+
+def resumir(registros):
+    """
+    Resume as latências por roteiro e passo, com uma linha para o total.
+
+    Args:
+        registros (list): Execuções registradas pelo teste (``execucoes`` do
+            resultado de ``executar``)
+
+    Returns:
+        pd.DataFrame: ``roteiro``, ``passo``, número de execuções e de erros,
+        percentis e máximo da latência em ms
+    """
+    tabela = pd.DataFrame(registros)
+    grupos = [((roteiro, nome), tabela[(tabela['roteiro'] == roteiro) & (tabela['passo'] == nome)])
+              for roteiro, (_, passos) in ROTEIROS.items() for nome, _ in passos]
+    grupos.append((('todos', 'todos'), tabela))
+
+    # Passos na ordem dos roteiros, sem os que não foram executados
+    linhas = []
+    for (roteiro, passo), grupo in grupos:
+        if grupo.empty:
+            continue
+        linhas.append({'roteiro': roteiro, 'passo': passo,
+                       **_percentis(grupo['latencia_ms']),
+                       'erros': int(grupo['erro'].notna().sum())})
+    return pd.DataFrame(linhas)
+
+
+def executar(sessoes=4, roteiros=None, iteracoes=3, pausa=0.0, rampa=0.0, intervalo=0.5,
+             timeout=120):
+    """
+    Executa o teste de carga com sessões simultâneas.
+
+    Args:
+        sessoes (int): Número de sessões simultâneas
+        roteiros (list): Roteiros distribuídos entre as sessões, em rodízio
+            (padrão: todos de ``ROTEIROS``)
+        iteracoes (int): Visitas de cada sessão ao roteiro
+        pausa (float): Segundos entre um passo e o seguinte (tempo de leitura
+            do usuário; 0 mede o processo saturado)
+        rampa (float): Segundos para iniciar todas as sessões; 0 inicia todas
+            juntas
+        intervalo (float): Segundos entre as amostras de memória
+        timeout (float): Tempo máximo de cada execução da página
+
+    Returns:
+        dict: ``metadados`` (ambiente e parâmetros), ``latencias`` (resumo de
+        ``resumir``), ``memoria`` (amostras de RSS e de figuras vivas ao longo
+        do teste) e
+        ``execucoes`` (cada execução registrada)
+
+    Example:
+        >>> resultado = executar(sessoes=8, roteiros=['salarios'], iteracoes=2)
+        >>> resultado['latencias']
+    """
+    roteiros = roteiros or list(ROTEIROS)
+    registros = []
+    amostras = []
+
+    with _runtime_compartilhado():
+        inicio = time.perf_counter()
+        parar = threading.Event()
+        amostrador = threading.Thread(target=_amostrar_memoria, name='memoria', daemon=True,
+                                      args=(inicio, intervalo, parar, amostras))
+        amostrador.start()
+
+        threads = []
+        for numero in range(sessoes):
+            argumentos = (numero, roteiros[numero % len(roteiros)], iteracoes, pausa, timeout,
+                          rampa * numero / sessoes, inicio, registros)
+            threads.append(threading.Thread(target=_sessao, args=argumentos,
+                                            name=f'sessao-{numero}'))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # O app.py inicia o aquecimento dos caches em uma thread; o teste só
+        # termina junto com ele, para que a memória medida inclua os caches
+        for thread in threading.enumerate():
+            if thread.name == 'aquecimento':
+                thread.join()
+
+        parar.set()
+        amostrador.join()
+
+    metadados = {
+        **metadados_ambiente(),
+        'sessoes': sessoes,
+        'roteiros': roteiros,
+        'iteracoes': iteracoes,
+        'pausa_s': pausa,
+        'rampa_s': rampa,
+        'duracao_s': time.perf_counter() - inicio,
+    }
+    return {
+        'metadados': metadados,
+        'latencias': resumir(registros).to_dict('records'),
+        'memoria': amostras,
+        'execucoes': registros,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga das páginas do dashboard')
+    parser.add_argument('--sessoes', type=int, default=4, help='Sessões simultâneas')
+    parser.add_argument('--roteiros', nargs='+', choices=list(ROTEIROS),
+                        help='Roteiros distribuídos entre as sessões')
+    parser.add_argument('--iteracoes', type=int, default=3, help='Visitas por sessão')
+    parser.add_argument('--pausa', type=float, default=0.0, help='Segundos entre os passos')
+    parser.add_argument('--rampa', type=float, default=0.0,
+                        help='Segundos para iniciar todas as sessões')
+    parser.add_argument('--intervalo', type=float, default=0.5,
+                        help='Segundos entre as amostras de memória')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--saida', help='Arquivo JSON de saída (padrão: resultados_carga/<data>.json)')
+    argumentos = parser.parse_args()
+
+    # As threads das sessões não têm contexto de execução do Streamlit, que
+    # avisaria a cada interação com os widgets
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').disabled = True
+
+    resultado = executar(argumentos.sessoes, argumentos.roteiros, argumentos.iteracoes,
+                         argumentos.pausa, argumentos.rampa, argumentos.intervalo,
+                         argumentos.timeout)
+
+    saida = argumentos.saida
+    if saida is None:
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        nome = datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+        saida = os.path.join(DIRETORIO_RESULTADOS, nome)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+    print(pd.DataFrame(resultado['latencias']).to_string(index=False, float_format='%.1f'))
+    rss = [amostra['rss_mb'] for amostra in resultado['memoria'] if amostra['rss_mb']]
+    if rss:
+        print(f'RSS: inicial {rss[0]:.0f} MB, pico {max(rss):.0f} MB, final {rss[-1]:.0f} MB')
+    if resultado['memoria']:
+        final = resultado['memoria'][-1]
+        print(f"Figuras vivas ao final: {final['figuras_vivas']} "
+              f"({final['figuras_pyplot']} no pyplot)")
+    erros = [registro for registro in resultado['execucoes'] if registro['erro']]
+    for registro in erros[:5]:
+        print(f"Erro em {registro['roteiro']}/{registro['passo']}: {registro['erro']}")
+    print(f'Resultados gravados em {saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+Backends de Consulta da Base Salarial
+=====================================
+
+A página salarial filtra a base por idade e estado e agrupa o salário pelas
+categorias da variável escolhida (tabela descritiva e momentos dos testes de
+hipóteses). Este módulo isola essas duas consultas atrás de um backend
+escolhido pela variável de ambiente ``BACKEND_CONSULTAS``:
+
+- ``pandas`` (padrão): o cubo de estatísticas e os índices de ``dados.py``;
+- ``duckdb``: um motor SQL analítico embutido no processo, que recebe os
+  filtros e o agrupamento em uma única consulta e varre as colunas da base
+  compartilhada (mapeadas do snapshot, quando existe) em várias threads.
+
+Os dois backends produzem as mesmas tabelas de ``funcoes.desc_ic`` e
+``funcoes.momentos_categorias``, a menos do arredondamento das somas em ponto
+flutuante. O DuckDB é uma dependência opcional (``pip install duckdb``); sem
+ele, o backend ``pandas`` é usado e um aviso é registrado no log.
+
+A equivalência é conferida pela linha de comando, em filtros que deixam
+categorias vazias ou com uma única linha::
+
+    python consultas.py
+"""
+
+# Imports necessários
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dados import carregar_base, carregar_cubo, carregar_indice
+from funcoes import ajustar_ordem, momentos_categorias, tabela_ic
+from importacao import importar
+
+logger = logging.getLogger(__name__)
+
+BACKEND_PADRAO = 'pandas'
+
+
+def _ordem(variavel, base):
+    # Ordem fixa da variável ou, sem ela, a ordem em que as categorias aparecem
+    ordem = ajustar_ordem(variavel)
+    if not ordem:
+        ordem = base[variavel].dropna().unique().tolist()
+    return ordem
+
+
+class ConsultasPandas:
+    """
+    Consultas pelo cubo de estatísticas e pelos índices dos filtros.
+
+    Example:
+        >>> ConsultasPandas().desc_ic('base2.csv', 'Cargo', 20, 30, 'Bahia (BA)')
+    """
+
+    nome = 'pandas'
+
+    def desc_ic(self, fonte, variavel, idade_min=None, idade_max=None, estado='Todos'):
+        """
+        Calcula a tabela de ``desc_ic`` da base filtrada.
+
+        Args:
+            fonte (str | particoes.Selecao): Fonte aceita por ``dados.carregar_base``
+            variavel (str): Variável de análise
+            idade_min (float): Idade mínima, inclusiva (sem limite se None)
+            idade_max (float): Idade máxima, inclusiva (sem limite se None)
+            estado (str): Estado selecionado, ou 'Todos'
+
+        Returns:
+            pd.DataFrame: Mesmo resultado de ``desc_ic`` sobre a base filtrada
+        """
+        return carregar_cubo(fonte).desc_ic(variavel, idade_min, idade_max, estado)
+
+    def momentos(self, fonte, variavel, idade_min=None, idade_max=None, estado='Todos'):
+        """
+        Calcula os momentos de ``momentos_categorias`` da base filtrada.
+
+        Args:
+            fonte (str | particoes.Selecao): Fonte aceita por ``dados.carregar_base``
+            variavel (str): Variável de análise
+            idade_min (float): Idade mínima, inclusiva (sem limite se None)
+            idade_max (float): Idade máxima, inclusiva (sem limite se None)
+            estado (str): Estado selecionado, ou 'Todos'
+
+        Returns:
+            pd.DataFrame: Uma linha por categoria com ``n``, ``media``,
+            ``variancia``, ``mediana``, ``media_abs`` e ``variancia_abs``
+        """
+        base = carregar_base(fonte)
+        visao = carregar_indice(fonte).visao(base, idade_min, idade_max, estado)
+        return momentos_categorias(variavel, visao)
+
+
+class ConsultasDuckDB:
+    """
+    Consultas em SQL no DuckDB, com filtros e agrupamento no próprio motor.
+
+    A base compartilhada é registrada como tabela de cada consulta sem ser
+    copiada: o DuckDB lê as colunas do DataFrame (e, com o snapshot, as páginas
+    dos arquivos mapeados) diretamente.
+
+    Example:
+        >>> ConsultasDuckDB().momentos('base2.csv', 'Genero', estado='São Paulo (SP)')
+    """
+
+    nome = 'duckdb'
+
+    def __init__(self):
+        duckdb = importar('duckdb')
+        self._conexao = duckdb.connect(':memory:')
+        self._trava = threading.Lock()
+
+    def _consultar(self, base, sql, parametros):
+        # Cada consulta usa um cursor próprio, que pode rodar em paralelo com os
+        # de outras sessões
+        with self._trava:
+            cursor = self._conexao.cursor()
+        try:
+            cursor.register('base', base)
+            return cursor.execute(sql, parametros).fetchnumpy()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _filtrada(base, variavel, idade_min, idade_max, estado):
+        # Subconsulta com a categoria (em texto) e o salário das linhas do filtro
+        if variavel not in base.columns:
+            raise KeyError(f'Coluna não encontrada na base: {variavel}')
+
+        condicoes = [f'"{variavel}" IS NOT NULL', '"Salario" IS NOT NULL']
+        parametros = []
+        if idade_min is not None:
+            condicoes.append('"Idade" >= ?')
+            parametros.append(float(idade_min))
+        if idade_max is not None:
+            condicoes.append('"Idade" <= ?')
+            parametros.append(float(idade_max))
+        if estado not in (None, 'Todos'):
+            condicoes.append('CAST("Estados" AS VARCHAR) = ?')
+            parametros.append(estado)
+
+        sql = (f'SELECT CAST("{variavel}" AS VARCHAR) AS categoria, "Salario" AS x '
+               f'FROM base WHERE {" AND ".join(condicoes)}')
+        return sql, parametros
+
+    @staticmethod
+    def _por_categoria(resultado, ordem, coluna, vazio=np.nan):
+        # Reordena uma coluna do resultado pelas categorias da tabela; as
+        # categorias fora da ordem são ignoradas, como nas funções de funcoes.py
+        posicoes = {categoria: i for i, categoria in enumerate(resultado['categoria'])}
+        # Valores nulos (desvio de um grupo com uma linha) chegam mascarados
+        valores = np.ma.filled(np.ma.asarray(resultado[coluna], dtype='float64'), np.nan)
+        return np.array([valores[posicoes[categoria]] if categoria in posicoes else vazio
+                         for categoria in ordem])
+
+    def desc_ic(self, fonte, variavel, idade_min=None, idade_max=None, estado='Todos'):
+        """Mesmo contrato de ``ConsultasPandas.desc_ic``."""
+        base = carregar_base(fonte)
+        filtrada, parametros = self._filtrada(base, variavel, idade_min, idade_max, estado)
+        resultado = self._consultar(base, f"""
+            SELECT categoria, count(*) AS n, avg(x) AS media, stddev_samp(x) AS desvio
+            FROM ({filtrada}) GROUP BY categoria
+        """, parametros)
+
+        ordem = _ordem(variavel, base)
+        contagem = self._por_categoria(resultado, ordem, 'n', vazio=0).astype(np.int64)
+        return tabela_ic(variavel, ordem, contagem, self._por_categoria(resultado, ordem, 'media'),
+                         self._por_categoria(resultado, ordem, 'desvio'))
+
+    def momentos(self, fonte, variavel, idade_min=None, idade_max=None, estado='Todos'):
+        """Mesmo contrato de ``ConsultasPandas.momentos``."""
+        base = carregar_base(fonte)
+        filtrada, parametros = self._filtrada(base, variavel, idade_min, idade_max, estado)
+
+        # A mediana de cada grupo entra no cálculo dos desvios absolutos do
+        # teste de Levene, então é calculada antes em uma subconsulta
+        resultado = self._consultar(base, f"""
+            WITH filtrada AS ({filtrada}),
+            medianas AS (SELECT categoria, median(x) AS mediana FROM filtrada GROUP BY categoria)
+            SELECT categoria, count(*) AS n, avg(x) AS media, var_samp(x) AS variancia,
+                   any_value(mediana) AS mediana,
+                   avg(abs(x - mediana)) AS media_abs,
+                   var_samp(abs(x - mediana)) AS variancia_abs
+            FROM filtrada JOIN medianas USING (categoria)
+            GROUP BY categoria
+        """, parametros)
+
+        ordem = _ordem(variavel, base)
+        momentos = {'n': self._por_categoria(resultado, ordem, 'n', vazio=0).astype(np.int64)}
+        for coluna in ['media', 'variancia', 'mediana', 'media_abs', 'variancia_abs']:
+            momentos[coluna] = self._por_categoria(resultado, ordem, coluna)
+        return pd.DataFrame(momentos, index=pd.Index(ordem, name=variavel))
+
+
+# Backends disponíveis, pelo nome usado em BACKEND_CONSULTAS
+BACKENDS = {
+    'pandas': ConsultasPandas,
+    'duckdb': ConsultasDuckDB,
+}
+
+_backends = {}
+_trava = threading.Lock()
+
+
+def backend_consultas(nome=None):
+    """
+    Retorna o backend de consultas do processo (criado uma única vez).
+
+    Args:
+        nome (str): Nome do backend (padrão: ``BACKEND_CONSULTAS`` ou 'pandas')
+
+    Returns:
+        ConsultasPandas | ConsultasDuckDB: Backend pedido, ou o backend pandas
+        se o pedido não puder ser criado
+
+    Example:
+        >>> consultas = backend_consultas()
+        >>> consultas.desc_ic(fonte_salarios(), 'Cargo')
+    """
+    nome = nome or os.environ.get('BACKEND_CONSULTAS', BACKEND_PADRAO)
+    with _trava:
+        if nome not in _backends:
+            try:
+                _backends[nome] = BACKENDS[nome]()
+            except (KeyError, ImportError) as erro:
+                logger.warning('Backend de consultas %r indisponível (%s); usando pandas',
+                               nome, erro)
+                _backends[nome] = BACKENDS[BACKEND_PADRAO]()
+        return _backends[nome]
+
+
+# Filtros da conferência: (variável, idade mínima, idade máxima, estado). Os
+# últimos deixam categorias vazias ou com uma única linha
+FILTROS_CONFERENCIA = [
+    ('Cargo', None, None, 'Todos'),
+    ('Genero', 25, 35, 'São Paulo (SP)'),
+    ('Raça', 20, 30, 'Bahia (BA)'),
+    ('Carreira', 18, 18, 'Todos'),
+    ('Experiencia', 50, 60, 'Acre (AC)'),
+    ('Cargo', 200, 300, 'Todos'),
+]
+
+
+def _tabelas_iguais(tabela1, tabela2):
+    # Mesmas categorias e valores, com NaN igual a NaN e tolerância para o
+    # arredondamento das somas
+    if not tabela1.index.equals(tabela2.index) or list(tabela1.columns) != list(tabela2.columns):
+        return False
+    for coluna in tabela1.columns:
+        valores1 = pd.to_numeric(tabela1[coluna], errors='coerce').to_numpy(dtype='float64')
+        valores2 = pd.to_numeric(tabela2[coluna], errors='coerce').to_numpy(dtype='float64')
+        if not np.allclose(valores1, valores2, rtol=1e-9, atol=1e-6, equal_nan=True):
+            return False
+    return True
+
+
+def conferir_backends(fonte='base2.csv', filtros=FILTROS_CONFERENCIA):
+    """
+    Compara as tabelas dos backends pandas e DuckDB em vários filtros.
+
+    Args:
+        fonte (str | particoes.Selecao): Fonte da base salarial
+        filtros (list): Tuplas (variável, idade mínima, idade máxima, estado)
+
+    Returns:
+        list: Pares (consulta, filtro) em que as tabelas diferem
+
+    Example:
+        >>> conferir_backends()
+        []
+    """
+    pandas_, duckdb_ = ConsultasPandas(), ConsultasDuckDB()
+    divergentes = []
+    for filtro in filtros:
+        for consulta in ['desc_ic', 'momentos']:
+            esperado = getattr(pandas_, consulta)(fonte, *filtro)
+            obtido = getattr(duckdb_, consulta)(fonte, *filtro)
+            if not _tabelas_iguais(esperado, obtido):
+                divergentes.append((consulta, filtro))
+    return divergentes
+
+
+def main():
+    # Confere a equivalência dos backends e imprime as divergências
+    divergentes = conferir_backends()
+    for consulta, filtro in divergentes:
+        print(f'{consulta} diverge em {filtro}')
+    print(f'{len(divergentes)} de {2 * len(FILTROS_CONFERENCIA)} consultas diferentes entre '
+          'pandas e DuckDB')
+    return 1 if divergentes else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
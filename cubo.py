@@ -0,0 +1,154 @@
+"""
+Cubo de Estatísticas por Idade e Estado
+=======================================
+
+Este módulo pré-calcula, para cada variável de análise, a contagem, a soma e a
+soma dos quadrados do salário em cada combinação de (categoria, estado, idade).
+Os valores são acumulados ao longo da idade, então a soma de qualquer faixa de
+idades é a diferença entre duas posições do cubo.
+
+Com isso a tabela de ``desc_ic`` para qualquer combinação de faixa de idade e
+estado é obtida em tempo proporcional ao número de categorias, sem percorrer as
+linhas da base.
+"""
+
+# Imports necessários
+import numpy as np
+import pandas as pd
+
+from funcoes import VARIAVEIS_ANALISE, ajustar_ordem, tabela_ic
+
+
+class CuboEstatisticas:
+    """
+    Somas acumuladas do salário por (variável, categoria, estado, idade).
+
+    Attributes:
+        idades (np.ndarray): Idades distintas da base, em ordem crescente
+        estados (list): Estados da base; a última posição do eixo de estados
+            guarda as linhas sem estado informado
+        ordens (dict): Categorias de cada variável, na ordem de exibição
+        deslocamento (float): Média geral do salário, subtraída antes das somas
+            para preservar a precisão da variância
+
+    Example:
+        >>> cubo = CuboEstatisticas.de_base(base)
+        >>> cubo.desc_ic('Cargo', 25, 35, 'São Paulo (SP)')
+    """
+
+    def __init__(self, idades, estados, ordens, somas, deslocamento):
+        self.idades = idades
+        self.estados = list(estados)
+        self.ordens = ordens
+        self.deslocamento = deslocamento
+        self._somas = somas
+        self._posicao_estado = {estado: i for i, estado in enumerate(self.estados)}
+
+    @classmethod
+    def de_base(cls, base, variaveis=VARIAVEIS_ANALISE):
+        """
+        Constrói o cubo a partir da base salarial.
+
+        Args:
+            base (pd.DataFrame): Base com ``Idade``, ``Estados`` e ``Salario``
+            variaveis (list): Variáveis de análise incluídas no cubo
+
+        Returns:
+            CuboEstatisticas: Cubo pronto para consultas
+        """
+        idades, pos_idade = np.unique(base['Idade'].to_numpy(), return_inverse=True)
+
+        # Linhas sem estado vão para a posição extra no fim do eixo
+        estados = pd.Categorical(base['Estados'])
+        pos_estado = estados.codes.astype(np.int64)
+        pos_estado[pos_estado < 0] = len(estados.categories)
+
+        salario = base['Salario'].to_numpy(dtype='float64')
+        deslocamento = float(salario.mean()) if len(salario) else 0.0
+        centrado = salario - deslocamento
+
+        n_estados = len(estados.categories) + 1
+        n_idades = len(idades)
+
+        ordens = {}
+        somas = {}
+        for variavel in variaveis:
+            ordem = ajustar_ordem(variavel)
+            if not ordem:  # Se não houver ordem definida, usar valores únicos da base
+                ordem = base[variavel].dropna().unique().tolist()
+            codigos = pd.Categorical(base[variavel], categories=ordem).codes
+
+            # Linhas fora das categorias conhecidas não entram em desc_ic
+            validas = codigos >= 0
+            celula = np.ravel_multi_index(
+                (codigos[validas], pos_estado[validas], pos_idade[validas]),
+                (len(ordem), n_estados, n_idades))
+            tamanho = len(ordem) * n_estados * n_idades
+
+            valores = centrado[validas]
+            cubo = np.stack([
+                np.bincount(celula, minlength=tamanho),
+                np.bincount(celula, weights=valores, minlength=tamanho),
+                np.bincount(celula, weights=valores ** 2, minlength=tamanho),
+            ]).reshape(3, len(ordem), n_estados, n_idades)
+
+            # Acumulado ao longo da idade, com um zero à esquerda
+            acumulado = np.zeros((3, len(ordem), n_estados, n_idades + 1))
+            np.cumsum(cubo, axis=3, out=acumulado[..., 1:])
+
+            ordens[variavel] = ordem
+            somas[variavel] = acumulado
+
+        return cls(idades, estados.categories, ordens, somas, deslocamento)
+
+    def momentos(self, variavel, idade_min=None, idade_max=None, estado='Todos'):
+        """
+        Retorna contagem, soma e soma dos quadrados (centradas) por categoria.
+
+        Args:
+            variavel (str): Variável de análise
+            idade_min (float): Idade mínima, inclusiva (sem limite se None)
+            idade_max (float): Idade máxima, inclusiva (sem limite se None)
+            estado (str): Estado selecionado, ou 'Todos'
+
+        Returns:
+            np.ndarray: Matriz (3 x categorias)
+        """
+        somas = self._somas[variavel]
+
+        inicio = 0 if idade_min is None else np.searchsorted(self.idades, idade_min, side='left')
+        fim = len(self.idades) if idade_max is None else np.searchsorted(self.idades, idade_max, side='right')
+        fim = max(inicio, fim)
+        faixa = somas[..., fim] - somas[..., inicio]
+
+        if estado == 'Todos':
+            return faixa.sum(axis=2)
+
+        posicao = self._posicao_estado.get(estado)
+        if posicao is None:
+            return np.zeros(faixa.shape[:2])
+        return faixa[..., posicao]
+
+    def desc_ic(self, variavel, idade_min=None, idade_max=None, estado='Todos'):
+        """
+        Calcula a tabela de ``desc_ic`` para um filtro de idade e estado.
+
+        Args:
+            variavel (str): Variável de análise
+            idade_min (float): Idade mínima, inclusiva (sem limite se None)
+            idade_max (float): Idade máxima, inclusiva (sem limite se None)
+            estado (str): Estado selecionado, ou 'Todos'
+
+        Returns:
+            pd.DataFrame: Mesmo resultado de ``desc_ic`` sobre a base filtrada
+        """
+        n, soma, soma2 = self.momentos(variavel, idade_min, idade_max, estado)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = soma / n
+            variancia = (soma2 - soma * media) / (n - 1)
+        desvio = np.sqrt(np.clip(variancia, 0, None))
+        desvio[n < 2] = np.nan
+
+        return tabela_ic(variavel, self.ordens[variavel], n.astype(np.int64),
+                         media + self.deslocamento, desvio)
@@ -0,0 +1,379 @@
+"""
+Carregamento Compartilhado das Bases de Dados
+=============================================
+
+Este módulo centraliza a leitura dos arquivos de dados usados pelas páginas do
+dashboard. Cada arquivo é lido uma única vez por processo e o DataFrame
+resultante é compartilhado entre todas as sessões e páginas do Streamlit.
+
+A leitura é refeita automaticamente quando a assinatura do arquivo (data de
+modificação e tamanho) muda, de modo que basta substituir o arquivo em disco
+para que a nova versão passe a ser servida. Quando existe um snapshot colunar
+atualizado do arquivo (ver ``snapshot.py``), ele é mapeado em memória no lugar
+da leitura do CSV.
+
+A base salarial também pode vir do armazém particionado por edição e região
+(ver ``particoes.py``): ``fonte_salarios`` escolhe as partições que um filtro
+pode tocar e a seleção resultante é aceita no lugar do nome do arquivo por
+``carregar_base``, ``carregar_cubo``, ``carregar_indice`` e ``versao_dados``.
+
+Importante: os DataFrames retornados são compartilhados entre sessões e devem
+ser tratados como somente leitura.
+"""
+
+# Imports necessários
+import os
+import threading
+
+import pandas as pd
+
+import particoes
+import snapshot
+from cubo import CuboEstatisticas
+from indices import IndiceFiltros
+from respostas import RespostasMultiplas
+
+# Diretório do projeto, usado para resolver os caminhos relativos dos arquivos
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Colunas lidas da base salarial e seus tipos
+COLUNAS_BASE = {
+    'Idade': 'float64',
+    'Genero': 'category',
+    'Estados': 'category',
+    'Cargo': 'category',
+    'Carreira': 'category',
+    'Salario': 'float64',
+    'Experiencia': 'category',
+    'Raça': 'category',
+    'Região': 'category',
+}
+
+# Colunas sem as quais a linha da base salarial é descartada na leitura
+COLUNAS_OBRIGATORIAS = ['Idade', 'Salario']
+
+# Armazém particionado da base salarial (ver particoes.py)
+ARMAZEM_SALARIOS = os.path.join(DIRETORIO, particoes.PASTA_PARTICOES, 'salarios')
+
+# Cache do processo: caminho (ou seleção de partições) -> (assinatura, dados)
+_cache = {}
+_trava = threading.Lock()
+
+# Estruturas derivadas das bases: (caminho, nome) -> (DataFrame de origem, valor)
+_derivados = {}
+
+
+def caminho_dados(nome):
+    # Resolve o nome do arquivo em relação ao diretório do projeto
+    if os.path.isabs(nome):
+        return nome
+    return os.path.join(DIRETORIO, nome)
+
+
+def assinatura_arquivo(caminho):
+    """
+    Calcula a assinatura de um arquivo a partir dos metadados do sistema.
+
+    Args:
+        caminho (str): Caminho do arquivo
+
+    Returns:
+        tuple: Par (data de modificação em nanossegundos, tamanho em bytes)
+    """
+    info = os.stat(caminho)
+    return (info.st_mtime_ns, info.st_size)
+
+
+def _chave(caminho):
+    # Uma seleção de partições já identifica a fonte; nomes de arquivo são resolvidos
+    if isinstance(caminho, particoes.Selecao):
+        return caminho
+    return caminho_dados(caminho)
+
+
+def _origem(caminho, leitor):
+    # Origem, assinatura e leitor da versão atual de um caminho já resolvido
+    if isinstance(caminho, particoes.Selecao):
+        # Partições do armazém: a versão é a do manifesto, trocado a cada gravação
+        return caminho, particoes.assinatura_manifesto(caminho.armazem), particoes.abrir_selecao
+
+    # Um snapshot colunar atualizado tem prioridade sobre o CSV
+    snapshot_atual = snapshot.snapshot_valido(caminho)
+    if snapshot_atual is not None:
+        origem, assinatura = snapshot_atual
+        return origem, assinatura, snapshot.abrir_snapshot
+    return caminho, assinatura_arquivo(caminho), leitor
+
+
+def _carregar(caminho, leitor, construtor=None):
+    caminho = _chave(caminho)
+    origem, assinatura, leitor = _origem(caminho, leitor)
+
+    # Retorna a versão em cache se a origem e a assinatura não mudaram
+    with _trava:
+        em_cache = _cache.get(caminho)
+        if em_cache is not None and em_cache[0] == (origem, assinatura):
+            return em_cache[1]
+
+        dados = leitor(origem)
+        if construtor is not None:
+            # Só a estrutura construída fica em cache; os dados lidos são descartados
+            dados = construtor(dados)
+        if isinstance(caminho, particoes.Selecao):
+            _descartar_selecoes(caminho.armazem, assinatura)
+        _cache[caminho] = ((origem, assinatura), dados)
+        return dados
+
+
+def _descartar_selecoes(armazem, assinatura):
+    # Cada regravação do armazém gera novos diretórios de partições, e as
+    # seleções da versão anterior nunca mais são pedidas: sem o descarte, o
+    # cache cresceria a cada regravação. Chamada com a trava adquirida
+    antigas = {chave for chave, ((_, assinatura_antiga), _) in _cache.items()
+               if isinstance(chave, particoes.Selecao) and chave.armazem == armazem
+               and assinatura_antiga != assinatura}
+    for chave in antigas:
+        del _cache[chave]
+    for chave in [chave for chave in _derivados if chave[0] in antigas]:
+        del _derivados[chave]
+
+
+def versao_dados(caminho):
+    """
+    Identifica a versão de um arquivo atualmente em cache.
+
+    Args:
+        caminho (str | particoes.Selecao): Nome ou caminho do arquivo, ou
+            seleção de partições do armazém
+
+    Returns:
+        tuple | None: Origem e assinatura da versão carregada, ou None se o
+        arquivo ainda não foi carregado
+    """
+    with _trava:
+        em_cache = _cache.get(_chave(caminho))
+    return None if em_cache is None else em_cache[0]
+
+
+def _derivar(caminho, leitor, nome, construtor):
+    # Constrói uma estrutura a partir da base em cache e a reaproveita enquanto
+    # a base não for recarregada
+    base = _carregar(caminho, leitor)
+    chave = (_chave(caminho), nome)
+    with _trava:
+        em_cache = _derivados.get(chave)
+        if em_cache is not None and em_cache[0] is base:
+            return em_cache[1]
+
+    valor = construtor(base)
+    with _trava:
+        # Não guarda a estrutura se a base foi descartada durante a construção
+        em_cache = _cache.get(chave[0])
+        if em_cache is not None and em_cache[1] is base:
+            _derivados[chave] = (base, valor)
+    return valor
+
+
+def _ler_base(caminho):
+    base = pd.read_csv(caminho, sep=',', encoding='utf-8',
+                       usecols=list(COLUNAS_BASE), dtype=COLUNAS_BASE)
+
+    # Remover linhas com dados inválidos nas colunas críticas
+    base = base.dropna(subset=COLUNAS_OBRIGATORIAS)
+    return base.reset_index(drop=True)
+
+
+def _ler_cientista(caminho):
+    # A primeira coluna do arquivo é o índice salvo pelo pandas
+    base = pd.read_csv(caminho, sep=',', encoding='utf-8', index_col=0)
+    return base.astype('float32')
+
+
+# Arquivos de dados do projeto e a função de leitura de cada um
+ARQUIVOS_DADOS = {
+    'base.csv': _ler_base,
+    'base2.csv': _ler_base,
+    'cientista_a-c.csv': _ler_cientista,
+    'cientista_d.csv': _ler_cientista,
+}
+
+
+def carregar_base(caminho='base2.csv'):
+    """
+    Carrega a base salarial tratada, compartilhada entre todas as sessões.
+
+    Args:
+        caminho (str | particoes.Selecao): Nome ou caminho do arquivo CSV, ou
+            seleção de partições do armazém (ver ``fonte_salarios``)
+
+    Returns:
+        pd.DataFrame: Base com as colunas de ``COLUNAS_BASE``, sem linhas
+        faltantes em ``Idade`` e ``Salario``
+
+    Example:
+        >>> base = carregar_base()
+        >>> base['Salario'].mean()
+    """
+    return _carregar(caminho, _ler_base)
+
+
+def carregar_cubo(caminho='base2.csv'):
+    """
+    Carrega o cubo de estatísticas por idade e estado da base salarial.
+
+    Args:
+        caminho (str | particoes.Selecao): Nome ou caminho do arquivo CSV, ou
+            seleção de partições do armazém
+
+    Returns:
+        CuboEstatisticas: Cubo construído uma vez por versão da base
+
+    Example:
+        >>> cubo = carregar_cubo()
+        >>> cubo.desc_ic('Genero', 20, 30)
+    """
+    return _derivar(caminho, _ler_base, 'cubo', CuboEstatisticas.de_base)
+
+
+def carregar_indice(caminho='base2.csv'):
+    """
+    Carrega os índices de idade e estado usados nos filtros da base salarial.
+
+    Args:
+        caminho (str | particoes.Selecao): Nome ou caminho do arquivo CSV, ou
+            seleção de partições do armazém
+
+    Returns:
+        IndiceFiltros: Índice construído uma vez por versão da base
+
+    Example:
+        >>> indice = carregar_indice()
+        >>> indice.visao(carregar_base(), 20, 30, 'Bahia (BA)')
+    """
+    return _derivar(caminho, _ler_base, 'indice', IndiceFiltros.de_base)
+
+
+def _manifesto_salarios(armazem):
+    # Manifesto do armazém, ou None se ele não existir ou estiver vazio
+    manifesto = particoes.ler_manifesto(armazem)
+    if manifesto is None or not manifesto['particoes']:
+        return None
+    return manifesto
+
+
+def edicoes_salarios(armazem=ARMAZEM_SALARIOS):
+    """
+    Lista as edições da pesquisa presentes no armazém particionado.
+
+    Args:
+        armazem (str): Diretório do armazém
+
+    Returns:
+        list: Anos das edições, em ordem crescente (vazia sem armazém)
+    """
+    manifesto = _manifesto_salarios(armazem)
+    return [] if manifesto is None else particoes.edicoes(manifesto)
+
+
+def fonte_salarios(edicao=None, idade_min=None, idade_max=None, estado='Todos',
+                   armazem=ARMAZEM_SALARIOS):
+    """
+    Escolhe de onde ler a base salarial para um filtro.
+
+    Com o armazém particionado, são selecionadas pelo manifesto apenas as
+    partições da edição que podem ter linhas do filtro; as linhas em si ainda
+    devem ser filtradas (ver ``carregar_indice``). Sem armazém, a fonte é
+    ``base2.csv``.
+
+    Args:
+        edicao (int): Edição da pesquisa (a mais recente se None)
+        idade_min (float): Idade mínima do filtro
+        idade_max (float): Idade máxima do filtro
+        estado (str): Estado do filtro, ou 'Todos'
+        armazem (str): Diretório do armazém
+
+    Returns:
+        particoes.Selecao | str: Fonte aceita por ``carregar_base``
+
+    Example:
+        >>> fonte = fonte_salarios(2023, 20, 30, 'Bahia (BA)')
+        >>> carregar_indice(fonte).visao(carregar_base(fonte), 20, 30, 'Bahia (BA)')
+    """
+    manifesto = _manifesto_salarios(armazem)
+    if manifesto is None:
+        return 'base2.csv'
+
+    edicao = particoes.edicoes(manifesto)[-1] if edicao is None else edicao
+    valores = {} if estado in (None, 'Todos') else {'Estados': [estado]}
+    selecionadas = particoes.selecionar(manifesto, edicoes=[edicao],
+                                        faixas={'Idade': (idade_min, idade_max)},
+                                        valores=valores)
+    return particoes.Selecao(armazem, tuple(particao['diretorio'] for particao in selecionadas))
+
+
+def limites_salarios(coluna, edicao=None, armazem=ARMAZEM_SALARIOS):
+    """
+    Calcula o menor e o maior valor de uma coluna numérica da base salarial.
+
+    Com o armazém particionado, os limites vêm do manifesto, sem ler as
+    partições.
+
+    Args:
+        coluna (str): Coluna numérica (ex.: 'Idade')
+        edicao (int): Edição da pesquisa (a mais recente se None)
+        armazem (str): Diretório do armazém
+
+    Returns:
+        tuple: Par (mínimo, máximo)
+    """
+    manifesto = _manifesto_salarios(armazem)
+    if manifesto is None:
+        serie = carregar_base('base2.csv')[coluna]
+        return serie.min(), serie.max()
+
+    edicao = particoes.edicoes(manifesto)[-1] if edicao is None else edicao
+    selecionadas = [particao for particao in particoes.selecionar(manifesto, edicoes=[edicao])
+                    if particao['minimos'][coluna] is not None]
+    return (min(particao['minimos'][coluna] for particao in selecionadas),
+            max(particao['maximos'][coluna] for particao in selecionadas))
+
+
+def carregar_cientista(caminho):
+    """
+    Lê uma das bases de respostas múltiplas do cientista de dados.
+
+    A base densa não fica em cache: as páginas usam as respostas compactadas
+    de ``carregar_respostas``.
+
+    Args:
+        caminho (str): Nome ou caminho do arquivo CSV
+
+    Returns:
+        pd.DataFrame: Uma coluna por opção de resposta, com valores 0, 1 ou NaN
+
+    Example:
+        >>> base1 = carregar_cientista('cientista_a-c.csv')
+    """
+    origem, _, leitor = _origem(_chave(caminho), _ler_cientista)
+    return leitor(origem)
+
+
+def carregar_respostas(caminho):
+    """
+    Carrega uma base do cientista de dados compactada em bitsets.
+
+    Apenas os bitsets ficam em cache; a base densa é descartada depois da
+    compactação.
+
+    Args:
+        caminho (str): Nome ou caminho do arquivo CSV
+
+    Returns:
+        RespostasMultiplas: Um bitset por opção de resposta, com os totais de
+        cada opção já calculados
+
+    Example:
+        >>> respostas = carregar_respostas('cientista_d.csv')
+        >>> respostas.totais()
+    """
+    return _carregar(caminho, _ler_cientista, RespostasMultiplas.de_dataframe)
@@ -0,0 +1,112 @@
+"""
+Densidade de Kernel por Convolução (FFT)
+========================================
+
+Estimativa de densidade de kernel gaussiano para várias categorias de uma vez.
+Os valores de cada categoria são distribuídos numa grade fixa por binning
+linear e a grade é convoluída com o kernel via FFT, em uma única chamada para
+todas as categorias.
+
+O custo é O(n + G log G) por categoria (G = pontos da grade), em vez de
+O(n x G) da avaliação direta do kernel em cada ponto da grade. A largura de
+banda segue a regra de Scott, a mesma usada por padrão no ``sns.kdeplot``.
+"""
+
+# Imports necessários
+import numpy as np
+
+# Pontos da grade e extensão além dos extremos dos dados, em larguras de banda
+PONTOS_GRADE = 1024
+CORTE = 3
+
+
+def largura_scott(n, desvio):
+    """
+    Calcula a largura de banda pela regra de Scott.
+
+    Args:
+        n (array): Número de observações de cada categoria
+        desvio (array): Desvio padrão amostral de cada categoria
+
+    Returns:
+        np.ndarray: Largura de banda de cada categoria
+    """
+    n = np.asarray(n, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.asarray(desvio, dtype='float64') * n ** (-1 / 5)
+
+
+def densidades(valores, codigos, n_categorias, pontos=PONTOS_GRADE, corte=CORTE):
+    """
+    Estima a densidade de cada categoria numa grade comum.
+
+    Categorias com menos de duas observações ou sem variação ficam com a
+    densidade preenchida com NaN.
+
+    Args:
+        valores (np.ndarray): Valores observados
+        codigos (np.ndarray): Código da categoria de cada valor (negativo para
+            ignorar o valor)
+        n_categorias (int): Número de categorias
+        pontos (int): Número de pontos da grade
+        corte (float): Extensão da grade além dos dados, em larguras de banda
+
+    Returns:
+        dict: ``grade`` (pontos x), ``densidade`` (categorias x pontos),
+        ``suporte`` (categorias x 2, intervalo de cada curva) e ``n``
+
+    Example:
+        >>> resultado = densidades(salarios, codigos, 5)
+        >>> resultado['densidade'].shape
+        (5, 1024)
+    """
+    valores = np.asarray(valores, dtype='float64')
+    codigos = np.asarray(codigos)
+    validos = (codigos >= 0) & np.isfinite(valores)
+    valores, codigos = valores[validos], codigos[validos].astype(np.int64)
+
+    # Estatísticas por categoria em uma passada
+    n = np.bincount(codigos, minlength=n_categorias).astype('float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.bincount(codigos, weights=valores, minlength=n_categorias) / n
+        desvio = np.sqrt(np.bincount(codigos, weights=(valores - media[codigos]) ** 2,
+                                     minlength=n_categorias) / (n - 1))
+    largura = largura_scott(n, desvio)
+    usaveis = (n >= 2) & (largura > 0)
+
+    minimo = np.full(n_categorias, np.inf)
+    maximo = np.full(n_categorias, -np.inf)
+    np.minimum.at(minimo, codigos, valores)
+    np.maximum.at(maximo, codigos, valores)
+    suporte = np.column_stack([minimo - corte * largura, maximo + corte * largura])
+
+    densidade = np.full((n_categorias, pontos), np.nan)
+    if not usaveis.any():
+        return {'grade': np.linspace(0, 1, pontos), 'densidade': densidade,
+                'suporte': suporte, 'n': n}
+
+    # Grade comum cobrindo o suporte de todas as categorias
+    inicio = suporte[usaveis, 0].min()
+    fim = suporte[usaveis, 1].max()
+    grade = np.linspace(inicio, fim, pontos)
+    passo = grade[1] - grade[0]
+
+    # Binning linear: cada valor é dividido entre os dois pontos vizinhos
+    posicao = (valores - inicio) / passo
+    esquerda = np.clip(np.floor(posicao).astype(np.int64), 0, pontos - 2)
+    peso = posicao - esquerda
+    celula = codigos * pontos + esquerda
+    contagens = (np.bincount(celula, weights=1 - peso, minlength=n_categorias * pontos)
+                 + np.bincount(celula + 1, weights=peso, minlength=n_categorias * pontos))
+    contagens = contagens.reshape(n_categorias, pontos)[usaveis]
+
+    # Convolução circular com preenchimento de zeros para evitar sobreposição
+    tamanho = 2 * pontos
+    deslocamentos = np.fft.fftfreq(tamanho, d=1 / tamanho) * passo
+    h = largura[usaveis, None]
+    kernel = np.exp(-0.5 * (deslocamentos / h) ** 2) / (h * np.sqrt(2 * np.pi))
+    espectro = np.fft.rfft(contagens, n=tamanho, axis=1) * np.fft.rfft(kernel, axis=1)
+    convoluida = np.fft.irfft(espectro, n=tamanho, axis=1)[:, :pontos]
+
+    densidade[usaveis] = np.clip(convoluida, 0, None) / n[usaveis, None]
+    return {'grade': grade, 'densidade': densidade, 'suporte': suporte, 'n': n}
@@ -19,10 +19,22 @@ Data: 28/08/2025
 # Imports necessários
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import scipy.stats
-from scipy import stats
+
+from testes import CORRECOES, matriz_testes, teste_de_momentos
+from reamostragem import ESTATISTICAS, REAMOSTRAS, ic_bootstrap, teste_permutacao
+from renderizacao import criar_figura, paleta_cores
+from plano import PlanoConsulta
+from importacao import importar_tardio
+from medicao import medido
+
+# Bibliotecas pesadas, importadas apenas no primeiro uso (testes e gráficos de
+# comparação), para não pesar no carregamento inicial da página
+sns = importar_tardio('seaborn')
+stats = importar_tardio('scipy.stats')
+
+# Variáveis disponíveis para análise no dashboard salarial
+VARIAVEIS_ANALISE = ['Cargo', 'Carreira', 'Genero', 'Raça', 'Experiencia']
+
 
 def ajustar_ordem(variavel):
     # Função para definir a ordem de exibição das categorias da variável
@@ -43,78 +55,120 @@ def ajustar_ordem(variavel):
     return ordem
 
 
-def desc_ic(variavel, base):
+def plano_consulta(variavel, base):
+    """
+    Cria o plano de consulta de uma variável sobre a base (ver ``plano.py``).
+
+    O plano é criado uma vez por execução da página e repassado às funções
+    deste módulo pelo parâmetro ``plano``, para que a base seja agrupada uma
+    única vez; sem ele, cada função cria o seu.
 
-  # Ajustando a ordem das categorias
-  ordem = ajustar_ordem(variavel)
-  if not ordem:  # Se não houver ordem definida, usar valores únicos da base
-      ordem = base[variavel].unique().tolist()
-  
-  base[variavel] = pd.Categorical(base[variavel], categories = ordem, ordered=True)
+    Args:
+        variavel (str): Nome da variável de análise
+        base (pd.DataFrame | VisaoBase): Base com a variável e a coluna ``Salario``
 
-  # Agrupar a base pela variável e calcular as estatísticas
-  tabela = base.groupby(variavel)['Salario'].agg(['count', 'mean', 'std'])
+    Returns:
+        PlanoConsulta: Plano ainda não calculado (a base só é percorrida no
+        primeiro uso)
 
-  # Listas para armazenar os intervalos de confiança
-  icinf = []
-  icsup = []
+    Example:
+        >>> plano = plano_consulta('Cargo', base_filtrada)
+        >>> desc_ic('Cargo', base_filtrada, plano=plano)
+    """
+    ordem = ajustar_ordem(variavel)
+    if not ordem:  # Se não houver ordem definida, usar valores únicos da base
+        ordem = base[variavel].dropna().unique().tolist()
+    return PlanoConsulta(variavel, base, ordem)
 
-  # Iterando sobre as linhas de tabela usando o índice real (não o índice numérico)
-  for idx in tabela.index:
-        media = tabela.loc[idx, 'mean']
-        std = tabela.loc[idx, 'std']
-        n = tabela.loc[idx, 'count']
 
-        # Cálculo do intervalo de confiança inferior e superior
-        icinf.append(media - 1.96 * std / np.sqrt(n))
-        icsup.append(media + 1.96 * std / np.sqrt(n))
+def tabela_ic(variavel, ordem, contagem, media, desvio):
+    """
+    Monta a tabela de estatísticas e intervalos de confiança a partir das
+    estatísticas já agregadas de cada categoria.
 
+    Args:
+        variavel (str): Nome da variável de análise
+        ordem (list): Categorias, na ordem de exibição
+        contagem (array): Número de observações de cada categoria
+        media (array): Média salarial de cada categoria
+        desvio (array): Desvio padrão amostral de cada categoria
 
+    Returns:
+        pd.DataFrame: Mesmo formato de ``desc_ic``, sem as categorias vazias
+    """
+    indice = pd.CategoricalIndex(ordem, categories=ordem, ordered=True, name=variavel)
+    tabela = pd.DataFrame({'count': contagem, 'mean': media, 'std': desvio}, index=indice)
+    tabela = tabela[tabela['count'] > 0]
 
-  # Adiciona as colunas de intervalo de confiança
-  tabela['ic inf'] = icinf
-  tabela['ic sup'] = icsup
+    # Cálculo do intervalo de confiança inferior e superior
+    erro = 1.96 * tabela['std'] / np.sqrt(tabela['count'])
+    tabela['ic inf'] = tabela['mean'] - erro
+    tabela['ic sup'] = tabela['mean'] + erro
 
-  tabela.rename(columns = {
-      'count': 'Frequência',
-      'mean': 'Média',
-      'std': 'Desvio Padrão',
-      'ic inf': 'I.C Inferior',
-      'ic sup': 'I.C Superior'
-  })
+    tabela.columns = ['Tamanho', 'Média', 'Desvio padrão', 'I.C Inferior', 'I.C Superior']
 
-  tabela.columns = ['Tamanho', 'Média', 'Desvio padrão', 'I.C Inferior', 'I.C Superior']
+    return tabela.round(2)
 
 
-  return tabela.round(2)
+@medido
+def desc_ic(variavel, base, plano=None):
 
-def grafico_density(variavel, base):
+  # Grupos da variável, do plano da execução ou agrupados agora (a base pode
+  # ser compartilhada entre sessões e não é modificada)
+  if plano is None:
+      plano = plano_consulta(variavel, base)
+  momentos = plano.momentos
 
-    # Ajustando a ordem das categorias da variavel
-    ordem = ajustar_ordem(variavel)
-    if not ordem:  # Se não houver ordem definida, usar valores únicos da base
-        ordem = base[variavel].unique().tolist()
-    
-    base[variavel] = pd.Categorical(base[variavel], categories=ordem, ordered=True)
+  return tabela_ic(variavel, plano.ordem, plano.n, momentos['media'].to_numpy(),
+                   np.sqrt(momentos['variancia'].to_numpy()))
+
+@medido
+def grafico_density(variavel, base, plano=None):
+
+    # Densidades de todas as categorias em uma única convolução via FFT,
+    # sobre os grupos do plano da execução
+    if plano is None:
+        plano = plano_consulta(variavel, base)
+    ordem = plano.ordem
+    resultado = plano.densidades
+    grade = resultado['grade']
 
     # Criando a figura
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = criar_figura(figsize=(8, 6))
     
-    # Plotando a curva de densidade de Kernel para cada categoria
-    sns.kdeplot(data=base, x='Salario', hue=variavel, fill=True, common_norm=False, alpha=0.25, ax=ax)
+    # Plotando a curva de densidade de Kernel para cada categoria, dentro do
+    # suporte de cada uma (como no sns.kdeplot)
+    paleta = paleta_cores(len(ordem))
+    desenhadas = 0
+    for categoria, cor, curva, (inicio, fim) in zip(ordem, paleta, resultado['densidade'], resultado['suporte']):
+        if np.isnan(curva).all():
+            continue
+        dentro = (grade >= inicio) & (grade <= fim)
+        ax.fill_between(grade[dentro], curva[dentro], color=cor, alpha=0.25, linewidth=0)
+        ax.plot(grade[dentro], curva[dentro], color=cor, label=categoria)
+        desenhadas += 1
 
     # Configurações do gráfico
     ax.set_title('Curvas de Densidade de Kernel por Categoria')
     ax.set_xlabel('Salário')
     ax.set_ylabel('Densidade')
+    if desenhadas:
+        ax.legend(title=variavel)
+    else:
+        # Todas as categorias têm menos de duas observações no filtro
+        ax.text(0.5, 0.5, 'Dados insuficientes para estimar a densidade\n'
+                '(cada categoria precisa de ao menos duas observações)',
+                ha='center', va='center', color='gray', transform=ax.transAxes)
     ax.grid(True)
 
     # Retornando a figura
     return fig
 
-def graf_ic(variavel, base):
-    # Criando a tabela
-    tabela = desc_ic(variavel, base)
+@medido
+def graf_ic(variavel, base, tabela=None, plano=None):
+    # Criando a tabela (ou usando a tabela já calculada de desc_ic)
+    if tabela is None:
+        tabela = desc_ic(variavel, base, plano=plano)
 
     # Reordena a tabela pela ordem das categorias do índice
     tabela = tabela.sort_index()
@@ -133,7 +187,7 @@ def graf_ic(variavel, base):
     erro_superior = ic_superior - medias
 
     # Criando a figura
-    fig, ax = plt.subplots(figsize=(8, 5))
+    fig, ax = criar_figura(figsize=(8, 5))
     
     # Plotando barras horizontais
     ax.barh(categorias, medias, xerr=[erro_inferior, erro_superior], capsize=5, color='lightblue', edgecolor='black')
@@ -144,29 +198,59 @@ def graf_ic(variavel, base):
     return fig
 
 
-def boxplot(variavel, base):
+def resumo_boxplot(variavel, base, plano=None):
+    """
+    Calcula as estatísticas do boxplot de cada categoria da variável.
 
-    ordem = ajustar_ordem(variavel)
-    if not ordem:  # Se não houver ordem definida, usar valores únicos da base
-        ordem = base[variavel].unique().tolist()
+    Args:
+        variavel (str): Nome da variável de análise
+        base (pd.DataFrame | VisaoBase): Base com a variável e a coluna ``Salario``
+        plano (PlanoConsulta): Plano da execução (ver ``plano_consulta``)
 
-    base[variavel] = pd.Categorical(base[variavel], categories = ordem, ordered = True)
+    Returns:
+        ResumoBoxplot: Quartis, bigodes, médias e amostra de outliers; a
+        tabela em ``resumo.tabela`` pode ser exportada diretamente
+    """
+    if plano is None:
+        plano = plano_consulta(variavel, base)
+    return plano.resumo_boxplot
+
+
+@medido
+def boxplot(variavel, base, resumo=None, plano=None):
+
+    # Estatísticas já calculadas (ou calculadas agora, em uma passada)
+    if resumo is None:
+        resumo = resumo_boxplot(variavel, base, plano)
+    ordem = resumo.ordem
 
     # cria uma paleta com o mesmo número de cores das categorias
-    paleta = sns.color_palette(n_colors=len(ordem))
+    # (com a mesma saturação usada pelo seaborn nos boxplots)
+    paleta = paleta_cores(len(ordem), saturacao=0.75)
 
     # mapeia as cores para cada categoria da variável
     cores_dict = dict(zip(ordem, paleta))
     
     # Criando a figura
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = criar_figura(figsize=(10, 6))
     
-    # Criando o boxplot
-    sns.boxplot(
-        x=variavel, y='Salario', data=base, showmeans=True, palette=cores_dict,
+    # Desenhando o boxplot diretamente das estatísticas, sem as linhas da base
+    # (as caixas são patches: a cor da borda não pode ir em 'color', que
+    # sobrescreveria também o preenchimento)
+    linhas = {'color': '#3f3f3f'}
+    caixas = ax.bxp(
+        resumo.para_bxp(), positions=resumo.posicoes(), widths=0.8,
+        patch_artist=True, showmeans=True,
+        boxprops={'edgecolor': '#3f3f3f'}, whiskerprops=linhas, capprops=linhas, medianprops=linhas,
+        flierprops={'marker': 'd', 'markerfacecolor': '#3f3f3f', 'markeredgecolor': '#3f3f3f', 'markersize': 5},
         meanprops={'marker': 'D', 'markerfacecolor': 'red', 'markeredgecolor': 'black', 'markersize': 7},
-        ax=ax
     )
+    for caixa, categoria in zip(caixas['boxes'], resumo.tabela.index):
+        caixa.set_facecolor(cores_dict[categoria])
+
+    # Todas as categorias aparecem no eixo, mesmo as vazias
+    ax.set_xticks(range(len(ordem)), ordem)
+    ax.set_xlim(-0.5, len(ordem) - 0.5)
 
     # Ajustes visuais
     ax.set_xlabel(variavel, fontsize=10)
@@ -180,46 +264,97 @@ def boxplot(variavel, base):
 
 
 
-def hipoteses(variavel, categoria1, categoria2, base):
+@medido
+def momentos_categorias(variavel, base, plano=None):
+    """
+    Calcula as estatísticas suficientes do salário em cada categoria.
+
+    Args:
+        variavel (str): Nome da variável de análise
+        base (pd.DataFrame | VisaoBase): Base com a variável e a coluna ``Salario``
+        plano (PlanoConsulta): Plano da execução (ver ``plano_consulta``)
+
+    Returns:
+        pd.DataFrame: Uma linha por categoria com ``n``, ``media``,
+        ``variancia``, ``mediana``, ``media_abs`` e ``variancia_abs``
+    """
+    if plano is None:
+        plano = plano_consulta(variavel, base)
+    return plano.momentos
+
+
+def _momentos_grupo(momentos, categoria):
+    # Momentos de uma categoria (grupo vazio se ela não estiver na tabela)
+    if categoria in momentos.index:
+        return momentos.loc[categoria]
+    return pd.Series({'n': 0, 'media': np.nan, 'variancia': np.nan,
+                      'media_abs': np.nan, 'variancia_abs': np.nan})
+
+
+# Define o limite para considerar uma amostra "grande"
+LIMITE_AMOSTRA_GRANDE = 30
+
+TEXTO_AMOSTRAS_GRANDES = 'Amostras grandes detectadas. O Teste T é robusto devido ao Teorema do Limite Central, mesmo com pequenos desvios da normalidade.'
+
+
+@medido
+def hipoteses(variavel, categoria1, categoria2, base, matriz=None, momentos=None, plano=None):
     try:
         texto_final = ''
-        grupo1 = base[base[variavel] == categoria1]['Salario'].dropna()
-        grupo2 = base[base[variavel] == categoria2]['Salario'].dropna()
+        # Estatísticas suficientes dos grupos: da matriz de todos os pares, já
+        # calculadas pela página ou calculadas agora em uma passada
+        if plano is None:
+            plano = plano_consulta(variavel, base)
+        if momentos is None:
+            momentos = matriz.grupos if matriz is not None else plano.momentos
+        grupo1 = _momentos_grupo(momentos, categoria1)
+        grupo2 = _momentos_grupo(momentos, categoria2)
 
         # Verificar se os grupos têm dados suficientes
-        if len(grupo1) < 10 or len(grupo2) < 10:
+        if grupo1['n'] < 10 or grupo2['n'] < 10:
             return f'''<div style="padding: 1.5rem; background-color: #fff3cd; border-radius: 10px; border: 1px solid #ffeaa7; font-size: 16px;">
 <strong>⚠️ Dados insuficientes:</strong> (...)
 </div>'''
         
-        # Define o limite para considerar uma amostra "grande"
-        LIMITE_AMOSTRA_GRANDE = 30 
-        
         # 1. Lógica condicional baseada no tamanho da amostra
         # Se a amostra for pequena, verificamos a normalidade. Se for grande, confiamos no TLC.
-        if len(grupo1) < LIMITE_AMOSTRA_GRANDE or len(grupo2) < LIMITE_AMOSTRA_GRANDE:
-            # AMOSTRAS PEQUENAS: obrigatório testar normalidade
-            norm1 = scipy.stats.shapiro(grupo1)
-            norm2 = scipy.stats.shapiro(grupo2)
+        transformados = False
+        if grupo1['n'] < LIMITE_AMOSTRA_GRANDE or grupo2['n'] < LIMITE_AMOSTRA_GRANDE:
+            # AMOSTRAS PEQUENAS: obrigatório testar normalidade (só aqui os
+            # valores dos grupos, que são pequenos, são lidos do plano)
+            valores1 = plano.valores_categoria(categoria1)
+            valores2 = plano.valores_categoria(categoria2)
+            norm1 = stats.shapiro(valores1)
+            norm2 = stats.shapiro(valores2)
 
             if norm1[1] < 0.05 or norm2[1] < 0.05:
                 # Dados não normais em amostra pequena -> TRANSFORMAÇÃO
                 texto_final += 'Amostras pequenas e dados não-normais. Aplicando transformação Box-Cox para normalizar.'
-                grupo1, _ = scipy.stats.boxcox(grupo1) # Usando a atribuição dupla para pegar só o array
-                grupo2, _ = scipy.stats.boxcox(grupo2)
+                valores1, _ = stats.boxcox(valores1) # Usando a atribuição dupla para pegar só o array
+                valores2, _ = stats.boxcox(valores2)
+                transformados = True
             else:
                 texto_final = 'Amostras pequenas com dados normais.'
         else:
             # AMOSTRAS GRANDES: confiamos no Teorema do Limite Central
-            texto_final = 'Amostras grandes detectadas. O Teste T é robusto devido ao Teorema do Limite Central, mesmo com pequenos desvios da normalidade.'
+            texto_final = TEXTO_AMOSTRAS_GRANDES
         
         # 2. Teste de Levene e Teste T (procedimento agora é o mesmo para ambos os casos)
-        teste_levene = scipy.stats.levene(grupo1, grupo2)[1]
+        if transformados:
+            # Os valores transformados não têm momentos pré-calculados
+            teste_levene = stats.levene(valores1, valores2)[1]
 
-        if teste_levene > 0.05:
-            p_value = scipy.stats.ttest_ind(grupo1, grupo2, equal_var=True)[1]
+            if teste_levene > 0.05:
+                p_value = stats.ttest_ind(valores1, valores2, equal_var=True)[1]
+            else:
+                p_value = stats.ttest_ind(valores1, valores2, equal_var=False)[1]
         else:
-            p_value = scipy.stats.ttest_ind(grupo1, grupo2, equal_var=False)[1]
+            # Consulta à matriz de todos os pares ou cálculo direto pelos momentos
+            par = matriz.par(categoria1, categoria2) if matriz is not None else None
+            if par is not None:
+                p_value = par['p_valor']
+            else:
+                p_value = float(teste_de_momentos(grupo1, grupo2)['p_valor'])
             
         # 3. Conclusão (mesma lógica de antes)
         # (O código para gerar o texto final com o p-valor seria o mesmo da sua função original)
@@ -253,27 +388,92 @@ Como o p-valor é <i>{p_value:.4f}</i>, maior que o nível de significância de
 <strong>❌ Erro ao executar teste de hipóteses:</strong> (...)
 </div>'''
 
-def plot_distribuicao(variavel, base, categoria1, categoria2):
+@medido
+def hipoteses_reamostragem(variavel, categoria1, categoria2, base, estatistica='media',
+                           plano=None):
+    """
+    Compara dois grupos por teste de permutação e intervalo bootstrap, sem
+    supor normalidade dos salários.
+
+    Args:
+        variavel (str): Nome da variável de análise
+        categoria1 (str): Primeira categoria
+        categoria2 (str): Segunda categoria
+        base (pd.DataFrame | VisaoBase): Base com a variável e a coluna ``Salario``
+        estatistica (str): 'media' ou 'mediana'
+        plano (PlanoConsulta): Plano da execução (ver ``plano_consulta``)
+
+    Returns:
+        str: HTML com as hipóteses, o p-valor e o intervalo de confiança
+    """
+    try:
+        if plano is None:
+            plano = plano_consulta(variavel, base)
+        valores1 = plano.valores_categoria(categoria1)
+        valores2 = plano.valores_categoria(categoria2)
+
+        if len(valores1) < 10 or len(valores2) < 10:
+            return f'''<div style="padding: 1.5rem; background-color: #fff3cd; border-radius: 10px; border: 1px solid #ffeaa7; font-size: 16px;">
+<strong>⚠️ Dados insuficientes:</strong> (...)
+</div>'''
+
+        permutacao = teste_permutacao(valores1, valores2, estatistica)
+        intervalo = ic_bootstrap(valores1, valores2, estatistica)
+        p_value = permutacao['p_valor']
+
+        simbolo = 'μ' if estatistica == 'media' else 'Md'
+        nome = ESTATISTICAS[estatistica]
+        contexto = (f'Teste de permutação com {REAMOSTRAS} reamostras e intervalo bootstrap '
+                    f'(percentil) de 95% para a diferença de {nome}s, sem supor normalidade.')
+
+        if p_value < 0.05:
+            conclusao = (f'Como o p-valor é <i>{p_value:.4f}</i>, <strong>menor que o nível de significância 0.05</strong>, '
+                         f'há evidências estatísticas suficientes para <strong>rejeitar H₀</strong> e afirmar que as {nome}s salariais são diferentes.')
+        else:
+            conclusao = (f'Como o p-valor é <i>{p_value:.4f}</i>, maior que o nível de significância de 5%, '
+                         f'não há evidências estatísticas suficientes para <strong>rejeitar H₀</strong>.')
+
+        return f'''<div style="padding: 1.5rem; background-color: #f9f9f9; border-radius: 10px; border: 1px solid #ddd; font-size: 16px;">
+<strong>Contexto da Análise:</strong> {contexto}<br><br>
+<strong>H₀:</strong> {simbolo}<sub>{categoria1}</sub> = {simbolo}<sub>{categoria2}</sub><br>
+<strong>H₁:</strong> {simbolo}<sub>{categoria1}</sub> ≠ {simbolo}<sub>{categoria2}</sub><br><br>
+<strong>Diferença observada:</strong> R$ {permutacao['diferenca']:,.2f}<br>
+<strong>IC 95% (bootstrap):</strong> [R$ {intervalo['ic_inf']:,.2f}; R$ {intervalo['ic_sup']:,.2f}]<br><br>
+{conclusao}
+</div>'''
+
+    except Exception as e:
+        return f'''<div style="padding: 1.5rem; background-color: #f8d7da; border-radius: 10px; border: 1px solid #f5c6cb; font-size: 16px;">
+<strong>❌ Erro ao executar teste de hipóteses:</strong> (...)
+</div>'''
+
+
+@medido
+def plot_distribuicao(variavel, base, categoria1, categoria2, momentos=None, plano=None):
     try:
-        # Filtrando os dados e calculando estatísticas para a primeira categoria
-        grupo1 = base[base[variavel] == categoria1]['Salario'].dropna()
-        n_1 = len(grupo1)
+        # Estatísticas dos grupos (já calculadas ou calculadas em uma passada)
+        if momentos is None:
+            momentos = momentos_categorias(variavel, base, plano)
+        grupo1 = _momentos_grupo(momentos, categoria1)
+        grupo2 = _momentos_grupo(momentos, categoria2)
+
+        # Estatísticas da primeira categoria
+        n_1 = int(grupo1['n'])
         
         if n_1 < 2:
             raise ValueError(f"Grupo {categoria1} tem dados insuficientes: {n_1} observações")
             
-        grupo1_mean = grupo1.mean()
-        grupo1_std = grupo1.std() / np.sqrt(n_1)
+        grupo1_mean = grupo1['media']
+        grupo1_std = np.sqrt(grupo1['variancia']) / np.sqrt(n_1)
 
-        # Filtrando os dados e calculando estatísticas para a segunda categoria
-        grupo2 = base[base[variavel] == categoria2]['Salario'].dropna()
-        n_2 = len(grupo2)
+        # Estatísticas da segunda categoria
+        n_2 = int(grupo2['n'])
         
         if n_2 < 2:
             raise ValueError(f"Grupo {categoria2} tem dados insuficientes: {n_2} observações")
             
-        grupo2_mean = grupo2.mean()
-        grupo2_std = grupo2.std() / np.sqrt(n_2)
+        grupo2_mean = grupo2['media']
+        grupo2_std = np.sqrt(grupo2['variancia']) / np.sqrt(n_2)
 
         # Criando os eixos x para as distribuições
         x_1 = np.linspace(grupo1_mean - 4 * grupo1_std, grupo1_mean + 4 * grupo1_std, 1000)
@@ -284,7 +484,7 @@ def plot_distribuicao(variavel, base, categoria1, categoria2):
         pdf_2 = stats.norm.pdf(x_2, loc=grupo2_mean, scale=grupo2_std)
 
         # Criando a figura
-        fig, ax = plt.subplots(figsize=(8, 5))
+        fig, ax = criar_figura(figsize=(8, 5))
         
         # Plotando as distribuições
         sns.lineplot(x=x_1, y=pdf_1, color='black', label=categoria1, ax=ax)
@@ -305,3 +505,118 @@ def plot_distribuicao(variavel, base, categoria1, categoria2):
         return None
 
 
+@medido
+def matriz_hipoteses(variavel, base, correcao='holm', momentos=None, plano=None):
+    """
+    Testa a diferença das médias salariais de todos os pares de categorias.
+
+    Args:
+        variavel (str): Nome da variável de análise
+        base (pd.DataFrame | VisaoBase): Base com a variável e a coluna ``Salario``
+        correcao (str): Correção para comparações múltiplas ('holm' ou 'bh')
+        momentos (pd.DataFrame): Momentos já calculados (``momentos_categorias``)
+        plano (PlanoConsulta): Plano da execução (ver ``plano_consulta``)
+
+    Returns:
+        MatrizTestes: p-valores, p-valores ajustados e tamanhos de efeito de
+        todos os pares; ``hipoteses`` aceita a matriz para consultar um par
+    """
+    if momentos is None:
+        momentos = momentos_categorias(variavel, base, plano)
+    return matriz_testes(momentos, variavel, correcao)
+
+
+@medido
+def grafico_matriz_testes(variavel, base, matriz=None, correcao='holm', plano=None):
+
+    # Matriz já calculada (ou calculada agora para todos os pares)
+    if matriz is None:
+        matriz = matriz_hipoteses(variavel, base, correcao, plano=plano)
+    p_valores = matriz.matriz('p_ajustado')
+
+    # Criando a figura
+    fig, ax = criar_figura(figsize=(8, 6))
+
+    # Mapa de calor dos p-valores ajustados; tons fortes indicam diferença
+    sns.heatmap(p_valores, mask=p_valores.isna().to_numpy(), annot=True, fmt='.3f',
+                cmap='YlOrRd_r', vmin=0, vmax=0.1, linewidths=0.5,
+                cbar_kws={'label': 'p-valor ajustado'}, annot_kws={'fontsize': 8}, ax=ax)
+
+    # Ajustes visuais
+    ax.set_title(f'p-valores ajustados ({CORRECOES[matriz.correcao]}) por par de categorias')
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+    ax.tick_params(axis='x', labelsize=8, rotation=45)
+    ax.tick_params(axis='y', labelsize=8, rotation=0)
+
+    # Retornando a figura
+    return fig
+
+
+# Seções da página do cientista de dados: (título, arquivo, colunas, cor)
+SECOES_CIENTISTA = [
+    ('Rotina de Trabalho', 'cientista_a-c.csv', slice(0, 12), '#2E86AB'),
+    ('Técnicas e Métodos', 'cientista_a-c.csv', slice(12, 26), '#A23B72'),
+    ('Tecnologias', 'cientista_a-c.csv', slice(26, None), '#F18F01'),
+    ('Tempo no Trabalho', 'cientista_d.csv', slice(None), '#C73E1D'),
+]
+
+
+@medido
+def barras_respostas(titulo, variaveis, base, cor_principal='#2E86AB'):
+    """
+    Gráfico de barras horizontais com a frequência de cada opção de resposta.
+
+    Args:
+        titulo (str): Título da seção (identifica o gráfico no cache)
+        variaveis (list): Opções de resposta da seção
+        base (RespostasMultiplas): Respostas compactadas em bitsets
+        cor_principal (str): Cor das barras
+
+    Returns:
+        Figure | None: Figura com o gráfico, ou None se nenhuma opção foi marcada
+
+    Example:
+        >>> fig = barras_respostas('Tecnologias', variaveis, respostas, '#F18F01')
+    """
+    # Separa as frequências das variáveis
+    totais = base.totais(variaveis).sort_values(ascending=True)
+    total_geral = totais.sum()
+
+    # Filtrar apenas variáveis com dados
+    totais = totais[totais > 0]
+    if totais.empty:
+        return None
+
+    # Criar figura com tamanho otimizado
+    fig, ax = criar_figura(figsize=(8, max(4, len(totais) * 0.3)))
+
+    # Plotar barras horizontais com uma cor única
+    bars = ax.barh(range(len(totais)), totais, color=cor_principal, alpha=0.8,
+                   edgecolor='white', linewidth=0.5)
+
+    # Adicionar o percentual dentro de cada barra
+    for i, (v, bar) in enumerate(zip(totais, bars)):
+        percentual = v / total_geral * 100
+        ax.text(v * 0.5, i, f'{percentual:.1f}%',
+                ha='center', va='center', fontweight='bold',
+                fontsize=7, color='white')
+
+    # Configurações do gráfico
+    ax.set_yticks(range(len(totais)))
+    ax.set_yticklabels([var.replace('_', ' ').title() for var in totais.index], fontsize=8)
+    ax.set_xlabel('Frequência', fontsize=10, fontweight='bold')
+
+    # Adicionar grid sutil
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    ax.set_axisbelow(True)
+
+    # Remover bordas
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+
+    # Ajustar layout
+    fig.tight_layout()
+
+    return fig
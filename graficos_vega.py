@@ -0,0 +1,392 @@
+"""
+Gráficos Desenhados no Navegador (Vega-Lite)
+============================================
+
+Os gráficos do dashboard são desenhados no servidor pelo matplotlib e enviados
+como imagens SVG ou PNG (ver ``renderizacao.py``). Com a variável de ambiente
+``MODO_GRAFICOS=vega``, as páginas passam a enviar apenas os dados já
+agregados de cada gráfico (médias e intervalos de confiança, curvas de
+densidade reamostradas, estatísticas do boxplot, p-valores dos pares, totais
+de cada opção de resposta) numa especificação Vega-Lite, e o próprio navegador
+desenha o gráfico com ``st.vega_lite_chart``. O servidor deixa de rasterizar
+as figuras, cada gráfico ocupa poucos KB e o usuário ganha dicas ao passar o
+mouse e zoom nos gráficos contínuos.
+
+Cada especificação é montada por uma função com a mesma assinatura do gráfico
+de ``funcoes.py`` que ela substitui (``ESPECS``). As especificações também são
+guardadas no cache de gráficos, em JSON, com a mesma chave das imagens mais o
+modo, então os dois modos podem coexistir no mesmo processo.
+"""
+
+# Imports necessários
+import json
+import logging
+import os
+
+import numpy as np
+
+from cache_graficos import cache, grafico_em_cache, impressao_filtros
+from funcoes import desc_ic, matriz_hipoteses, momentos_categorias, plano_consulta, resumo_boxplot
+from medicao import medido
+from renderizacao import codificar, exibir_imagem, paleta_cores
+from testes import CORRECOES
+
+logger = logging.getLogger(__name__)
+
+MODOS_GRAFICOS = ('imagem', 'vega')
+MODO_PADRAO = 'imagem'
+
+# Pontos enviados de cada curva (as densidades são calculadas numa grade de
+# 1024 pontos, mais do que o necessário para desenhá-las); os pontos vão em
+# listas por categoria, expandidas no navegador pela transformação flatten
+PONTOS_CURVA = 200
+
+ESQUEMA = 'https://vega.github.io/schema/vega-lite/v5.json'
+
+# Zoom e deslocamento com o mouse nos gráficos de eixos contínuos
+ZOOM = [{'name': 'zoom', 'select': 'interval', 'bind': 'scales'}]
+
+
+def modo_graficos():
+    """
+    Retorna o modo de exibição dos gráficos configurado no processo.
+
+    Returns:
+        str: 'imagem' (padrão) ou 'vega', pela variável ``MODO_GRAFICOS``
+    """
+    modo = os.environ.get('MODO_GRAFICOS', MODO_PADRAO)
+    if modo not in MODOS_GRAFICOS:
+        logger.warning('Modo de gráficos %r desconhecido; usando %r', modo, MODO_PADRAO)
+        return MODO_PADRAO
+    return modo
+
+
+def _hex(cor):
+    # Cor (r, g, b) do matplotlib no formato usado pelo Vega-Lite
+    return '#{:02x}{:02x}{:02x}'.format(*(int(round(canal * 255)) for canal in cor))
+
+
+def _numero(valor, digitos=6):
+    # Número com poucos dígitos significativos (None para NaN), para manter a
+    # especificação pequena
+    valor = float(valor)
+    if not np.isfinite(valor):
+        return None
+    return float(f'{valor:.{digitos}g}')
+
+
+def _cores(ordem, saturacao=1.0):
+    # Escala de cores por categoria, com a mesma paleta das imagens
+    return {'domain': list(ordem), 'range': [_hex(cor) for cor in paleta_cores(len(ordem), saturacao)]}
+
+
+@medido
+def espec_ic(variavel, base, tabela=None, plano=None):
+    # Barras das médias com os intervalos de confiança, como em ``graf_ic``
+    if tabela is None:
+        tabela = desc_ic(variavel, base, plano=plano)
+    tabela = tabela.sort_index()
+
+    valores = [{'categoria': str(categoria), 'n': int(linha['Tamanho']),
+                'media': _numero(linha['Média']), 'ic_inf': _numero(linha['I.C Inferior']),
+                'ic_sup': _numero(linha['I.C Superior'])}
+               for categoria, linha in tabela.iterrows()]
+
+    eixo_y = {'field': 'categoria', 'type': 'nominal', 'sort': None, 'title': None}
+    dicas = [{'field': 'categoria', 'title': variavel}, {'field': 'n', 'title': 'Tamanho'},
+             {'field': 'media', 'title': 'Média', 'format': ',.2f'},
+             {'field': 'ic_inf', 'title': 'I.C Inferior', 'format': ',.2f'},
+             {'field': 'ic_sup', 'title': 'I.C Superior', 'format': ',.2f'}]
+    return {
+        '$schema': ESQUEMA,
+        'data': {'values': valores},
+        'height': 300,
+        'encoding': {'y': eixo_y, 'tooltip': dicas},
+        'layer': [
+            {'mark': {'type': 'bar', 'color': 'lightblue', 'stroke': 'black'},
+             'encoding': {'x': {'field': 'media', 'type': 'quantitative', 'title': 'Média'}}},
+            {'mark': {'type': 'rule', 'color': 'black'},
+             'encoding': {'x': {'field': 'ic_inf', 'type': 'quantitative'}, 'x2': {'field': 'ic_sup'}}},
+        ] + [
+            # Traços nas pontas de cada intervalo
+            {'mark': {'type': 'tick', 'color': 'black', 'thickness': 1, 'size': 14},
+             'encoding': {'x': {'field': ponta, 'type': 'quantitative'}}}
+            for ponta in ['ic_inf', 'ic_sup']
+        ],
+    }
+
+
+@medido
+def espec_densidade(variavel, base, plano=None):
+    # Curvas de densidade de ``grafico_density``, com menos pontos por curva
+    if plano is None:
+        plano = plano_consulta(variavel, base)
+    resultado = plano.densidades
+    grade = resultado['grade']
+
+    valores = []
+    for categoria, curva, (inicio, fim) in zip(plano.ordem, resultado['densidade'], resultado['suporte']):
+        if np.isnan(curva).all():
+            continue
+        dentro = np.flatnonzero((grade >= inicio) & (grade <= fim))
+        if not len(dentro):
+            continue
+        pontos = np.unique(np.linspace(dentro[0], dentro[-1], PONTOS_CURVA).round().astype(int))
+        valores.append({'categoria': str(categoria), 'salario': [_numero(x) for x in grade[pontos]],
+                        'densidade': [_numero(y, 4) for y in curva[pontos]]})
+
+    cor = {'field': 'categoria', 'type': 'nominal', 'title': variavel, 'scale': _cores(plano.ordem)}
+    return {
+        '$schema': ESQUEMA,
+        'title': 'Curvas de Densidade de Kernel por Categoria',
+        'data': {'values': valores},
+        'transform': [{'flatten': ['salario', 'densidade']}],
+        'height': 360,
+        'encoding': {
+            'x': {'field': 'salario', 'type': 'quantitative', 'title': 'Salário'},
+            'y': {'field': 'densidade', 'type': 'quantitative', 'title': 'Densidade', 'stack': None},
+            'color': cor,
+        },
+        'layer': [
+            {'mark': {'type': 'area', 'opacity': 0.25}},
+            {'mark': 'line', 'params': ZOOM,
+             'encoding': {'tooltip': [{'field': 'categoria', 'title': variavel},
+                                      {'field': 'salario', 'title': 'Salário', 'format': ',.0f'},
+                                      {'field': 'densidade', 'title': 'Densidade', 'format': '.3g'}]}},
+        ],
+    }
+
+
+@medido
+def espec_boxplot(variavel, base, resumo=None, plano=None):
+    # Boxplot desenhado das estatísticas de ``resumo_boxplot``, como em ``boxplot``
+    if resumo is None:
+        resumo = resumo_boxplot(variavel, base, plano)
+    ordem = [str(categoria) for categoria in resumo.ordem]
+
+    caixas = [{'categoria': str(categoria), 'n': int(linha.n), 'media': _numero(linha.media),
+               'q1': _numero(linha.q1), 'mediana': _numero(linha.mediana), 'q3': _numero(linha.q3),
+               'bigode_inf': _numero(linha.bigode_inf), 'bigode_sup': _numero(linha.bigode_sup)}
+              for categoria, linha in resumo.tabela.iterrows()]
+    outliers = [{'categoria': str(categoria), 'salario': [_numero(valor) for valor in valores]}
+                for categoria, valores in resumo.outliers.items() if len(valores)]
+
+    # Todas as categorias aparecem no eixo, mesmo as vazias
+    eixo_x = {'field': 'categoria', 'type': 'nominal', 'title': variavel,
+              'scale': {'domain': ordem}, 'axis': {'labelAngle': 0}}
+    dicas = [{'field': 'categoria', 'title': variavel}, {'field': 'n', 'title': 'Tamanho'}] + [
+        {'field': campo, 'title': titulo, 'format': ',.2f'} for campo, titulo in
+        [('bigode_sup', 'Bigode superior'), ('q3', 'Q3'), ('mediana', 'Mediana'),
+         ('q1', 'Q1'), ('bigode_inf', 'Bigode inferior'), ('media', 'Média')]]
+    cor = {'field': 'categoria', 'type': 'nominal', 'legend': None,
+           'scale': _cores(resumo.ordem, saturacao=0.75)}
+    return {
+        '$schema': ESQUEMA,
+        'title': f'Salário por {variavel}',
+        'height': 360,
+        'encoding': {'x': eixo_x},
+        'layer': [
+            {'data': {'values': caixas}, 'encoding': {'tooltip': dicas}, 'layer': [
+                {'mark': {'type': 'rule', 'color': '#3f3f3f'},
+                 'encoding': {'y': {'field': 'bigode_inf', 'type': 'quantitative', 'title': 'R$'},
+                              'y2': {'field': 'bigode_sup'}}},
+                {'mark': {'type': 'bar', 'size': 40, 'stroke': '#3f3f3f'},
+                 'encoding': {'y': {'field': 'q1', 'type': 'quantitative'}, 'y2': {'field': 'q3'},
+                              'color': cor}},
+                {'mark': {'type': 'tick', 'size': 40, 'color': '#3f3f3f'},
+                 'encoding': {'y': {'field': 'mediana', 'type': 'quantitative'}}},
+                {'mark': {'type': 'point', 'shape': 'diamond', 'filled': True, 'size': 60,
+                          'color': 'red', 'stroke': 'black'},
+                 'encoding': {'y': {'field': 'media', 'type': 'quantitative'}}},
+            ]},
+            {'data': {'values': outliers}, 'transform': [{'flatten': ['salario']}],
+             'mark': {'type': 'point', 'shape': 'diamond', 'filled': True, 'size': 20, 'color': '#3f3f3f'},
+             'encoding': {'y': {'field': 'salario', 'type': 'quantitative'},
+                          'tooltip': [{'field': 'salario', 'title': 'Salário', 'format': ',.2f'}]}},
+        ],
+    }
+
+
+@medido
+def espec_distribuicao(variavel, base, categoria1, categoria2, momentos=None, plano=None):
+    # Distribuições normais das médias dos dois grupos, como em ``plot_distribuicao``
+    if momentos is None:
+        momentos = momentos_categorias(variavel, base, plano)
+
+    valores = []
+    for categoria in [categoria1, categoria2]:
+        if categoria not in momentos.index or momentos.loc[categoria, 'n'] < 2:
+            # Mesmo comportamento do gráfico em imagem: sem gráfico
+            logger.warning('Distribuição não gerada: grupo %s tem dados insuficientes', categoria)
+            return None
+        media = momentos.loc[categoria, 'media']
+        erro = np.sqrt(momentos.loc[categoria, 'variancia'] / momentos.loc[categoria, 'n'])
+        x = np.linspace(media - 4 * erro, media + 4 * erro, PONTOS_CURVA)
+        pdf = np.exp(-0.5 * ((x - media) / erro) ** 2) / (erro * np.sqrt(2 * np.pi))
+        valores.append({'categoria': str(categoria), 'salario': [_numero(xi) for xi in x],
+                        'densidade': [_numero(yi, 4) for yi in pdf]})
+
+    return {
+        '$schema': ESQUEMA,
+        'title': f'Distribuição de Salários para {categoria1} e {categoria2}',
+        'data': {'values': valores},
+        'transform': [{'flatten': ['salario', 'densidade']}],
+        'height': 300,
+        'mark': 'line',
+        'params': ZOOM,
+        'encoding': {
+            'x': {'field': 'salario', 'type': 'quantitative', 'title': 'Salário', 'scale': {'zero': False}},
+            'y': {'field': 'densidade', 'type': 'quantitative', 'title': 'Densidade'},
+            'color': {'field': 'categoria', 'type': 'nominal', 'title': None,
+                      'scale': {'domain': [str(categoria1), str(categoria2)], 'range': ['black', 'red']}},
+            'tooltip': [{'field': 'categoria', 'title': variavel},
+                        {'field': 'salario', 'title': 'Salário', 'format': ',.2f'}],
+        },
+    }
+
+
+@medido
+def espec_matriz_testes(variavel, base, matriz=None, correcao='holm', plano=None):
+    # Mapa de calor dos p-valores ajustados, como em ``grafico_matriz_testes``
+    if matriz is None:
+        matriz = matriz_hipoteses(variavel, base, correcao, plano=plano)
+    p_valores = matriz.matriz('p_ajustado')
+    ordem = [str(categoria) for categoria in p_valores.index]
+
+    valores = [{'linha': str(linha), 'coluna': str(coluna), 'p': _numero(p, 4)}
+               for (linha, coluna), p in p_valores.stack().items()]
+
+    return {
+        '$schema': ESQUEMA,
+        'title': f'p-valores ajustados ({CORRECOES[matriz.correcao]}) por par de categorias',
+        'data': {'values': valores},
+        'height': 360,
+        'encoding': {
+            'x': {'field': 'coluna', 'type': 'nominal', 'title': None, 'sort': ordem,
+                  'axis': {'labelAngle': -45}},
+            'y': {'field': 'linha', 'type': 'nominal', 'title': None, 'sort': ordem},
+            'tooltip': [{'field': 'linha', 'title': 'Categoria 1'}, {'field': 'coluna', 'title': 'Categoria 2'},
+                        {'field': 'p', 'title': 'p-valor ajustado', 'format': '.4f'}],
+        },
+        'layer': [
+            {'mark': {'type': 'rect', 'stroke': 'white', 'strokeWidth': 0.5},
+             'encoding': {'color': {'field': 'p', 'type': 'quantitative', 'title': 'p-valor ajustado',
+                                    'scale': {'scheme': 'yelloworangered', 'reverse': True,
+                                              'domain': [0, 0.1], 'clamp': True}}}},
+            {'mark': {'type': 'text', 'fontSize': 10},
+             'encoding': {'text': {'field': 'p', 'type': 'quantitative', 'format': '.3f'},
+                          'color': {'condition': {'test': 'datum.p < 0.03', 'value': 'white'},
+                                    'value': 'black'}}},
+        ],
+    }
+
+
+@medido
+def espec_barras_respostas(titulo, variaveis, base, cor_principal='#2E86AB'):
+    # Frequência de cada opção de resposta, como em ``barras_respostas``
+    totais = base.totais(variaveis).sort_values(ascending=False)
+    total_geral = totais.sum()
+    totais = totais[totais > 0]
+    if totais.empty:
+        return None
+
+    valores = [{'opcao': opcao.replace('_', ' ').title(), 'total': int(total),
+                'percentual': _numero(total / total_geral * 100, 4)}
+               for opcao, total in totais.items()]
+
+    return {
+        '$schema': ESQUEMA,
+        'data': {'values': valores},
+        'height': max(240, len(valores) * 22),
+        'encoding': {
+            'y': {'field': 'opcao', 'type': 'nominal', 'sort': None, 'title': None},
+            'tooltip': [{'field': 'opcao', 'title': 'Opção'}, {'field': 'total', 'title': 'Frequência'},
+                        {'field': 'percentual', 'title': '% do total', 'format': '.1f'}],
+        },
+        'layer': [
+            {'mark': {'type': 'bar', 'color': cor_principal, 'opacity': 0.8},
+             'encoding': {'x': {'field': 'total', 'type': 'quantitative', 'title': 'Frequência'}}},
+            {'transform': [{'calculate': 'datum.total / 2', 'as': 'meio'},
+                           {'calculate': "format(datum.percentual, '.1f') + '%'", 'as': 'rotulo'}],
+             'mark': {'type': 'text', 'color': 'white', 'fontWeight': 'bold', 'fontSize': 10},
+             'encoding': {'x': {'field': 'meio', 'type': 'quantitative'},
+                          'text': {'field': 'rotulo'}}},
+        ],
+    }
+
+
+# Especificação de cada gráfico de funcoes.py, pelo nome da função da imagem
+ESPECS = {
+    'graf_ic': espec_ic,
+    'grafico_density': espec_densidade,
+    'boxplot': espec_boxplot,
+    'plot_distribuicao': espec_distribuicao,
+    'grafico_matriz_testes': espec_matriz_testes,
+    'barras_respostas': espec_barras_respostas,
+}
+
+
+def desenhar(funcao, variavel, *args, **kwargs):
+    """
+    Desenha um gráfico no modo configurado, sem passar pelo cache.
+
+    Args:
+        funcao (callable): Função do gráfico em ``funcoes.py``, chamada como
+            ``funcao(variavel, *args, **kwargs)``
+        variavel (str): Variável de análise
+
+    Returns:
+        bytes | dict | None: Imagem SVG ou PNG, especificação Vega-Lite (no modo
+        'vega', se o gráfico tiver uma em ``ESPECS``) ou None se não houver
+        gráfico
+    """
+    if modo_graficos() == 'vega' and funcao.__name__ in ESPECS:
+        return ESPECS[funcao.__name__](variavel, *args, **kwargs)
+    fig = funcao(variavel, *args, **kwargs)
+    return codificar(fig, funcao.__name__) if fig is not None else None
+
+
+def grafico_no_modo(funcao, variavel, filtros, versao, *args, variante=None, **kwargs):
+    """
+    Retorna o gráfico no modo configurado, desenhando-o só se não estiver em cache.
+
+    Mesmos argumentos de ``cache_graficos.grafico_em_cache``; no modo 'vega' a
+    especificação é guardada no mesmo cache, em JSON.
+
+    Returns:
+        bytes | dict | None: Resultado de ``desenhar``
+
+    Example:
+        >>> grafico = grafico_no_modo(boxplot, 'Cargo', {}, versao, base)
+        >>> exibir_grafico(grafico)
+    """
+    if modo_graficos() != 'vega' or funcao.__name__ not in ESPECS:
+        return grafico_em_cache(funcao, variavel, filtros, versao, *args, variante=variante, **kwargs)
+
+    chave = ('vega', funcao.__name__, variavel, impressao_filtros(filtros), versao, variante)
+    guardada = cache.obter(chave)
+    if guardada is not None:
+        return json.loads(guardada)
+
+    espec = ESPECS[funcao.__name__](variavel, *args, **kwargs)
+    if espec is None:
+        return None
+    cache.guardar(chave, json.dumps(espec, ensure_ascii=False).encode())
+    return espec
+
+
+def exibir_grafico(grafico, container=None):
+    """
+    Exibe um gráfico de ``grafico_no_modo`` ou ``desenhar``.
+
+    Args:
+        grafico (bytes | dict): Imagem renderizada ou especificação Vega-Lite
+        container: Container do Streamlit (a página, se None)
+    """
+    if isinstance(grafico, dict):
+        import streamlit as st
+
+        # O navegador desenha o gráfico na largura do container
+        (container or st).vega_lite_chart(grafico)
+    else:
+        exibir_imagem(grafico, container)
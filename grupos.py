@@ -0,0 +1,236 @@
+"""
+Estatísticas por Grupo
+======================
+
+Funções vetorizadas que resumem o salário por categoria de uma variável. Os
+valores são ordenados uma única vez por (categoria, valor) e cada categoria
+passa a ser um segmento contíguo do vetor ordenado, de onde saem os quartis,
+bigodes, médias e outliers sem separar a base grupo a grupo.
+
+Os resultados seguem ``matplotlib.cbook.boxplot_stats``; a conferência com
+grupos aleatórios (inclusive os de poucas observações) é feita com::
+
+    python grupos.py
+"""
+
+# Imports necessários
+import numpy as np
+import pandas as pd
+
+# Número máximo de outliers guardados por categoria
+MAXIMO_OUTLIERS = 200
+
+
+def ordenar_por_grupo(valores, codigos, n_categorias, posicoes=False):
+    """
+    Ordena os valores por (categoria, valor) e localiza o segmento de cada uma.
+
+    Args:
+        valores (np.ndarray): Valores observados
+        codigos (np.ndarray): Código da categoria de cada valor (negativo para
+            ignorar o valor)
+        n_categorias (int): Número de categorias
+        posicoes (bool): Também retorna a posição original de cada valor
+
+    Returns:
+        tuple: (valores ordenados, códigos ordenados, vetor ``limites`` de
+        tamanho ``n_categorias + 1`` com o início de cada segmento) e, com
+        ``posicoes``, a posição de cada valor ordenado no vetor de entrada
+    """
+    valores = np.asarray(valores, dtype='float64')
+    codigos = np.asarray(codigos)
+    validos = (codigos >= 0) & ~np.isnan(valores)
+    linhas = np.flatnonzero(validos)
+    valores, codigos = valores[linhas], codigos[linhas].astype(np.int64)
+
+    ordem = np.lexsort((valores, codigos))
+    valores, codigos = valores[ordem], codigos[ordem]
+    limites = np.searchsorted(codigos, np.arange(n_categorias + 1), side='left')
+    if posicoes:
+        return valores, codigos, limites, linhas[ordem]
+    return valores, codigos, limites
+
+
+def _quantil(valores, inicio, n, q):
+    # Quantil com interpolação linear (como np.percentile) em cada segmento
+    posicao = inicio + q * (n - 1)
+    abaixo = np.floor(posicao).astype(np.int64)
+    acima = np.minimum(abaixo + 1, inicio + n - 1)
+    fracao = posicao - abaixo
+    return valores[abaixo] * (1 - fracao) + valores[acima] * fracao
+
+
+class ResumoBoxplot:
+    """
+    Estatísticas de boxplot de cada categoria, prontas para ``Axes.bxp``.
+
+    Attributes:
+        tabela (pd.DataFrame): Uma linha por categoria não vazia, com
+            ``n``, ``media``, ``q1``, ``mediana``, ``q3``, ``bigode_inf``,
+            ``bigode_sup`` e ``n_outliers``
+        outliers (dict): Categoria -> amostra ordenada dos outliers
+        ordem (list): Todas as categorias, na ordem de exibição
+    """
+
+    def __init__(self, tabela, outliers, ordem):
+        self.tabela = tabela
+        self.outliers = outliers
+        self.ordem = list(ordem)
+
+    def para_bxp(self):
+        """
+        Converte o resumo no formato esperado por ``Axes.bxp``.
+
+        Returns:
+            list: Um dicionário por categoria não vazia
+        """
+        return [{
+            'label': categoria,
+            'med': linha.mediana, 'q1': linha.q1, 'q3': linha.q3,
+            'whislo': linha.bigode_inf, 'whishi': linha.bigode_sup,
+            'mean': linha.media, 'fliers': self.outliers[categoria],
+        } for categoria, linha in self.tabela.iterrows()]
+
+    def posicoes(self):
+        # Posição de cada categoria não vazia no eixo x (índice em ``ordem``)
+        return [self.ordem.index(categoria) for categoria in self.tabela.index]
+
+
+def resumir_boxplot(valores, codigos, ordem, whis=1.5, maximo_outliers=MAXIMO_OUTLIERS):
+    """
+    Calcula quartis, bigodes, médias e outliers de todas as categorias em uma
+    passada vetorizada.
+
+    Os bigodes seguem a regra do matplotlib: o menor e o maior valor dentro de
+    ``whis`` vezes o intervalo interquartil a partir dos quartis.
+
+    Args:
+        valores (np.ndarray): Valores observados
+        codigos (np.ndarray): Código da categoria de cada valor em ``ordem``
+        ordem (list): Categorias, na ordem de exibição
+        whis (float): Alcance dos bigodes em intervalos interquartis
+        maximo_outliers (int): Outliers guardados por categoria; os excedentes
+            são descartados de forma espaçada, preservando os extremos
+
+    Returns:
+        ResumoBoxplot: Resumo de cada categoria
+
+    Example:
+        >>> codigos = pd.Categorical(base['Cargo'], categories=ordem).codes
+        >>> resumo = resumir_boxplot(base['Salario'], codigos, ordem)
+        >>> resumo.tabela
+    """
+    valores, _, limites = ordenar_por_grupo(valores, codigos, len(ordem))
+    return resumir_ordenados(valores, limites, ordem, whis, maximo_outliers)
+
+
+def resumir_ordenados(valores, limites, ordem, whis=1.5, maximo_outliers=MAXIMO_OUTLIERS):
+    """
+    Calcula o resumo de ``resumir_boxplot`` a partir de valores já ordenados.
+
+    Args:
+        valores (np.ndarray): Valores ordenados por ``ordenar_por_grupo``
+        limites (np.ndarray): Início do segmento de cada categoria
+        ordem (list): Categorias, na ordem de exibição
+        whis (float): Alcance dos bigodes em intervalos interquartis
+        maximo_outliers (int): Outliers guardados por categoria
+
+    Returns:
+        ResumoBoxplot: Resumo de cada categoria
+    """
+    inicio = limites[:-1]
+    n = np.diff(limites)
+    presentes = np.flatnonzero(n > 0)
+    inicio, n = inicio[presentes], n[presentes]
+
+    q1 = _quantil(valores, inicio, n, 0.25)
+    mediana = _quantil(valores, inicio, n, 0.5)
+    q3 = _quantil(valores, inicio, n, 0.75)
+    media = np.add.reduceat(valores, inicio) / n if len(inicio) else np.array([])
+
+    # Limites dos bigodes para cada valor, pelo segmento a que pertence
+    segmento = np.repeat(np.arange(len(presentes)), n)
+    iqr = q3 - q1
+    limite_inf = (q1 - whis * iqr)[segmento]
+    limite_sup = (q3 + whis * iqr)[segmento]
+    dentro = (valores >= limite_inf) & (valores <= limite_sup)
+
+    if len(inicio):
+        bigode_inf = np.minimum.reduceat(np.where(dentro, valores, np.inf), inicio)
+        bigode_sup = np.maximum.reduceat(np.where(dentro, valores, -np.inf), inicio)
+    else:
+        bigode_inf = bigode_sup = np.array([])
+
+    # Como no matplotlib, os bigodes nunca terminam dentro da caixa (o que
+    # também cobre os grupos sem valores dentro do alcance)
+    bigode_inf = np.minimum(bigode_inf, q1)
+    bigode_sup = np.maximum(bigode_sup, q3)
+
+    categorias = [ordem[i] for i in presentes]
+    fora = ~dentro
+    n_outliers = np.bincount(segmento[fora], minlength=len(presentes))
+
+    # Os outliers já estão ordenados por segmento; basta dividi-los
+    indices = np.flatnonzero(fora)
+    cortes = np.searchsorted(segmento[indices], np.arange(1, len(presentes)))
+    outliers = {}
+    for categoria, amostra in zip(categorias, np.split(valores[indices], cortes)):
+        if len(amostra) > maximo_outliers:
+            amostra = amostra[np.linspace(0, len(amostra) - 1, maximo_outliers).astype(np.int64)]
+        outliers[categoria] = amostra
+
+    tabela = pd.DataFrame({
+        'n': n, 'media': media, 'q1': q1, 'mediana': mediana, 'q3': q3,
+        'bigode_inf': bigode_inf, 'bigode_sup': bigode_sup, 'n_outliers': n_outliers,
+    }, index=pd.Index(categorias, name='categoria'))
+
+    return ResumoBoxplot(tabela, outliers, ordem)
+
+
+def conferir_matplotlib(grupos=300, semente=0):
+    """
+    Compara ``resumir_boxplot`` com ``matplotlib.cbook.boxplot_stats`` em
+    grupos aleatórios de 1 a 40 observações, com valores repetidos e caudas
+    longas.
+
+    Args:
+        grupos (int): Número de grupos sorteados
+        semente (int): Semente do sorteio
+
+    Returns:
+        list: Categorias (índice do grupo) com alguma estatística diferente
+    """
+    from matplotlib import cbook
+
+    gerador = np.random.default_rng(semente)
+    tamanhos = np.concatenate([np.arange(1, 6), gerador.integers(1, 41, grupos - 5)])
+    amostras = [np.round(gerador.lognormal(8.5, 0.8, tamanho), int(gerador.integers(-3, 1)))
+                for tamanho in tamanhos]
+
+    valores = np.concatenate(amostras)
+    codigos = np.repeat(np.arange(grupos), tamanhos)
+    resumo = resumir_boxplot(valores, codigos, list(range(grupos)), maximo_outliers=len(valores))
+
+    campos = {'q1': 'q1', 'mediana': 'med', 'q3': 'q3', 'media': 'mean',
+              'bigode_inf': 'whislo', 'bigode_sup': 'whishi'}
+    divergentes = []
+    for grupo, amostra in enumerate(amostras):
+        esperado = cbook.boxplot_stats(amostra)[0]
+        linha = resumo.tabela.loc[grupo]
+        iguais = all(np.isclose(linha[campo], esperado[chave]) for campo, chave in campos.items())
+        iguais = iguais and np.array_equal(np.sort(resumo.outliers[grupo]), np.sort(esperado['fliers']))
+        if not iguais:
+            divergentes.append(grupo)
+    return divergentes
+
+
+def main():
+    # Conferência com o matplotlib
+    divergentes = conferir_matplotlib()
+    print(f'{len(divergentes)} de 300 grupos diferentes do matplotlib'
+          + (f': {divergentes}' if divergentes else ''))
+    return 1 if divergentes else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
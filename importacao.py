@@ -0,0 +1,158 @@
+"""
+Importações Tardias e Relatório de Tempo de Importação
+======================================================
+
+Bibliotecas pesadas (seaborn, scipy.stats) só são usadas depois de alguma ação
+do usuário, como executar um teste de hipóteses, mas importá-las no topo dos
+módulos custa mais de um segundo na primeira execução do processo. Este módulo
+oferece ``importar_tardio``, que devolve um objeto no lugar do módulo e só faz
+a importação real no primeiro acesso a um atributo.
+
+O tempo de cada importação, tardia ou feita por ``importar``, é registrado e
+pode ser consultado com ``relatorio_importacoes`` ou impresso na inicialização
+da aplicação (variável de ambiente ``RELATORIO_IMPORTACOES=1``).
+"""
+
+# Imports necessários
+import importlib
+import os
+import sys
+import threading
+import time
+
+# Tempos registrados: módulo -> {'ms', 'tardio', 'ja_carregado'}
+_tempos = {}
+_trava = threading.Lock()
+
+
+def _importar_medindo(nome, tardio):
+    ja_carregado = nome in sys.modules
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nome)
+    milissegundos = (time.perf_counter() - inicio) * 1000
+
+    with _trava:
+        if nome not in _tempos:
+            _tempos[nome] = {'ms': milissegundos, 'tardio': tardio, 'ja_carregado': ja_carregado}
+    return modulo
+
+
+def importar(nome):
+    """
+    Importa um módulo imediatamente, registrando o tempo gasto.
+
+    Args:
+        nome (str): Nome completo do módulo (ex.: 'pandas')
+
+    Returns:
+        module: O módulo importado
+    """
+    return _importar_medindo(nome, tardio=False)
+
+
+class ModuloTardio:
+    """
+    Substituto de um módulo que só é importado no primeiro uso.
+
+    O acesso a qualquer atributo importa o módulo (uma única vez, mesmo com
+    várias sessões simultâneas) e repassa o atributo.
+
+    Example:
+        >>> stats = importar_tardio('scipy.stats')  # nada é importado aqui
+        >>> stats.shapiro(valores)                   # importa scipy.stats
+    """
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+        self._trava = threading.Lock()
+
+    def _carregar(self):
+        if self._modulo is None:
+            with self._trava:
+                if self._modulo is None:
+                    self._modulo = _importar_medindo(self._nome, tardio=True)
+        return self._modulo
+
+    @property
+    def carregado(self):
+        return self._modulo is not None
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregar(), atributo)
+
+    def __repr__(self):
+        estado = 'carregado' if self.carregado else 'não carregado'
+        return f'<ModuloTardio {self._nome} ({estado})>'
+
+
+# Um único substituto por módulo
+_tardios = {}
+
+
+def importar_tardio(nome):
+    """
+    Devolve um substituto do módulo, importado apenas no primeiro uso.
+
+    Args:
+        nome (str): Nome completo do módulo (ex.: 'scipy.stats')
+
+    Returns:
+        ModuloTardio: Objeto que se comporta como o módulo
+    """
+    with _trava:
+        if nome not in _tardios:
+            _tardios[nome] = ModuloTardio(nome)
+        return _tardios[nome]
+
+
+def relatorio_importacoes():
+    """
+    Lista os tempos de importação registrados, do mais lento ao mais rápido.
+
+    O tempo de um módulo inclui as dependências que ainda não estavam
+    carregadas no momento da importação.
+
+    Returns:
+        list: Um dicionário por módulo com ``modulo``, ``ms``, ``tardio`` e
+        ``ja_carregado``
+    """
+    with _trava:
+        linhas = [{'modulo': nome, **tempo} for nome, tempo in _tempos.items()]
+    return sorted(linhas, key=lambda linha: linha['ms'], reverse=True)
+
+
+def imprimir_relatorio(arquivo=None):
+    # Imprime o relatório em formato de tabela simples (padrão: stderr)
+    arquivo = arquivo or sys.stderr
+    print('Tempo de importação (ms):', file=arquivo)
+    for linha in relatorio_importacoes():
+        tipo = 'tardio' if linha['tardio'] else 'imediato'
+        print(f"  {linha['modulo']:<30} {linha['ms']:>9.1f}  {tipo}", file=arquivo)
+
+
+# Módulos que compõem o carregamento da página inicial, medidos no relatório
+MODULOS_INICIAIS = ['numpy', 'pandas', 'dados', 'funcoes', 'cache_graficos', 'renderizacao']
+
+_relatorio_impresso = False
+
+
+def relatorio_inicializacao():
+    """
+    Mede os módulos da página inicial e imprime o relatório uma vez por processo.
+
+    Só tem efeito quando a variável de ambiente ``RELATORIO_IMPORTACOES`` vale
+    ``1``; as importações tardias feitas depois aparecem nos relatórios
+    seguintes (``relatorio_importacoes``).
+    """
+    global _relatorio_impresso
+    if os.environ.get('RELATORIO_IMPORTACOES') != '1':
+        return
+    with _trava:
+        if _relatorio_impresso:
+            return
+        _relatorio_impresso = True
+
+    for nome in MODULOS_INICIAIS:
+        importar(nome)
+    imprimir_relatorio()
@@ -0,0 +1,187 @@
+"""
+Índices dos Filtros de Idade e Estado
+=====================================
+
+Índices construídos uma vez por versão da base para resolver os filtros da
+barra lateral sem percorrer todas as linhas. As linhas são ordenadas por
+``Idade``, então qualquer faixa de idades é uma fatia contínua localizada por
+``searchsorted``, e cada estado tem a lista ordenada das linhas em que aparece.
+
+Uma faixa de idade combinada com um conjunto de estados vira uma seleção de
+linhas por fatiamento e por união/interseção de vetores ordenados.
+
+Cada sessão guarda apenas a seleção de linhas (``VisaoBase``); as colunas são
+lidas da base compartilhada sob demanda, sem copiar o DataFrame.
+"""
+
+# Imports necessários
+import numpy as np
+import pandas as pd
+
+
+class IndiceFiltros:
+    """
+    Índice ordenado por idade e listas de linhas por estado.
+
+    Attributes:
+        linhas (int): Número de linhas da base indexada
+        idades (np.ndarray): Idades de todas as linhas, em ordem crescente
+        ordem_idade (np.ndarray): Número da linha correspondente a cada
+            posição de ``idades``
+        estados (dict): Estado -> vetor ordenado com os números das linhas
+
+    Example:
+        >>> indice = IndiceFiltros.de_base(base)
+        >>> linhas = indice.selecionar(25, 35, ['São Paulo (SP)'])
+        >>> indice.visao(base, 25, 35, ['São Paulo (SP)'])['Salario'].mean()
+    """
+
+    def __init__(self, linhas, idades, ordem_idade, estados):
+        self.linhas = linhas
+        self.idades = idades
+        self.ordem_idade = ordem_idade
+        self.estados = estados
+
+    @classmethod
+    def de_base(cls, base):
+        """
+        Constrói o índice a partir da base salarial.
+
+        Args:
+            base (pd.DataFrame): Base com as colunas ``Idade`` e ``Estados``
+
+        Returns:
+            IndiceFiltros: Índice pronto para consultas
+        """
+        idade = base['Idade'].to_numpy(dtype='float64')
+        tipo = np.int32 if len(base) < 2 ** 31 else np.int64
+        ordem_idade = np.argsort(idade, kind='stable').astype(tipo)
+
+        # Uma ordenação estável pelos códigos agrupa as linhas de cada estado
+        # já em ordem crescente
+        estados = pd.Categorical(base['Estados'])
+        codigos = estados.codes
+        por_estado = np.argsort(codigos, kind='stable').astype(tipo)
+        limites = np.searchsorted(codigos[por_estado], np.arange(len(estados.categories) + 1))
+        listas = {estado: por_estado[limites[i]:limites[i + 1]]
+                  for i, estado in enumerate(estados.categories)}
+
+        return cls(len(base), idade[ordem_idade], ordem_idade, listas)
+
+    def faixa_idade(self, idade_min=None, idade_max=None):
+        """
+        Localiza as linhas de uma faixa de idades.
+
+        Args:
+            idade_min (float): Idade mínima, inclusiva (sem limite se None)
+            idade_max (float): Idade máxima, inclusiva (sem limite se None)
+
+        Returns:
+            np.ndarray: Números das linhas, em ordem crescente
+        """
+        inicio = 0 if idade_min is None else np.searchsorted(self.idades, idade_min, side='left')
+        fim = len(self.idades) if idade_max is None else np.searchsorted(self.idades, idade_max, side='right')
+        return np.sort(self.ordem_idade[inicio:fim])
+
+    def linhas_estados(self, estados):
+        """
+        Une as listas de linhas de um conjunto de estados.
+
+        Args:
+            estados (list): Estados selecionados
+
+        Returns:
+            np.ndarray: Números das linhas, em ordem crescente
+        """
+        listas = [self.estados[estado] for estado in estados if estado in self.estados]
+        if not listas:
+            return np.array([], dtype=self.ordem_idade.dtype)
+        if len(listas) == 1:
+            return listas[0]
+        # As listas são disjuntas: a união é a concatenação reordenada
+        return np.sort(np.concatenate(listas))
+
+    def selecionar(self, idade_min=None, idade_max=None, estados=None):
+        """
+        Resolve os filtros em uma seleção de linhas.
+
+        Args:
+            idade_min (float): Idade mínima, inclusiva (sem limite se None)
+            idade_max (float): Idade máxima, inclusiva (sem limite se None)
+            estados (str | list): Estado ou lista de estados; None ou 'Todos'
+                não filtram por estado
+
+        Returns:
+            np.ndarray | None: Números das linhas selecionadas, em ordem
+            crescente, ou None quando nenhum filtro restringe a base
+        """
+        if isinstance(estados, str):
+            estados = None if estados == 'Todos' else [estados]
+
+        selecao = None
+        if idade_min is not None or idade_max is not None:
+            selecao = self.faixa_idade(idade_min, idade_max)
+        if estados:
+            linhas = self.linhas_estados(estados)
+            selecao = linhas if selecao is None else np.intersect1d(selecao, linhas,
+                                                                    assume_unique=True)
+
+        # Uma seleção com todas as linhas equivale a não filtrar
+        if selecao is not None and len(selecao) == self.linhas:
+            return None
+        return selecao
+
+    def visao(self, base, idade_min=None, idade_max=None, estados=None):
+        """
+        Cria uma visão filtrada da base indexada, sem copiar os dados.
+
+        Args:
+            base (pd.DataFrame): A mesma base usada para construir o índice
+            idade_min (float): Idade mínima, inclusiva (sem limite se None)
+            idade_max (float): Idade máxima, inclusiva (sem limite se None)
+            estados (str | list): Estado ou lista de estados
+
+        Returns:
+            VisaoBase: Visão com as linhas selecionadas
+        """
+        return VisaoBase(base, self.selecionar(idade_min, idade_max, estados))
+
+
+class VisaoBase:
+    """
+    Seleção de linhas sobre uma base compartilhada e somente leitura.
+
+    A visão guarda apenas os números das linhas. O acesso a uma coluna
+    (``visao['Salario']``) devolve a ``pd.Series`` com as linhas selecionadas e
+    o índice original, como em um DataFrame filtrado, então as funções que só
+    leem colunas aceitam a visão no lugar do DataFrame.
+
+    Attributes:
+        base (pd.DataFrame): Base completa, compartilhada entre sessões
+        linhas (np.ndarray | None): Linhas selecionadas, em ordem crescente;
+            None seleciona a base inteira
+
+    Example:
+        >>> visao = indice.visao(base, 25, 35, 'São Paulo (SP)')
+        >>> visao['Salario'].mean()
+    """
+
+    def __init__(self, base, linhas=None):
+        self.base = base
+        self.linhas = linhas
+
+    def __len__(self):
+        return len(self.base) if self.linhas is None else len(self.linhas)
+
+    def __getitem__(self, coluna):
+        if self.linhas is None:
+            return self.base[coluna]
+        return self.base[coluna].take(self.linhas)
+
+    @property
+    def columns(self):
+        return self.base.columns
+
+    @property
+    def empty(self):
+        return len(self) == 0
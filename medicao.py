@@ -0,0 +1,314 @@
+"""
+Medição do Tempo de Cada Execução da Página
+===========================================
+
+Quando uma execução (rerun) da página salarial fica lenta, é preciso saber
+para onde foi o tempo: carregamento, filtros, tabela descritiva, algum dos
+gráficos ou o teste de hipóteses. Este módulo registra trechos cronometrados
+dentro de cada execução:
+
+- ``trecho(nome)`` mede um bloco de código da página;
+- ``@medido`` mede cada chamada de uma função (as funções públicas de
+  ``funcoes.py``), aninhada no trecho da página que a chamou.
+
+Os trechos só são registrados entre ``iniciar_execucao`` e
+``finalizar_execucao``, na thread da execução; fora disso (aquecimento,
+benchmark, linha de comando) a medição não faz nada. Cada execução finalizada
+é gravada como uma linha JSON em um log rotativo (``LOG_DESEMPENHO``, padrão
+``logs/desempenho.jsonl``; ``LOG_DESEMPENHO=0`` desativa) e pode ser exibida
+em um painel na própria página com o parâmetro ``?desempenho=1`` na URL.
+
+Os percentis de cada trecho no tráfego registrado são obtidos com::
+
+    python medicao.py                  # logs/desempenho.jsonl e rotações
+    python medicao.py outro_log.jsonl
+"""
+
+# Imports necessários
+import functools
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+LOG_PADRAO = os.path.join(DIRETORIO, 'logs', 'desempenho.jsonl')
+
+# Tamanho máximo de cada arquivo do log, em megabytes, e arquivos antigos mantidos
+LOG_PADRAO_MB = 10
+ARQUIVOS_ANTIGOS = 5
+
+_local = threading.local()
+
+
+class Execucao:
+    """
+    Trechos cronometrados de uma execução da página.
+
+    Attributes:
+        pagina (str): Nome da página executada
+        data (str): Data e hora do início, em ISO 8601
+        atributos (dict): Informações da execução (variável, filtros etc.)
+        trechos (list): Um dicionário por trecho, com ``nome``, ``nivel``
+            (profundidade do aninhamento), ``inicio_ms`` e ``ms``
+        total_ms (float | None): Duração total, preenchida ao finalizar
+    """
+
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.data = datetime.now().isoformat(timespec='milliseconds')
+        self.atributos = {}
+        self.trechos = []
+        self.total_ms = None
+        self.inicio = time.perf_counter()
+        self.nivel = 0
+
+    def como_dict(self):
+        return {'data': self.data, 'pagina': self.pagina, 'total_ms': self.total_ms,
+                **self.atributos, 'trechos': self.trechos}
+
+
+def iniciar_execucao(pagina):
+    """
+    Começa a registrar os trechos de uma execução na thread atual.
+
+    Uma execução anterior não finalizada na mesma thread é descartada.
+
+    Args:
+        pagina (str): Nome da página (gravado no log)
+
+    Returns:
+        Execucao: Execução iniciada
+    """
+    _local.execucao = Execucao(pagina)
+    return _local.execucao
+
+
+def execucao_atual():
+    # Execução em andamento na thread atual, se houver
+    return getattr(_local, 'execucao', None)
+
+
+def anotar(**atributos):
+    """
+    Acrescenta informações à execução atual (sem efeito fora de uma execução).
+
+    Example:
+        >>> anotar(variavel='Cargo', linhas=len(base_filtrada))
+    """
+    execucao = execucao_atual()
+    if execucao is not None:
+        execucao.atributos.update(atributos)
+
+
+def acumular(**valores):
+    """
+    Soma valores aos atributos da execução atual (sem efeito fora de uma execução).
+
+    Example:
+        >>> acumular(bytes_imagens=len(imagem))
+    """
+    execucao = execucao_atual()
+    if execucao is not None:
+        for nome, valor in valores.items():
+            execucao.atributos[nome] = round(execucao.atributos.get(nome, 0) + valor, 3)
+
+
+@contextmanager
+def trecho(nome):
+    """
+    Cronometra um bloco de código dentro da execução atual.
+
+    Args:
+        nome (str): Nome do trecho
+
+    Example:
+        >>> with trecho('boxplot'):
+        ...     imagem = grafico_em_cache(boxplot, variavel, filtros, versao, base)
+    """
+    execucao = execucao_atual()
+    if execucao is None:
+        yield
+        return
+
+    registro = {'nome': nome, 'nivel': execucao.nivel, 'inicio_ms': None, 'ms': None}
+    execucao.trechos.append(registro)
+    execucao.nivel += 1
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fim = time.perf_counter()
+        execucao.nivel -= 1
+        registro['inicio_ms'] = round((inicio - execucao.inicio) * 1000, 3)
+        registro['ms'] = round((fim - inicio) * 1000, 3)
+
+
+def medido(funcao):
+    """
+    Decorador que registra cada chamada da função como um trecho.
+
+    O trecho recebe o nome ``modulo.funcao`` (ex.: ``funcoes.graf_ic``).
+    """
+    nome = f'{funcao.__module__}.{funcao.__name__}'
+
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        if execucao_atual() is None:
+            return funcao(*args, **kwargs)
+        with trecho(nome):
+            return funcao(*args, **kwargs)
+    return envoltorio
+
+
+def _caminho_log():
+    return os.environ.get('LOG_DESEMPENHO', LOG_PADRAO)
+
+
+_logger = None
+_trava = threading.Lock()
+
+
+def _logger_execucoes():
+    # Logger próprio, com rotação por tamanho, criado na primeira gravação
+    global _logger
+    with _trava:
+        if _logger is None:
+            caminho = _caminho_log()
+            try:
+                megabytes = float(os.environ.get('LOG_DESEMPENHO_MB', LOG_PADRAO_MB))
+            except ValueError:
+                megabytes = LOG_PADRAO_MB
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+            manipulador = logging.handlers.RotatingFileHandler(
+                caminho, maxBytes=int(megabytes * 2 ** 20), backupCount=ARQUIVOS_ANTIGOS,
+                encoding='utf-8')
+            manipulador.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('medicao.execucoes')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(manipulador)
+            _logger = logger
+        return _logger
+
+
+def finalizar_execucao():
+    """
+    Encerra a execução atual e grava uma linha JSON no log.
+
+    Deve ser chamada ao final da página e antes de ``st.rerun()``, que
+    interrompe a execução.
+
+    Returns:
+        Execucao | None: Execução finalizada, ou None se não havia uma
+    """
+    execucao = execucao_atual()
+    if execucao is None:
+        return None
+    _local.execucao = None
+    execucao.total_ms = round((time.perf_counter() - execucao.inicio) * 1000, 3)
+
+    if _caminho_log() != '0':
+        try:
+            _logger_execucoes().info(json.dumps(execucao.como_dict(), ensure_ascii=False,
+                                                default=str))
+        except OSError:
+            # Sem permissão de escrita, a página continua sem o log
+            pass
+    return execucao
+
+
+def painel_desempenho(execucoes):
+    """
+    Exibe os trechos das execuções em um painel da página.
+
+    Args:
+        execucoes (list): Execuções finalizadas, da mais antiga à mais recente
+    """
+    import pandas as pd
+    import streamlit as st
+
+    for execucao in execucoes:
+        titulo = f'⏱️ Desempenho: {execucao.pagina} em {execucao.total_ms:.0f} ms'
+        with st.expander(titulo, expanded=execucao is execucoes[-1]):
+            if execucao.atributos:
+                st.caption(' | '.join(f'{nome}: {valor}' for nome, valor in execucao.atributos.items()))
+            tabela = pd.DataFrame([{
+                # Espaços largos marcam o aninhamento sem serem removidos na tabela
+                'Trecho': '\u2003' * 2 * registro['nivel'] + registro['nome'],
+                'Início (ms)': registro['inicio_ms'],
+                'Duração (ms)': registro['ms'],
+            } for registro in execucao.trechos])
+            st.dataframe(tabela, hide_index=True)
+
+
+def ler_log(caminho=None):
+    """
+    Lê as execuções gravadas, incluindo os arquivos rotacionados.
+
+    Args:
+        caminho (str): Arquivo do log (padrão: ``LOG_DESEMPENHO``)
+
+    Returns:
+        list: Um dicionário por execução, do arquivo mais antigo ao mais novo
+    """
+    caminho = caminho or _caminho_log()
+    arquivos = sorted(glob.glob(glob.escape(caminho) + '.*'), reverse=True)
+    execucoes = []
+    for arquivo in arquivos + [caminho]:
+        if not os.path.exists(arquivo):
+            continue
+        with open(arquivo, encoding='utf-8') as entrada:
+            execucoes.extend(json.loads(linha) for linha in entrada if linha.strip())
+    return execucoes
+
+
+def percentis_trechos(execucoes):
+    """
+    Calcula os percentis de duração de cada trecho.
+
+    Args:
+        execucoes (list): Execuções de ``ler_log``
+
+    Returns:
+        pd.DataFrame: Por página e trecho, número de medições, p50, p95, p99
+        e máximo em ms; o trecho ``total`` é a execução inteira
+    """
+    import pandas as pd
+
+    linhas = []
+    for execucao in execucoes:
+        linhas.append({'pagina': execucao['pagina'], 'trecho': 'total', 'ms': execucao['total_ms']})
+        linhas.extend({'pagina': execucao['pagina'], 'trecho': registro['nome'], 'ms': registro['ms']}
+                      for registro in execucao['trechos'])
+    if not linhas:
+        return pd.DataFrame(columns=['pagina', 'trecho', 'medicoes', 'p50_ms', 'p95_ms',
+                                     'p99_ms', 'max_ms'])
+
+    grupos = pd.DataFrame(linhas).groupby(['pagina', 'trecho'], sort=False)['ms']
+    tabela = pd.DataFrame({
+        'medicoes': grupos.size(),
+        'p50_ms': grupos.quantile(0.50),
+        'p95_ms': grupos.quantile(0.95),
+        'p99_ms': grupos.quantile(0.99),
+        'max_ms': grupos.max(),
+    })
+    return tabela.reset_index()
+
+
+def main():
+    # Imprime os percentis de cada trecho registrados no log
+    execucoes = ler_log(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f'{len(execucoes)} execuções')
+    print(percentis_trechos(execucoes).to_string(index=False, float_format='%.1f'))
+
+
+if __name__ == '__main__':
+    main()
@@ -17,22 +17,27 @@ Data: 2025
 """
 
 # Imports necessários
+# (seaborn e scipy são importados sob demanda pelos módulos de análise)
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import streamlit as st
-import tabulate
-import re
-import base64
-import scipy
-import scipy.stats as stats
 
 # Importar funções auxiliares
 from funcoes import (
-    ajustar_ordem, desc_ic, grafico_density, graf_ic, 
-    boxplot, hipoteses, plot_distribuicao
+    VARIAVEIS_ANALISE, ajustar_ordem, desc_ic, plano_consulta, grafico_density, graf_ic, 
+    boxplot, hipoteses, plot_distribuicao, matriz_hipoteses, grafico_matriz_testes,
+    hipoteses_reamostragem
 )
+from dados import (carregar_base, carregar_indice, edicoes_salarios, fonte_salarios,
+                   limites_salarios, versao_dados)
+from consultas import backend_consultas
+from indices import VisaoBase
+from particoes import EDICAO_PADRAO
+from cache_graficos import impressao_filtros
+from graficos_vega import desenhar, exibir_grafico, grafico_no_modo, modo_graficos
+from testes import CORRECOES, resultado_em_cache
+from reamostragem import ESTATISTICAS
+from medicao import anotar, finalizar_execucao, iniciar_execucao, painel_desempenho, trecho
+from renderizacao import estatisticas
 
 # Configuração da página
 st.set_page_config(
@@ -40,45 +45,47 @@ st.set_page_config(
     page_title="Dashboard Interativo - Profissionais de Dados"
 )
 
-# Carregamento dos dados
+# Tempo de cada trecho desta execução (ver medicao.py)
+iniciar_execucao('salarios')
+
+# Tabela descritiva e momentos dos testes saem do backend de consultas
+# configurado em BACKEND_CONSULTAS (ver consultas.py)
+consultas = backend_consultas()
+
+# Edições disponíveis no armazém particionado (vazia sem ele; ver particoes.py)
 try:
-    # Usar base2.csv que é a base tratada e limpa
-    base = pd.read_csv('base2.csv', sep=',', encoding='utf-8')
-    
-    # Remover colunas vazias e "Unnamed"
-    colunas_para_remover = [col for col in base.columns if col.startswith('Unnamed') or col == '']
-    if colunas_para_remover:
-        base = base.drop(columns=colunas_para_remover)
-    
-    
-    # Limpeza inicial dos dados
-    # Converter colunas numéricas
-    base['Idade'] = pd.to_numeric(base['Idade'], errors='coerce')
-    base['Salario'] = pd.to_numeric(base['Salario'], errors='coerce')
-    
-    # Remover linhas com dados inválidos nas colunas críticas
-    base = base.dropna(subset=['Idade', 'Salario'])
-        
+    edicoes = edicoes_salarios()
 except Exception as e:
     st.error(f"Erro ao carregar dados: {str(e)}")
     st.stop()
+edicao = edicoes[-1] if edicoes else None
 
-# Header estilizado
-st.markdown("""
+# Header estilizado (a edição escolhida na barra lateral fica no estado da sessão)
+ano = st.session_state.get('edicao_select', edicao) or EDICAO_PADRAO
+st.markdown(f"""
 <div style="text-align: center; padding: 25px; background: linear-gradient(135deg, #1E3A8A 0%, #1E40AF 50%, #06B6D4 100%);
             border-radius: 15px; margin-bottom: 30px; border: 2px solid #0F172A; box-shadow: 0 8px 32px rgba(30, 58, 138, 0.3);">
     <h1 style="color: white; margin: 0; text-shadow: 0 2px 4px rgba(0,0,0,0.3); font-size: 2.5em;">🚀 Dashboard Interativo</h1>
-    <p style="color: #E0F2FE; margin: 8px 0 0 0; font-size: 18px; font-weight: 300; text-shadow: 0 1px 2px rgba(0,0,0,0.3);">Análise de dados do profissional da área de dados no Brasil em 2023</p>
+    <p style="color: #E0F2FE; margin: 8px 0 0 0; font-size: 18px; font-weight: 300; text-shadow: 0 1px 2px rgba(0,0,0,0.3);">Análise de dados do profissional da área de dados no Brasil em {ano}</p>
 </div>
 """, unsafe_allow_html=True)
 
 # Sidebar com filtros
 with st.sidebar:
     st.markdown("**🔧 Filtros**", help="Configure os filtros para análise dos dados")
-    
-    # Garantir que os valores de idade são numéricos (dados já foram limpos no carregamento)
-    idade_min_valor = int(base['Idade'].min())
-    idade_max_valor = int(base['Idade'].max())
+
+    # A edição troca a base analisada, então vale sem precisar aplicar os filtros
+    if len(edicoes) > 1:
+        edicao = st.selectbox('📅 Edição da pesquisa', edicoes, index=len(edicoes) - 1,
+                              key='edicao_select')
+
+    # Limites de idade da edição (do manifesto das partições, quando existe)
+    try:
+        with trecho('limites'):
+            idade_min_valor, idade_max_valor = map(int, limites_salarios('Idade', edicao))
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {str(e)}")
+        st.stop()
     
     idade_min, idade_max = st.slider(
         '📊 Selecione a faixa de idade',
@@ -107,63 +114,101 @@ with st.sidebar:
         )
     except Exception as e:
         st.error(f"Erro ao carregar estados: {str(e)}")
-        st.error(f"Colunas disponíveis: {base.columns.tolist()}")
         st.stop()
     
     # Botão para aplicar filtros
     aplicar_filtros = st.button('Aplicar filtros', type='primary', use_container_width=True)
 
-# Inicializar estado dos filtros se não existir
+# Inicializar estado dos filtros se não existir. A sessão guarda apenas os
+# parâmetros do filtro e as linhas selecionadas (None quando não há filtro);
+# a base em si é compartilhada entre todas as sessões
 if 'filtros_aplicados' not in st.session_state:
     st.session_state.filtros_aplicados = False
-    st.session_state.base_filtrada = base.copy()
     st.session_state.idade_filtro = (idade_min_valor, idade_max_valor)
     st.session_state.estado_filtro = 'Todos'
+    st.session_state.filtro_cubo = {}
+    st.session_state.linhas_filtro = None
+    st.session_state.versao_filtro = None
 
-# Garantir que base_filtrada sempre existe no session_state
-if 'base_filtrada' not in st.session_state:
-    st.session_state.base_filtrada = base.copy()
-
-# Aplicar filtros aos dados apenas quando o botão for clicado
+# Aplicar filtros aos dados apenas quando o botão for clicado. As linhas do
+# novo filtro são resolvidas abaixo, na base que ele seleciona
 if aplicar_filtros:
+    st.session_state.filtro_cubo = {'idade_min': idade_min, 'idade_max': idade_max,
+                                    'estado': estado_selecionado}
+    st.session_state.versao_filtro = None
+    st.session_state.filtros_aplicados = True
+    st.session_state.idade_filtro = (idade_min, idade_max)
+    st.session_state.estado_filtro = estado_selecionado
+filtro_cubo = st.session_state.filtro_cubo
+
+# Carregamento dos dados
+try:
+    # Com o armazém particionado, só as partições da edição que o filtro pode
+    # tocar são lidas; sem ele, a base é o base2.csv tratado e limpo. A leitura
+    # acontece uma vez por processo e a base é compartilhada entre as sessões,
+    # então ela não deve ser modificada pela página
+    with trecho('carregamento'):
+        fonte = fonte_salarios(edicao, **filtro_cubo)
+        base = carregar_base(fonte)
+        indice = carregar_indice(fonte)
+        versao = versao_dados(fonte)
+except Exception as e:
+    st.error(f"Erro ao carregar dados: {str(e)}")
+    st.stop()
+
+# Os números das linhas valem só para a versão da base em que foram calculados
+if st.session_state.versao_filtro != versao:
     try:
-        # Aplicar filtros
-        if estado_selecionado != 'Todos':
-            base_filtrada = base[(base['Idade'] >= idade_min) & (base['Idade'] <= idade_max) & (base['Estados'] == estado_selecionado)]
-        else:
-            base_filtrada = base[(base['Idade'] >= idade_min) & (base['Idade'] <= idade_max)]
-        
+        # Resolver os filtros pelos índices de idade e estado, sem percorrer a base
+        if filtro_cubo:
+            with trecho('filtros'):
+                st.session_state.linhas_filtro = indice.selecionar(
+                    filtro_cubo['idade_min'], filtro_cubo['idade_max'], filtro_cubo['estado'])
+        st.session_state.versao_filtro = versao
     except Exception as e:
         st.error(f"Erro ao aplicar filtros: {str(e)}")
         st.error(f"Tipos de dados - Idade: {base['Idade'].dtype}, Estados: {base['Estados'].dtype}")
         st.error(f"Valores únicos de Idade: {base['Idade'].unique()[:10]}")
         st.stop()
-else:
-    base_filtrada = base
+base_filtrada = VisaoBase(base, st.session_state.linhas_filtro)
 
-variavel = st.selectbox('Escolha a variável para análise', ['Cargo',  'Carreira', 'Genero', 'Raça', 'Experiencia'])
+variavel = st.selectbox('Escolha a variável para análise', VARIAVEIS_ANALISE)
+anotar(variavel=variavel, edicao=edicao, filtros=filtro_cubo, linhas=len(base_filtrada),
+       backend=consultas.nome, graficos=modo_graficos())
+
+# Agrupamento da base filtrada pela variável, feito no máximo uma vez nesta
+# execução e compartilhado pelos gráficos e testes (ver plano.py)
+plano = plano_consulta(variavel, base_filtrada)
 
 col1, col2 = st.columns([2, 1], gap="medium")
 
 with col1:
     st.subheader('📋 Sumário descritivo')
+    resultado_desc = None
     try:
-        resultado_desc = desc_ic(variavel, base_filtrada)
-        if not resultado_desc.empty:
-            st.write(resultado_desc)
-        else:
-            st.warning("Não foi possível gerar estatísticas para esta variável")
+        with trecho('desc_ic'):
+            # Filtro e agrupamento resolvidos pelo backend (no pandas, pelo cubo
+            # pré-calculado, sem percorrer as linhas da base)
+            resultado_desc = consultas.desc_ic(fonte, variavel, **filtro_cubo)
+            if not resultado_desc.empty:
+                st.write(resultado_desc)
+            else:
+                st.warning("Não foi possível gerar estatísticas para esta variável")
     except Exception as e:
         st.error(f"Erro ao gerar estatísticas: {str(e)}")
 
 with col2:
     st.subheader('📊 Intervalos de Confiança')
     try:
-        fig_ic = graf_ic(variavel, base_filtrada)
-        if fig_ic is not None:
-            st.pyplot(fig_ic)
-        else:
-            st.warning("Não foi possível gerar gráfico de intervalos de confiança")
+        with trecho('graf_ic'):
+            # Os gráficos (imagens ou especificações Vega-Lite, conforme o
+            # modo) são reaproveitados entre sessões e reruns
+            grafico_ic = grafico_no_modo(graf_ic, variavel, filtro_cubo, versao,
+                                         base_filtrada, tabela=resultado_desc, plano=plano)
+            if grafico_ic is not None:
+                exibir_grafico(grafico_ic)
+            else:
+                st.warning("Não foi possível gerar gráfico de intervalos de confiança")
     except Exception as e:
         st.error(f"Erro ao gerar gráfico: {str(e)}")
 
@@ -173,22 +218,26 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader('🌊 Distribuições estimadas dos grupos')
     try:
-        fig_density = grafico_density(variavel, base_filtrada)
-        if fig_density is not None:
-            st.pyplot(fig_density)
-        else:
-            st.warning("Não foi possível gerar gráfico de densidade")
+        with trecho('grafico_density'):
+            grafico_dens = grafico_no_modo(grafico_density, variavel, filtro_cubo, versao, base_filtrada,
+                                           plano=plano)
+            if grafico_dens is not None:
+                exibir_grafico(grafico_dens)
+            else:
+                st.warning("Não foi possível gerar gráfico de densidade")
     except Exception as e:
         st.error(f"Erro ao gerar gráfico de densidade: {str(e)}")
 
 with col2:
     st.subheader(f'📦 Salário por categoria')
     try:
-        fig_boxplot = boxplot(variavel, base_filtrada)
-        if fig_boxplot is not None:
-            st.pyplot(fig_boxplot)
-        else:
-            st.warning("Não foi possível gerar boxplot")
+        with trecho('boxplot'):
+            grafico_boxplot = grafico_no_modo(boxplot, variavel, filtro_cubo, versao, base_filtrada,
+                                              plano=plano)
+            if grafico_boxplot is not None:
+                exibir_grafico(grafico_boxplot)
+            else:
+                st.warning("Não foi possível gerar boxplot")
     except Exception as e:
         st.error(f"Erro ao gerar boxplot: {str(e)}")
 
@@ -196,6 +245,21 @@ with col2:
 st.divider()
 st.subheader('🧪 Teste de Hipóteses')
 
+
+def obter_momentos():
+    # Estatísticas suficientes de cada categoria, calculadas uma vez por filtro
+    # e compartilhadas entre sessões
+    chave = ('momentos', variavel, impressao_filtros(filtro_cubo), versao)
+    return resultado_em_cache(chave, lambda: consultas.momentos(fonte, variavel, **filtro_cubo))
+
+
+def obter_matriz(correcao='holm'):
+    # Testes de todos os pares, calculados a partir dos momentos
+    chave = ('matriz', variavel, correcao, impressao_filtros(filtro_cubo), versao)
+    return resultado_em_cache(chave, lambda: matriz_hipoteses(variavel, base_filtrada, correcao,
+                                                              momentos=obter_momentos()))
+
+
 # Inicializar estado do teste de hipóteses se não existir
 if 'teste_executado' not in st.session_state:
     st.session_state.teste_executado = False
@@ -212,10 +276,18 @@ if 'figura_distribuicao' not in st.session_state:
 c1, c2, c3 = st.columns([2, 2, 3], border=False, vertical_alignment='top')
 
 with c1:   
-    lista = pd.Series(base_filtrada[variavel].unique()).dropna()
+    with trecho('categorias'):
+        lista = pd.Series(plano.categorias_presentes(), dtype=object)
     categoria1 = st.selectbox('Escolha a primeira categoria da variável', lista, key='cat1')
     lista2 = lista.loc[lista != categoria1]
     categoria2 = st.selectbox('Escolha a segunda categoria da variável', lista2, key='cat2')
+
+    metodo_teste = st.radio('Método do teste', ['Teste T', 'Permutação e bootstrap'],
+                            horizontal=True, key='metodo_teste')
+    if metodo_teste == 'Permutação e bootstrap':
+        estatistica_teste = st.selectbox('Estatística comparada', list(ESTATISTICAS),
+                                         format_func=lambda e: ESTATISTICAS[e].capitalize(),
+                                         key='estatistica_teste')
     
     if st.button('Executar teste', type='primary', use_container_width=True):
         st.session_state.teste_executado = True
@@ -225,22 +297,40 @@ with c1:
         # Executar teste com spinner informativo
         with st.spinner('Executando teste de hipóteses...'):
             try:
-                resultado_teste = hipoteses(variavel, categoria1, categoria2, base_filtrada)
-                figura_distribuicao = plot_distribuicao(variavel, base_filtrada, categoria1, categoria2)
-                
-                st.session_state.resultado_teste = resultado_teste
-                st.session_state.figura_distribuicao = figura_distribuicao
+                with trecho('teste_hipoteses'):
+                    if metodo_teste == 'Permutação e bootstrap':
+                        # Reamostragem com semente fixa: o resultado de cada par é
+                        # reprodutível e pode ser compartilhado entre sessões
+                        chave = ('reamostragem', variavel, categoria1, categoria2, estatistica_teste,
+                                 impressao_filtros(filtro_cubo), versao)
+                        resultado_teste = resultado_em_cache(chave, lambda: hipoteses_reamostragem(
+                            variavel, categoria1, categoria2, base_filtrada, estatistica_teste,
+                            plano=plano))
+                    else:
+                        resultado_teste = hipoteses(variavel, categoria1, categoria2, base_filtrada,
+                                                    matriz=obter_matriz(), plano=plano)
+                    # A sessão guarda apenas a imagem renderizada (a figura é
+                    # liberada) ou a especificação Vega-Lite
+                    figura_distribuicao = desenhar(plot_distribuicao, variavel, base_filtrada,
+                                                   categoria1, categoria2, momentos=obter_momentos())
+
+                    st.session_state.resultado_teste = resultado_teste
+                    st.session_state.figura_distribuicao = figura_distribuicao
             except Exception as e:
                 st.error(f"Erro ao executar teste de hipóteses: {str(e)}")
                 st.session_state.resultado_teste = None
                 st.session_state.figura_distribuicao = None
         
+        # O st.rerun() interrompe a execução: ela é encerrada aqui para que o
+        # tempo do teste fique registrado e apareça no painel da próxima
+        anotar(**estatisticas())
+        st.session_state.medicao_teste = finalizar_execucao()
         st.rerun()
 
 with c2:   
     if st.session_state.teste_executado and st.session_state.figura_distribuicao is not None:
         try:
-            st.pyplot(st.session_state.figura_distribuicao)
+            exibir_grafico(st.session_state.figura_distribuicao)
         except Exception as e:
             st.error(f"Erro ao exibir gráfico: {str(e)}")
     else:
@@ -259,21 +349,22 @@ with c3:
 if st.session_state.teste_executado and st.session_state.categoria1_teste and st.session_state.categoria2_teste:
     st.divider()
     
-    # Verificar dados dos grupos
+    # Verificar dados dos grupos (tamanhos lidos dos momentos já calculados)
     try:
-        grupo1 = base_filtrada[base_filtrada[variavel] == st.session_state.categoria1_teste]['Salario'].dropna()
-        grupo2 = base_filtrada[base_filtrada[variavel] == st.session_state.categoria2_teste]['Salario'].dropna()
+        tamanhos = obter_momentos()['n']
+        n_grupo1 = int(tamanhos.get(st.session_state.categoria1_teste, 0))
+        n_grupo2 = int(tamanhos.get(st.session_state.categoria2_teste, 0))
     except Exception as e:
         st.error(f"Erro ao acessar dados dos grupos: {str(e)}")
-        grupo1 = pd.Series(dtype='float64')
-        grupo2 = pd.Series(dtype='float64')
+        n_grupo1 = 0
+        n_grupo2 = 0
     
     col_info1, col_info2 = st.columns(2)
     
     with col_info1:
         st.info("👥 **Informações dos grupos:**")
-        st.write(f"**{st.session_state.categoria1_teste}:** {len(grupo1)} observações")
-        st.write(f"**{st.session_state.categoria2_teste}:** {len(grupo2)} observações")
+        st.write(f"**{st.session_state.categoria1_teste}:** {n_grupo1} observações")
+        st.write(f"**{st.session_state.categoria2_teste}:** {n_grupo2} observações")
     
     with col_info2:
         st.info("⚙️ **Processo executado:**")
@@ -282,6 +373,37 @@ if st.session_state.teste_executado and st.session_state.categoria1_teste and st
         st.write("• Transformações para dados não normais")
         st.write("• Teste t-Student para comparação")
 
+# Comparação de todos os pares de categorias de uma vez
+st.divider()
+st.subheader('🧮 Comparação de todos os pares')
+
+col_pares1, col_pares2 = st.columns([1, 3])
+
+with col_pares1:
+    correcao = st.selectbox('Correção para comparações múltiplas', list(CORRECOES),
+                            format_func=CORRECOES.get, key='correcao_pares')
+    mostrar_pares = st.checkbox('Mostrar todos os pares', key='mostrar_pares')
+
+with col_pares2:
+    if mostrar_pares:
+        try:
+            with trecho('pares'):
+                matriz = obter_matriz(correcao)
+                grafico_matriz = grafico_no_modo(grafico_matriz_testes, variavel, filtro_cubo, versao,
+                                                 base_filtrada, matriz=matriz, variante=correcao)
+                exibir_grafico(grafico_matriz)
+
+                tabela_pares = matriz.pares.rename(columns={
+                    'n1': 'Tamanho 1', 'n2': 'Tamanho 2', 'p_levene': 'p-valor Levene',
+                    'metodo': 'Teste t', 'p_valor': 'p-valor', 'p_ajustado': 'p-valor ajustado',
+                    'efeito': 'Efeito (g de Hedges)'
+                })
+                st.dataframe(tabela_pares.round(4))
+        except Exception as e:
+            st.error(f"Erro ao comparar os pares: {str(e)}")
+    else:
+        st.info("Marque 'Mostrar todos os pares' para testar todas as combinações de categorias")
+
 # Footer estilizado
 st.markdown("""
 <div style="background: linear-gradient(135deg, #1E3A8A 0%, #1E40AF 100%); padding: 20px; border-radius: 15px; margin-top: 40px; text-align: center; border: 2px solid #0F172A;">
@@ -294,3 +416,9 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Encerrar a medição desta execução (gravada no log, com as figuras vivas e a
+# memória do processo) e, com ?desempenho=1 na URL, exibir o tempo de cada trecho
+anotar(**estatisticas())
+execucoes = [st.session_state.pop('medicao_teste', None), finalizar_execucao()]
+if st.query_params.get('desempenho') == '1':
+    painel_desempenho([execucao for execucao in execucoes if execucao is not None])
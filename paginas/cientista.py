@@ -12,90 +12,49 @@ Data: 28/08/2025
 
 # Imports necessários
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from matplotlib.patches import Rectangle
 
-# Configurar estilo dos gráficos
-plt.style.use('default')
-sns.set_palette("husl")
+from dados import carregar_respostas, versao_dados
+from funcoes import SECOES_CIENTISTA, barras_respostas
+from graficos_vega import exibir_grafico, grafico_no_modo
 
 # Carregamento dos dados
 try:
-    base1 = pd.read_csv('cientista_a-c.csv', sep=',', encoding='utf-8')
-    base2 = pd.read_csv('cientista_d.csv', sep=',', encoding='utf-8')
+    # As respostas são compactadas em bitsets, com os totais de cada opção
+    # calculados uma única vez por processo
+    base1 = carregar_respostas('cientista_a-c.csv')
+    base2 = carregar_respostas('cientista_d.csv')
+    versao1 = versao_dados('cientista_a-c.csv')
+    versao2 = versao_dados('cientista_d.csv')
 except Exception as e:
     st.error(f"Erro ao carregar dados: {str(e)}")
     st.stop()
 
 
-def plotar_barras_melhorado(variaveis, base, titulo, cor_principal='#2E86AB'):
+def plotar_barras_melhorado(variaveis, base, titulo, cor_principal='#2E86AB', versao=None):
     """
     Função melhorada para plotar gráficos de barras horizontais com design aprimorado.
     
     Args:
         variaveis (list): Lista de variáveis para análise
-        base (pd.DataFrame): DataFrame com os dados
+        base (RespostasMultiplas): Respostas compactadas em bitsets
         titulo (str): Título do gráfico
         cor_principal (str): Cor principal das barras
+        versao: Versão dos dados (ver ``dados.versao_dados``)
         
     Returns:
-        plt.Figure: Figura matplotlib com o gráfico
+        bytes | dict | None: Imagem ou especificação Vega-Lite do gráfico
+        (conforme ``MODO_GRAFICOS``), reaproveitada entre sessões
         
     Example:
-        >>> fig = plotar_barras_melhorado(variaveis, df, "Título")
-        >>> st.pyplot(fig)
+        >>> grafico = plotar_barras_melhorado(variaveis, base1, "Título", versao=versao1)
+        >>> exibir_grafico(grafico)
     """
     try:
-        # Separa as frequências das variáveis
-        totais = base[variaveis].sum().sort_values(ascending=True)
-        total_geral = totais.sum()
-        
-        # Filtrar apenas variáveis com dados
-        totais = totais[totais > 0]
-        
-        if totais.empty:
+        grafico = grafico_no_modo(barras_respostas, titulo, None, versao,
+                                  variaveis, base, cor_principal)
+        if grafico is None:
             st.warning("Nenhum dado encontrado para esta categoria")
-            return None
-        
-        # Criar figura com tamanho otimizado
-        fig, ax = plt.subplots(figsize=(8, max(4, len(totais) * 0.3)))
-        
-        # Criar cor única para todas as barras
-        cor_unica = cor_principal
-        
-        # Plotar barras horizontais
-        bars = ax.barh(range(len(totais)), totais, color=cor_unica, alpha=0.8, 
-                      edgecolor='white', linewidth=0.5)
-        
-        # Adicionar valores e percentuais nas barras
-        for i, (v, bar) in enumerate(zip(totais, bars)):
-            percentual = v / total_geral * 100
-            # Posicionar apenas o percentual dentro da barra
-            ax.text(v * 0.5, i, f'{percentual:.1f}%', 
-                   ha='center', va='center', fontweight='bold', 
-                   fontsize=7, color='white')
-        
-        # Configurações do gráfico
-        ax.set_yticks(range(len(totais)))
-        ax.set_yticklabels([var.replace('_', ' ').title() for var in totais.index], fontsize=8)
-        ax.set_xlabel('Frequência', fontsize=10, fontweight='bold')
-        
-        # Adicionar grid sutil
-        ax.grid(axis='x', alpha=0.3, linestyle='--')
-        ax.set_axisbelow(True)
-        
-        # Remover bordas
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        
-        # Ajustar layout
-        plt.tight_layout()
-        
-        return fig
+        return grafico
         
     except Exception as e:
         st.error(f"Erro ao criar gráfico: {str(e)}")
@@ -108,14 +67,14 @@ def criar_metricas_resumo(variaveis, base, titulo):
     
     Args:
         variaveis (list): Lista de variáveis para análise
-        base (pd.DataFrame): DataFrame com os dados
+        base (RespostasMultiplas): Respostas compactadas em bitsets
         titulo (str): Título da seção
         
     Example:
         >>> criar_metricas_resumo(variaveis, df, "Título")
     """
     try:
-        totais = base[variaveis].sum().sort_values(ascending=False)
+        totais = base.totais(variaveis).sort_values(ascending=False)
         total_geral = totais.sum()
         
         # Top 3 mais frequentes
@@ -162,10 +121,12 @@ def criar_metricas_resumo(variaveis, base, titulo):
 
 
 # Definição das variáveis para cada tipo de pergunta
-variaveis_1 = base1.columns[1:13].to_list()   # Rotina de trabalho
-variaveis_2 = base1.columns[13:27].to_list()  # Técnicas e métodos
-variaveis_3 = base1.columns[27:].to_list()    # Tecnologias
-variaveis_4 = base2.columns[1:].to_list()     # Tempo no trabalho
+# (as mesmas colunas usadas no aquecimento do cache)
+fatias = {titulo: fatia for titulo, _, fatia, _ in SECOES_CIENTISTA}
+variaveis_1 = base1.colunas[fatias['Rotina de Trabalho']]
+variaveis_2 = base1.colunas[fatias['Técnicas e Métodos']]
+variaveis_3 = base1.colunas[fatias['Tecnologias']]
+variaveis_4 = base2.colunas[fatias['Tempo no Trabalho']]
 
 # Configuração da página
 st.set_page_config(layout="wide", page_title="Cientista de Dados - Análise")
@@ -187,9 +148,9 @@ st.markdown("## Quais das opções abaixo fazem parte da sua rotina no trabalho
 criar_metricas_resumo(variaveis_1, base1, "Rotina de Trabalho")
 
 # Gráfico principal
-fig1 = plotar_barras_melhorado(variaveis_1, base1, "Rotina de Trabalho", "#2E86AB")
-if fig1:
-    st.pyplot(fig1)
+grafico1 = plotar_barras_melhorado(variaveis_1, base1, "Rotina de Trabalho", "#2E86AB", versao1)
+if grafico1:
+    exibir_grafico(grafico1)
 
 # Segunda seção: Técnicas e métodos
 st.markdown("---")
@@ -199,9 +160,9 @@ st.markdown("## Quais as técnicas e métodos listados abaixo você costuma util
 criar_metricas_resumo(variaveis_2, base1, "Técnicas e Métodos")
 
 # Gráfico principal
-fig2 = plotar_barras_melhorado(variaveis_2, base1, "Técnicas e Métodos", "#A23B72")
-if fig2:
-    st.pyplot(fig2)
+grafico2 = plotar_barras_melhorado(variaveis_2, base1, "Técnicas e Métodos", "#A23B72", versao1)
+if grafico2:
+    exibir_grafico(grafico2)
 
 # Terceira seção: Tecnologias
 st.markdown("---")
@@ -211,9 +172,9 @@ st.markdown("## Quais dessas tecnologias fazem parte do seu dia a dia como cient
 criar_metricas_resumo(variaveis_3, base1, "Tecnologias")
 
 # Gráfico principal
-fig3 = plotar_barras_melhorado(variaveis_3, base1, "Tecnologias", "#F18F01")
-if fig3:
-    st.pyplot(fig3)
+grafico3 = plotar_barras_melhorado(variaveis_3, base1, "Tecnologias", "#F18F01", versao1)
+if grafico3:
+    exibir_grafico(grafico3)
 
 # Quarta seção: Tempo no trabalho
 st.markdown("---")
@@ -223,9 +184,9 @@ st.markdown("## Em qual das opções abaixo você gasta a maior parte do seu tem
 criar_metricas_resumo(variaveis_4, base2, "Tempo no Trabalho")
 
 # Gráfico principal
-fig4 = plotar_barras_melhorado(variaveis_4, base2, "Tempo no Trabalho", "#C73E1D")
-if fig4:
-    st.pyplot(fig4)
+grafico4 = plotar_barras_melhorado(variaveis_4, base2, "Tempo no Trabalho", "#C73E1D", versao2)
+if grafico4:
+    exibir_grafico(grafico4)
 
 # Footer informativo
 st.markdown("---")
@@ -0,0 +1,242 @@
+"""
+Armazém Particionado por Edição e Região
+========================================
+
+Guarda a base salarial de várias edições da pesquisa State of Data em
+partições por edição e ``Região``, cada uma no formato colunar de
+``snapshot.py``::
+
+    particoes/salarios/
+        manifesto.json
+        edicao=2023/<lote>/regiao=Sudeste/   (um .npy por coluna)
+        edicao=2023/<lote>/regiao=Sul/
+        ...
+
+O manifesto lista as partições com o número de linhas, o mínimo e o máximo de
+cada coluna numérica e o conjunto de valores de cada coluna categórica. Com
+ele, ``selecionar`` descarta sem abrir nenhum arquivo as partições que um
+filtro não pode tocar (outra edição, outra região, faixa de idade fora dos
+limites, estado ausente), e a leitura de uma edição ou região não fica mais
+lenta quando outras edições são acrescentadas.
+
+Cada gravação de uma edição vai para um lote novo e o manifesto é trocado de
+forma atômica, então um servidor com as partições antigas abertas (mapeadas em
+memória) continua lendo dados consistentes. Uso como etapa de build::
+
+    python particoes.py                          # base2.csv como edição 2023
+    python particoes.py --edicao 2022 base_2022.csv
+"""
+
+# Imports necessários
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+
+PASTA_PARTICOES = 'particoes'
+VERSAO_FORMATO = 1
+
+# Coluna constante gravada em cada partição e coluna que divide as edições
+COLUNA_EDICAO = 'Edicao'
+COLUNA_PARTICAO = 'Região'
+
+# Edição da base2.csv do projeto
+EDICAO_PADRAO = 2023
+
+# Seleção de partições de um armazém; é imutável e pode ser usada no lugar do
+# caminho de um arquivo nas funções de carregamento de dados.py
+Selecao = namedtuple('Selecao', ['armazem', 'diretorios'])
+
+
+def ler_manifesto(armazem):
+    """
+    Lê o manifesto do armazém (reaproveitando a leitura se não mudou).
+
+    Args:
+        armazem (str): Diretório do armazém
+
+    Returns:
+        dict | None: Manifesto, ou None se o armazém não existir
+    """
+    manifesto = snapshot.ler_manifesto(armazem)
+    if manifesto is None or manifesto.get('versao') != VERSAO_FORMATO:
+        return None
+    return manifesto
+
+
+def assinatura_manifesto(armazem):
+    # Data de modificação e tamanho do manifesto: mudam a cada gravação
+    info = os.stat(os.path.join(armazem, snapshot.ARQUIVO_MANIFESTO))
+    return (info.st_mtime_ns, info.st_size)
+
+
+def _estatisticas(base):
+    # Limites das colunas numéricas e valores presentes nas categóricas
+    minimos, maximos, valores = {}, {}, {}
+    for nome in base.columns:
+        serie = base[nome]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valores[nome] = sorted(str(valor) for valor in serie.dropna().unique())
+        elif serie.notna().any():
+            minimos[nome] = float(serie.min())
+            maximos[nome] = float(serie.max())
+        else:
+            minimos[nome] = maximos[nome] = None
+    return {'minimos': minimos, 'maximos': maximos, 'valores': valores}
+
+
+def _gravar_manifesto(armazem, manifesto):
+    # Escrita atômica, como no snapshot: o leitor nunca vê um manifesto parcial
+    temporario = os.path.join(armazem, snapshot.ARQUIVO_MANIFESTO + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, os.path.join(armazem, snapshot.ARQUIVO_MANIFESTO))
+
+
+def adicionar_edicao(armazem, edicao, base):
+    """
+    Grava as partições de uma edição, substituindo a versão anterior dela.
+
+    Args:
+        armazem (str): Diretório do armazém (criado se não existir)
+        edicao (int): Ano da edição da pesquisa
+        base (pd.DataFrame): Base salarial da edição, já tratada
+
+    Returns:
+        dict: Manifesto atualizado
+    """
+    manifesto = ler_manifesto(armazem) or {'versao': VERSAO_FORMATO, 'particoes': []}
+    lote = os.path.join(f'edicao={edicao}', format(time.time_ns(), 'x'))
+
+    base = base.assign(**{COLUNA_EDICAO: np.int16(edicao)})
+    novas = []
+    for regiao, grupo in base.groupby(COLUNA_PARTICAO, dropna=False, observed=True, sort=True):
+        regiao = None if pd.isna(regiao) else str(regiao)
+        diretorio = os.path.join(lote, f"regiao={regiao or '_'}")
+        snapshot.salvar_snapshot(grupo.reset_index(drop=True), os.path.join(armazem, diretorio))
+        novas.append({'edicao': int(edicao), 'regiao': regiao, 'diretorio': diretorio,
+                      'linhas': len(grupo), **_estatisticas(grupo)})
+
+    antigas = [particao for particao in manifesto['particoes'] if particao['edicao'] == edicao]
+    particoes = [particao for particao in manifesto['particoes'] if particao['edicao'] != edicao]
+    manifesto['particoes'] = sorted(particoes + novas,
+                                    key=lambda particao: (particao['edicao'], particao['diretorio']))
+
+    # Categorias de todas as edições, para que as partições lidas juntas
+    # tenham os mesmos tipos
+    categorias = {}
+    for particao in manifesto['particoes']:
+        for nome, valores in particao['valores'].items():
+            categorias.setdefault(nome, set()).update(valores)
+    manifesto['categorias'] = {nome: sorted(valores) for nome, valores in categorias.items()}
+
+    _gravar_manifesto(armazem, manifesto)
+
+    # Os lotes substituídos só são removidos depois da troca do manifesto
+    for lote_antigo in {os.path.dirname(particao['diretorio']) for particao in antigas}:
+        shutil.rmtree(os.path.join(armazem, lote_antigo), ignore_errors=True)
+    return manifesto
+
+
+def edicoes(manifesto):
+    # Edições presentes no armazém, em ordem crescente
+    return sorted({particao['edicao'] for particao in manifesto['particoes']})
+
+
+def selecionar(manifesto, edicoes=None, regioes=None, faixas=None, valores=None):
+    """
+    Escolhe as partições que podem conter linhas de um filtro.
+
+    Args:
+        manifesto (dict): Manifesto do armazém
+        edicoes (list): Edições aceitas (todas se None)
+        regioes (list): Regiões aceitas (todas se None)
+        faixas (dict): Coluna numérica -> (mínimo, máximo), limites inclusivos
+            que podem ser None
+        valores (dict): Coluna categórica -> valores aceitos
+
+    Returns:
+        list: Entradas do manifesto das partições selecionadas
+
+    Example:
+        >>> selecionar(manifesto, edicoes=[2023], faixas={'Idade': (25, 35)},
+        ...            valores={'Estados': ['Bahia (BA)']})
+    """
+    selecionadas = []
+    for particao in manifesto['particoes']:
+        if edicoes is not None and particao['edicao'] not in edicoes:
+            continue
+        if regioes is not None and particao['regiao'] not in regioes:
+            continue
+
+        tocada = True
+        for coluna, (minimo, maximo) in (faixas or {}).items():
+            menor, maior = particao['minimos'][coluna], particao['maximos'][coluna]
+            if menor is None or (minimo is not None and maior < minimo) \
+                    or (maximo is not None and menor > maximo):
+                tocada = False
+        for coluna, aceitos in (valores or {}).items():
+            if not set(aceitos) & set(particao['valores'][coluna]):
+                tocada = False
+
+        if tocada:
+            selecionadas.append(particao)
+    return selecionadas
+
+
+def abrir_selecao(selecao):
+    """
+    Lê as partições de uma seleção em um único DataFrame.
+
+    Args:
+        selecao (Selecao): Armazém e diretórios das partições
+
+    Returns:
+        pd.DataFrame: Linhas das partições, com as colunas categóricas usando
+        as categorias de todo o armazém (vazio, com as mesmas colunas, se a
+        seleção não tiver partições)
+    """
+    manifesto = ler_manifesto(selecao.armazem)
+    if manifesto is None or not manifesto['particoes']:
+        raise FileNotFoundError(f'Armazém de partições não encontrado em {selecao.armazem}')
+
+    diretorios = selecao.diretorios or [manifesto['particoes'][0]['diretorio']]
+    partes = []
+    for diretorio in diretorios:
+        parte = snapshot.abrir_snapshot(os.path.join(selecao.armazem, diretorio))
+        for nome, categorias in manifesto['categorias'].items():
+            parte[nome] = parte[nome].cat.set_categories(categorias)
+        partes.append(parte)
+
+    if not selecao.diretorios:
+        return partes[0].iloc[:0]
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes, ignore_index=True)
+
+
+def main():
+    # Grava uma edição no armazém da base salarial
+    from dados import ARMAZEM_SALARIOS, ARQUIVOS_DADOS, caminho_dados
+
+    parser = argparse.ArgumentParser(description='Grava uma edição no armazém particionado')
+    parser.add_argument('arquivo', nargs='?', default='base2.csv', help='CSV da edição')
+    parser.add_argument('--edicao', type=int, default=EDICAO_PADRAO, help='Ano da edição')
+    parser.add_argument('--armazem', default=ARMAZEM_SALARIOS, help='Diretório do armazém')
+    argumentos = parser.parse_args()
+
+    base = ARQUIVOS_DADOS['base2.csv'](caminho_dados(argumentos.arquivo))
+    manifesto = adicionar_edicao(argumentos.armazem, argumentos.edicao, base)
+    for particao in manifesto['particoes']:
+        print(f"{particao['edicao']} {particao['regiao']}: {particao['linhas']} linhas")
+
+
+if __name__ == '__main__':
+    main()
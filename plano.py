@@ -0,0 +1,135 @@
+"""
+Plano de Consulta Compartilhado por Execução
+============================================
+
+Uma execução da página salarial resume a mesma base filtrada várias vezes:
+tabela descritiva, densidades, boxplot, momentos dos testes e os valores de
+cada categoria comparada. Cada função recalculava as categorias da variável
+(``pd.Categorical``) e separava os grupos por conta própria.
+
+``PlanoConsulta`` faz essa passada uma única vez por (variável, filtros): os
+códigos das categorias e uma ordenação por (categoria, salário), de onde saem
+o tamanho de cada grupo, os momentos, os quartis e os valores de cada grupo.
+As estatísticas são calculadas sob demanda e guardadas no próprio plano, que
+a página cria a cada execução e repassa às funções de ``funcoes.py`` (ver
+``funcoes.plano_consulta``). Gráficos já em cache não chegam a usar o plano,
+e nesse caso a base nem é percorrida.
+"""
+
+# Imports necessários
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from densidade import densidades
+from grupos import ordenar_por_grupo, resumir_ordenados
+from medicao import trecho
+from testes import momentos_ordenados
+
+
+class PlanoConsulta:
+    """
+    Agrupamento do salário pelas categorias de uma variável, feito uma vez.
+
+    Attributes:
+        variavel (str): Variável de análise
+        ordem (list): Categorias, na ordem de exibição
+
+    Example:
+        >>> plano = PlanoConsulta('Cargo', base_filtrada, ajustar_ordem('Cargo'))
+        >>> plano.momentos.loc['Analista de BI', 'media']
+        >>> plano.valores_categoria('Cientista de dados')
+    """
+
+    def __init__(self, variavel, base, ordem):
+        self.variavel = variavel
+        self.ordem = list(ordem)
+        self._base = base
+
+    @cached_property
+    def _grupos(self):
+        # A única passada pela base: códigos das categorias e ordenação por
+        # (categoria, salário), guardando a posição original de cada valor
+        with trecho('plano'):
+            codigos = pd.Categorical(self._base[self.variavel], categories=self.ordem).codes
+            return ordenar_por_grupo(self._base['Salario'].to_numpy(), codigos,
+                                     len(self.ordem), posicoes=True)
+
+    @property
+    def limites(self):
+        # Início do segmento de cada categoria nos valores ordenados
+        return self._grupos[2]
+
+    @property
+    def n(self):
+        # Observações válidas de cada categoria
+        return np.diff(self.limites)
+
+    @cached_property
+    def momentos(self):
+        """
+        Momentos de cada categoria, no formato de ``funcoes.momentos_categorias``.
+
+        Returns:
+            pd.DataFrame: Uma linha por categoria com ``n``, ``media``,
+            ``variancia``, ``mediana``, ``media_abs`` e ``variancia_abs``
+        """
+        valores, codigos, limites, _ = self._grupos
+        return pd.DataFrame(momentos_ordenados(valores, codigos, limites),
+                            index=pd.Index(self.ordem, name=self.variavel))
+
+    @cached_property
+    def resumo_boxplot(self):
+        """
+        Quartis, bigodes, médias e outliers de cada categoria.
+
+        Returns:
+            ResumoBoxplot: Mesmo resultado de ``funcoes.resumo_boxplot``
+        """
+        valores, _, limites, _ = self._grupos
+        return resumir_ordenados(valores, limites, self.ordem)
+
+    @cached_property
+    def densidades(self):
+        """
+        Densidades de kernel de cada categoria numa grade comum.
+
+        Returns:
+            dict: Resultado de ``densidade.densidades``
+        """
+        valores, codigos, _, _ = self._grupos
+        return densidades(valores, codigos, len(self.ordem))
+
+    def valores_categoria(self, categoria):
+        """
+        Salários de uma categoria, na ordem em que aparecem na base.
+
+        Args:
+            categoria (str): Categoria da variável
+
+        Returns:
+            np.ndarray: Salários válidos da categoria (vazio se ela não estiver
+            entre as categorias do plano)
+        """
+        if categoria not in self.ordem:
+            return np.array([], dtype='float64')
+        i = self.ordem.index(categoria)
+        valores, _, limites, posicoes = self._grupos
+        segmento = slice(limites[i], limites[i + 1])
+        # A ordem original preserva o resultado das reamostragens com semente fixa
+        return valores[segmento][np.argsort(posicoes[segmento], kind='stable')]
+
+    def categorias_presentes(self):
+        """
+        Categorias com ao menos um salário válido.
+
+        Returns:
+            list: Categorias na ordem da primeira aparição na base
+        """
+        _, _, limites, posicoes = self._grupos
+        presentes = np.flatnonzero(np.diff(limites) > 0)
+        if not len(presentes):
+            return []
+        primeiras = np.minimum.reduceat(posicoes, limites[presentes])
+        return [self.ordem[i] for i in presentes[np.argsort(primeiras)]]
@@ -0,0 +1,215 @@
+"""
+Testes por Reamostragem
+=======================
+
+Teste de permutação e intervalo de confiança bootstrap para a diferença de
+médias ou de medianas entre dois grupos, sem supor normalidade. As reamostras
+são geradas em blocos e avaliadas como operações matriciais do NumPy (uma linha
+por reamostra). Quando os dados têm poucos valores distintos, como os salários
+quantificados em faixas, cada reamostra é representada apenas pelas contagens
+de cada valor, sorteadas diretamente (hipergeométrica multivariada nas
+permutações, multinomial no bootstrap), e o custo deixa de depender do tamanho
+dos grupos.
+
+Cada bloco tem sua própria semente, derivada da semente principal por
+``np.random.SeedSequence``, então o resultado é o mesmo com ou sem o pool de
+processos e independe do número de processos. Os blocos só são distribuídos
+entre processos quando o volume de trabalho compensa o custo de enviá-los.
+"""
+
+# Imports necessários
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Configuração padrão
+REAMOSTRAS = 10_000
+SEMENTE = 2023
+
+# Cada bloco tem até TAMANHO_BLOCO reamostras e até ELEMENTOS_BLOCO valores
+TAMANHO_BLOCO = 2_000
+ELEMENTOS_BLOCO = 4_000_000
+
+# Volume mínimo (reamostras x largura de cada reamostra) para usar o pool
+LIMITE_POOL = 20_000_000
+
+# Número máximo de valores distintos para reamostrar pelas contagens
+MAXIMO_DISTINTOS = 1024
+
+ESTATISTICAS = {'media': 'média', 'mediana': 'mediana'}
+
+_pool = None
+_trava = threading.Lock()
+
+
+def _obter_pool():
+    # Pool criado sob demanda e encerrado junto com o processo. Os processos
+    # são iniciados por 'spawn': o servidor do Streamlit tem várias threads, e
+    # um fork copiaria travas que outras threads podem estar segurando
+    global _pool
+    with _trava:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                        mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _diferenca(amostras1, amostras2, estatistica):
+    # Diferença da estatística entre os grupos, uma por linha
+    if estatistica == 'media':
+        return amostras1.mean(axis=1) - amostras2.mean(axis=1)
+    return np.median(amostras1, axis=1) - np.median(amostras2, axis=1)
+
+
+def _estatistica_contagens(valores, contagens, estatistica):
+    # Estatística de cada linha de contagens (vezes que cada valor aparece)
+    n = int(contagens[0].sum())
+    if estatistica == 'media':
+        return contagens @ valores / n
+
+    # Mediana pelas estatísticas de ordem (n - 1) // 2 e n // 2
+    acumuladas = np.cumsum(contagens, axis=1)
+    abaixo = valores[(acumuladas <= (n - 1) // 2).sum(axis=1)]
+    acima = valores[(acumuladas <= n // 2).sum(axis=1)]
+    return (abaixo + acima) / 2
+
+
+def _bloco_permutacao(x, y, estatistica, tamanho, semente):
+    rng = np.random.default_rng(semente)
+    combinados = np.concatenate([x, y])
+    permutados = rng.permuted(np.broadcast_to(combinados, (tamanho, len(combinados))), axis=1)
+    return _diferenca(permutados[:, :len(x)], permutados[:, len(x):], estatistica)
+
+
+def _bloco_bootstrap(x, y, estatistica, tamanho, semente):
+    rng = np.random.default_rng(semente)
+    amostras1 = x[rng.integers(0, len(x), size=(tamanho, len(x)))]
+    amostras2 = y[rng.integers(0, len(y), size=(tamanho, len(y)))]
+    return _diferenca(amostras1, amostras2, estatistica)
+
+
+def _bloco_permutacao_contagens(valores, contagens1, contagens2, estatistica, tamanho, semente):
+    # Uma permutação só muda quantas vezes cada valor cai no primeiro grupo,
+    # o que segue a distribuição hipergeométrica multivariada
+    rng = np.random.default_rng(semente)
+    total = contagens1 + contagens2
+    sorteio1 = rng.multivariate_hypergeometric(total, contagens1.sum(), size=tamanho)
+    sorteio2 = total - sorteio1
+    return (_estatistica_contagens(valores, sorteio1, estatistica)
+            - _estatistica_contagens(valores, sorteio2, estatistica))
+
+
+def _bloco_bootstrap_contagens(valores, contagens1, contagens2, estatistica, tamanho, semente):
+    # Reamostrar com reposição equivale a sortear as contagens (multinomial)
+    rng = np.random.default_rng(semente)
+    sorteio1 = rng.multinomial(contagens1.sum(), contagens1 / contagens1.sum(), size=tamanho)
+    sorteio2 = rng.multinomial(contagens2.sum(), contagens2 / contagens2.sum(), size=tamanho)
+    return (_estatistica_contagens(valores, sorteio1, estatistica)
+            - _estatistica_contagens(valores, sorteio2, estatistica))
+
+
+def _executar(funcao, argumentos, largura, reamostras, semente, processos):
+    # Divide as reamostras em blocos com sementes independentes; a divisão só
+    # depende do tamanho dos dados, o que mantém o resultado reprodutível
+    bloco = max(1, min(TAMANHO_BLOCO, ELEMENTOS_BLOCO // largura))
+    tamanhos = [bloco] * (reamostras // bloco)
+    if reamostras % bloco:
+        tamanhos.append(reamostras % bloco)
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [(*argumentos, t, s) for t, s in zip(tamanhos, sementes)]
+
+    if processos is None:
+        processos = reamostras * largura >= LIMITE_POOL
+    if processos and len(tarefas) > 1:
+        blocos = list(_obter_pool().map(funcao, *zip(*tarefas)))
+    else:
+        blocos = [funcao(*tarefa) for tarefa in tarefas]
+    return np.concatenate(blocos)
+
+
+def _reamostrar(bloco_valores, bloco_contagens, x, y, estatistica, reamostras, semente, processos):
+    # Com poucos valores distintos (salários em faixas), as reamostras são
+    # representadas pelas contagens de cada valor, em vez dos próprios valores
+    valores, codigos = np.unique(np.concatenate([x, y]), return_inverse=True)
+    if len(valores) <= MAXIMO_DISTINTOS and 2 * len(valores) <= len(x) + len(y):
+        contagens1 = np.bincount(codigos[:len(x)], minlength=len(valores))
+        contagens2 = np.bincount(codigos[len(x):], minlength=len(valores))
+        argumentos = (valores, contagens1, contagens2, estatistica)
+        return _executar(bloco_contagens, argumentos, len(valores), reamostras, semente, processos)
+
+    return _executar(bloco_valores, (x, y, estatistica), len(x) + len(y),
+                     reamostras, semente, processos)
+
+
+def _preparar(grupo1, grupo2, estatistica):
+    if estatistica not in ESTATISTICAS:
+        raise ValueError(f'Estatística desconhecida: {estatistica}')
+    x = np.asarray(grupo1, dtype='float64')
+    y = np.asarray(grupo2, dtype='float64')
+    x, y = x[~np.isnan(x)], y[~np.isnan(y)]
+    if len(x) == 0 or len(y) == 0:
+        raise ValueError('Os dois grupos precisam ter observações')
+    return x, y
+
+
+def teste_permutacao(grupo1, grupo2, estatistica='media', reamostras=REAMOSTRAS,
+                     semente=SEMENTE, processos=None):
+    """
+    Teste de permutação bilateral para a diferença entre dois grupos.
+
+    Args:
+        grupo1 (array): Valores do primeiro grupo
+        grupo2 (array): Valores do segundo grupo
+        estatistica (str): 'media' ou 'mediana'
+        reamostras (int): Número de permutações
+        semente (int): Semente do gerador (resultado reprodutível)
+        processos (bool | None): Usar o pool de processos; None decide pelo
+            volume de trabalho
+
+    Returns:
+        dict: ``diferenca`` observada e ``p_valor``
+
+    Example:
+        >>> teste_permutacao(salarios_a, salarios_b, 'mediana')['p_valor']
+    """
+    x, y = _preparar(grupo1, grupo2, estatistica)
+    observada = float(_diferenca(x[None, :], y[None, :], estatistica)[0])
+    diferencas = _reamostrar(_bloco_permutacao, _bloco_permutacao_contagens, x, y,
+                             estatistica, reamostras, semente, processos)
+
+    # Correção de +1 para que o p-valor nunca seja exatamente zero
+    extremos = np.count_nonzero(np.abs(diferencas) >= abs(observada) - 1e-12)
+    return {'diferenca': observada, 'p_valor': (extremos + 1) / (reamostras + 1)}
+
+
+def ic_bootstrap(grupo1, grupo2, estatistica='media', reamostras=REAMOSTRAS,
+                 nivel=0.95, semente=SEMENTE, processos=None):
+    """
+    Intervalo de confiança bootstrap (percentil) para a diferença entre grupos.
+
+    Args:
+        grupo1 (array): Valores do primeiro grupo
+        grupo2 (array): Valores do segundo grupo
+        estatistica (str): 'media' ou 'mediana'
+        reamostras (int): Número de reamostras bootstrap
+        nivel (float): Nível de confiança
+        semente (int): Semente do gerador (resultado reprodutível)
+        processos (bool | None): Usar o pool de processos; None decide pelo
+            volume de trabalho
+
+    Returns:
+        dict: ``diferenca`` observada, ``ic_inf`` e ``ic_sup``
+    """
+    x, y = _preparar(grupo1, grupo2, estatistica)
+    observada = float(_diferenca(x[None, :], y[None, :], estatistica)[0])
+    diferencas = _reamostrar(_bloco_bootstrap, _bloco_bootstrap_contagens, x, y,
+                             estatistica, reamostras, semente, processos)
+
+    alfa = (1 - nivel) / 2
+    ic_inf, ic_sup = np.quantile(diferencas, [alfa, 1 - alfa])
+    return {'diferenca': observada, 'ic_inf': float(ic_inf), 'ic_sup': float(ic_sup)}
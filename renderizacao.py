@@ -0,0 +1,361 @@
+"""
+Camada de Renderização de Gráficos
+==================================
+
+Os gráficos do dashboard são criados diretamente com ``matplotlib.figure.Figure``
+e o canvas Agg, sem passar pelo ``pyplot``. Assim as figuras não entram no
+registro global do pyplot, que só cresce quando as figuras não são fechadas e é
+compartilhado por todas as sessões do processo.
+
+Cada figura é liberada assim que é codificada em bytes (``codificar``). O módulo também mantém contadores de figuras criadas, liberadas e ainda
+vivas, e lê a memória residente do processo, para acompanhar o consumo de
+memória ao longo do tempo.
+
+As imagens enviadas às páginas são codificadas por ``codificar``, que escolhe o
+formato e a resolução de cada gráfico dentro de um orçamento de bytes
+(``ORCAMENTO_IMAGEM_KB``, padrão: 64 KB):
+
+- gráficos simples (poucos vértices e marcadores: barras, linhas, mapas de
+  calor) vão em SVG, que fica nítido em qualquer tela, se couber no orçamento;
+- gráficos densos (áreas preenchidas, muitos pontos) ou SVGs grandes demais vão
+  em PNG com paleta de 256 cores, na largura máxima que o ``st.image`` envia sem
+  recodificar, reduzida em etapas até caber no orçamento. A escala é escolhida
+  antes de desenhar, pelo tamanho da última imagem do mesmo gráfico, e cada
+  tentativa desenha a figura direto na resolução final.
+
+O ``st.image`` converte para PNG ou JPEG qualquer outro formato de imagem (como
+WebP) e redimensiona imagens mais largas que ``LARGURA_MAXIMA``, então esses
+são os formatos e a largura que chegam intactos ao navegador. O tamanho e o
+tempo das codificações de cada execução são somados ao registro da execução
+(ver ``medicao.acumular``).
+"""
+
+# Imports necessários
+import colorsys
+import io
+import os
+import sys
+import threading
+import time
+import weakref
+
+from importacao import importar_tardio
+from medicao import acumular, medido
+
+# O matplotlib só é importado quando um gráfico é de fato desenhado; com as
+# imagens em cache a página não precisa dele
+matplotlib = importar_tardio('matplotlib')
+figura = importar_tardio('matplotlib.figure')
+backend_agg = importar_tardio('matplotlib.backends.backend_agg')
+cores = importar_tardio('matplotlib.colors')
+imagem_pil = importar_tardio('PIL.Image')
+
+# Resolução máxima dos PNGs, a mesma usada pelo st.pyplot
+DPI_MAXIMO = 200
+
+# Largura acima da qual o st.image redimensiona (e recodifica) as imagens
+LARGURA_MAXIMA = 1460
+
+# Orçamento padrão de cada imagem codificada, em kilobytes
+ORCAMENTO_IMAGEM_PADRAO_KB = 64
+
+# Gráficos com até esse número de vértices e de marcadores desenhados são
+# candidatos a SVG (cada marcador vira um elemento próprio no SVG)
+LIMITE_VETORIAL = 5000
+LIMITE_MARCADORES = 100
+
+# Frações da largura tentadas, em ordem, até o PNG caber no orçamento
+ESCALAS_RASTER = (1.0, 0.8, 0.65, 0.5)
+
+# Contadores do processo
+_contadores = {'criadas': 0, 'liberadas': 0, 'vivas': 0}
+_trava = threading.Lock()
+
+# Bytes do PNG por pixel de largura na última codificação de cada gráfico
+_bytes_por_pixel = {}
+
+
+def _figura_coletada():
+    with _trava:
+        _contadores['vivas'] -= 1
+
+
+def criar_figura(figsize=(8, 6), **kwargs):
+    """
+    Cria uma figura com um único eixo, fora do registro do pyplot.
+
+    Args:
+        figsize (tuple): Tamanho da figura em polegadas
+        **kwargs: Argumentos repassados para ``Figure.subplots``
+
+    Returns:
+        tuple: Par (Figure, Axes)
+
+    Example:
+        >>> fig, ax = criar_figura(figsize=(8, 5))
+    """
+    fig = figura.Figure(figsize=figsize)
+    backend_agg.FigureCanvasAgg(fig)
+    ax = fig.subplots(**kwargs)
+
+    with _trava:
+        _contadores['criadas'] += 1
+        _contadores['vivas'] += 1
+    weakref.finalize(fig, _figura_coletada)
+
+    return fig, ax
+
+
+def paleta_cores(n_cores, saturacao=1.0):
+    """
+    Cores do ciclo padrão do matplotlib, como ``sns.color_palette``.
+
+    Evita importar o seaborn (e, com ele, o scipy) só para obter a paleta dos
+    gráficos da página inicial.
+
+    Args:
+        n_cores (int): Número de cores (o ciclo é repetido se necessário)
+        saturacao (float): Fração da saturação original, como ``sns.desaturate``
+
+    Returns:
+        list: Cores no formato (r, g, b)
+    """
+    ciclo = [cores.to_rgb(cor) for cor in matplotlib.rcParams['axes.prop_cycle'].by_key()['color']]
+    paleta = [ciclo[i % len(ciclo)] for i in range(n_cores)]
+    if saturacao == 1:
+        return paleta
+
+    def dessaturar(cor):
+        h, l, s = colorsys.rgb_to_hls(*cor)
+        return colorsys.hls_to_rgb(h, l, s * saturacao)
+
+    return [dessaturar(cor) for cor in paleta]
+
+
+def liberar(fig):
+    # Remove os artistas da figura imediatamente, sem esperar a coleta de lixo
+    if fig is None or getattr(fig, '_liberada', False):
+        return
+    fig.clear()
+    fig._liberada = True
+    with _trava:
+        _contadores['liberadas'] += 1
+
+
+def _orcamento_imagem():
+    try:
+        kilobytes = float(os.environ.get('ORCAMENTO_IMAGEM_KB', ORCAMENTO_IMAGEM_PADRAO_KB))
+    except ValueError:
+        kilobytes = ORCAMENTO_IMAGEM_PADRAO_KB
+    return int(kilobytes * 2 ** 10)
+
+
+def _eh_svg(imagem):
+    return imagem[:5] in (b'<?xml', b'<svg ')
+
+
+def bytes_enviados(imagem):
+    """
+    Calcula quantos bytes a imagem ocupa na mensagem enviada ao navegador.
+
+    O ``st.image`` envia o SVG embutido em base64 e as demais imagens como estão.
+
+    Args:
+        imagem (bytes): Imagem codificada
+
+    Returns:
+        int: Tamanho enviado, em bytes
+    """
+    if _eh_svg(imagem):
+        return 4 * -(-len(imagem) // 3)
+    return len(imagem)
+
+
+def _elementos(fig):
+    # Vértices (linhas, áreas, malhas e patches) e marcadores desenhados nos
+    # eixos; estimam o tamanho do gráfico em SVG
+    vertices = marcadores = 0
+    for ax in fig.axes:
+        for linha in ax.lines:
+            pontos = len(linha.get_xydata())
+            if linha.get_linestyle() not in ('None', ''):
+                vertices += pontos
+            if linha.get_marker() not in (None, 'None', '', ' '):
+                marcadores += pontos
+        for colecao in ax.collections:
+            vertices += sum(len(caminho.vertices) for caminho in colecao.get_paths())
+            if len(colecao.get_offsets()) > 1:
+                marcadores += len(colecao.get_offsets())
+        vertices += sum(len(patch.get_path().vertices) for patch in ax.patches)
+    return vertices, marcadores
+
+
+def _svg(fig):
+    # Textos como texto (não como curvas) e saída determinística
+    buffer = io.BytesIO()
+    with matplotlib.rc_context({'svg.fonttype': 'none', 'svg.hashsalt': 'grafico'}):
+        fig.savefig(buffer, format='svg', bbox_inches='tight', metadata={'Date': None})
+    return buffer.getvalue()
+
+
+def _caixa_justa(fig):
+    # Região da figura com todos os artistas e a margem do ``bbox_inches='tight'``,
+    # calculada uma única vez para todas as resoluções tentadas
+    caixa = fig.get_tightbbox(fig.canvas.get_renderer())
+    return caixa.padded(matplotlib.rcParams['savefig.pad_inches'])
+
+
+def _rgb(fig, caixa, dpi):
+    # Desenha a região da figura direto em RGBA, sem codificar e decodificar um PNG
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='raw', dpi=dpi, bbox_inches=caixa)
+    renderizador = fig.canvas.renderer
+    return imagem_pil.frombuffer('RGBA', (int(renderizador.width), int(renderizador.height)),
+                                 buffer.getbuffer(), 'raw', 'RGBA', 0, 1).convert('RGB')
+
+
+def _png_paleta(fig, orcamento, nome=None):
+    # Escolhe a escala antes de desenhar: a maior cujo tamanho previsto, pelos
+    # bytes por pixel de largura da última codificação do mesmo gráfico, cabe
+    # no orçamento. Se o PNG ainda passar do orçamento, a figura é desenhada de
+    # novo na escala seguinte (nunca reduzida depois de desenhada)
+    caixa = _caixa_justa(fig)
+    dpi_maximo = min(DPI_MAXIMO, LARGURA_MAXIMA / fig.get_size_inches()[0])
+    with _trava:
+        bytes_por_pixel = _bytes_por_pixel.get(nome)
+    escalas = list(ESCALAS_RASTER)
+    if bytes_por_pixel is not None:
+        while (len(escalas) > 1
+               and bytes_por_pixel * caixa.width * dpi_maximo * escalas[0] > orcamento):
+            escalas.pop(0)
+
+    for escala in escalas:
+        rgb = _rgb(fig, caixa, dpi_maximo * escala)
+        # A paleta é calculada em uma cópia reduzida, com as mesmas cores
+        # (o cálculo é a parte cara da quantização) e aplicada à imagem inteira
+        paleta = rgb.reduce(4).quantize(256, method=imagem_pil.Quantize.MAXCOVERAGE,
+                                        dither=imagem_pil.Dither.NONE)
+        quadro = rgb.quantize(palette=paleta, dither=imagem_pil.Dither.NONE)
+        saida = io.BytesIO()
+        quadro.save(saida, format='PNG', optimize=True)
+        imagem = saida.getvalue()
+        if len(imagem) <= orcamento:
+            break
+
+    if nome is not None:
+        with _trava:
+            _bytes_por_pixel[nome] = len(imagem) / quadro.width
+    return imagem
+
+
+@medido
+def codificar(fig, nome=None, orcamento=None):
+    """
+    Codifica a figura no formato e na resolução que cabem no orçamento e a
+    libera em seguida.
+
+    Args:
+        fig (Figure): Figura a codificar
+        nome (str): Nome do gráfico, usado para escolher a escala do PNG pelo
+            tamanho da sua última imagem
+        orcamento (int): Bytes enviados por imagem (padrão: ``ORCAMENTO_IMAGEM_KB``)
+
+    Returns:
+        bytes: Imagem SVG ou PNG; se nenhuma resolução couber no orçamento,
+        o PNG da menor delas
+
+    Example:
+        >>> imagem = codificar(boxplot('Cargo', base), 'boxplot')
+    """
+    orcamento = orcamento or _orcamento_imagem()
+    inicio = time.perf_counter()
+    try:
+        vertices, marcadores = _elementos(fig)
+        imagem = None
+        if vertices <= LIMITE_VETORIAL and marcadores <= LIMITE_MARCADORES:
+            imagem = _svg(fig)
+            if bytes_enviados(imagem) > orcamento:
+                imagem = None
+        if imagem is None:
+            imagem = _png_paleta(fig, orcamento, nome)
+    finally:
+        liberar(fig)
+
+    acumular(imagens_codificadas=1,
+             codificacao_ms=round((time.perf_counter() - inicio) * 1000, 3))
+    return imagem
+
+
+def exibir_imagem(imagem, container=None):
+    """
+    Exibe uma imagem já codificada com ``codificar``.
+
+    Args:
+        imagem (bytes): Imagem codificada
+        container: Container do Streamlit (a página, se None)
+    """
+    import streamlit as st
+
+    acumular(bytes_imagens=bytes_enviados(imagem))
+    if _eh_svg(imagem):
+        # O st.image só reconhece o SVG em texto; sem tamanho em pixels, ele
+        # ocupa a largura do container (width='stretch' exige Streamlit 1.49)
+        (container or st).image(imagem.decode('utf-8'), width='stretch')
+    else:
+        # As imagens são geradas com largura maior que a das colunas, então
+        # ocupam a largura do container assim como no st.pyplot
+        (container or st).image(imagem)
+
+
+def memoria_residente():
+    """
+    Retorna a memória residente (RSS) atual do processo, em bytes.
+
+    No Linux o valor vem de ``/proc/self/statm``; nos demais sistemas Unix é
+    usado o pico de memória informado por ``resource``.
+
+    Returns:
+        int: Memória residente em bytes (0 se não for possível medir)
+    """
+    try:
+        with open('/proc/self/statm') as arquivo:
+            paginas = int(arquivo.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No macOS o valor já vem em bytes; nos demais sistemas, em kilobytes
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def estatisticas():
+    """
+    Retorna os contadores de figuras e a memória do processo.
+
+    Returns:
+        dict: ``figuras_criadas``, ``figuras_liberadas``, ``figuras_vivas``,
+        ``figuras_pyplot`` (figuras abertas no registro do pyplot) e
+        ``rss_mb``
+
+    Example:
+        >>> estatisticas()['figuras_vivas']
+    """
+    with _trava:
+        contadores = dict(_contadores)
+
+    # O pyplot só é consultado se já tiver sido importado por alguém
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    abertas = len(pyplot.get_fignums()) if pyplot is not None else 0
+
+    return {
+        'figuras_criadas': contadores['criadas'],
+        'figuras_liberadas': contadores['liberadas'],
+        'figuras_vivas': contadores['vivas'],
+        'figuras_pyplot': abertas,
+        'rss_mb': round(memoria_residente() / 2 ** 20, 1),
+    }
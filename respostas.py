@@ -0,0 +1,77 @@
+"""
+Respostas de Múltipla Escolha em Bitsets
+========================================
+
+As bases do cientista de dados têm uma coluna por opção de resposta, com 1.0
+quando a opção foi marcada, 0.0 quando não foi e NaN para quem não respondeu à
+pergunta. Este módulo guarda essas tabelas como bitsets compactados: um vetor
+de bits por opção (um bit por respondente) e uma máscara com as linhas que
+responderam à pergunta.
+
+Cada opção ocupa ``n / 8`` bytes em vez de ``8 * n`` bytes da coluna em
+float64, e o total de marcações de uma opção é obtido por contagem de bits
+(``popcount``), sem percorrer valores em ponto flutuante.
+"""
+
+# Imports necessários
+import numpy as np
+import pandas as pd
+
+
+class RespostasMultiplas:
+    """
+    Tabela de respostas de múltipla escolha armazenada como bitsets.
+
+    Attributes:
+        colunas (list): Nomes das opções de resposta, na ordem da base
+        linhas (int): Número de linhas da base de origem
+        bits (np.ndarray): Matriz ``uint8`` (opções x bytes) com os bits marcados
+        mascara (np.ndarray): Vetor ``uint8`` com os bits das linhas que
+            responderam a pelo menos uma opção
+
+    Example:
+        >>> respostas = RespostasMultiplas.de_dataframe(base)
+        >>> respostas.totais(['Dashboards BI', 'Coleta e Limpeza'])
+    """
+
+    def __init__(self, colunas, linhas, bits, mascara):
+        self.colunas = list(colunas)
+        self.linhas = linhas
+        self.bits = bits
+        self.mascara = mascara
+
+        # Os totais de todas as opções são calculados uma única vez
+        self._totais = pd.Series(np.bitwise_count(bits).sum(axis=1, dtype=np.int64),
+                                 index=self.colunas)
+
+    @classmethod
+    def de_dataframe(cls, base):
+        """
+        Constrói os bitsets a partir de uma base com valores 0, 1 ou NaN.
+
+        Args:
+            base (pd.DataFrame): Uma coluna por opção de resposta
+
+        Returns:
+            RespostasMultiplas: Respostas compactadas
+        """
+        valores = base.to_numpy(dtype='float32')
+
+        # Os bits são compactados ao longo das linhas: uma linha de bits por opção
+        bits = np.packbits(valores.T == 1, axis=1)
+        mascara = np.packbits(~np.isnan(valores).all(axis=1))
+        return cls(base.columns, len(base), bits, mascara)
+
+    def totais(self, variaveis=None):
+        """
+        Retorna o número de marcações de cada opção.
+
+        Args:
+            variaveis (list): Opções desejadas (todas, se None)
+
+        Returns:
+            pd.Series: Total de marcações por opção, na ordem pedida
+        """
+        if variaveis is None:
+            return self._totais.copy()
+        return self._totais[list(variaveis)]
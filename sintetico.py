@@ -0,0 +1,425 @@
+"""
+Gerador de Dados Sintéticos para Testes de Carga
+================================================
+
+Aprende a estrutura das bases do dashboard e gera bases do mesmo formato, de
+qualquer tamanho, sem reproduzir respondentes reais:
+
+- Base salarial (``base2.csv``): as colunas categóricas (incluindo a idade e
+  os valores ausentes, tratados como uma categoria) seguem uma árvore de
+  Chow-Liu, a árvore de dependências entre pares de colunas com a maior
+  informação mútua total, amostrada de pai para filho. O salário é sorteado
+  condicionalmente a (Cargo, Carreira, Experiencia), recorrendo a
+  (Cargo, Experiencia), depois a Experiencia e por fim à distribuição geral
+  quando a combinação tem poucas observações.
+- Respostas do cientista de dados (``cientista_*.csv``): a fração de linhas
+  sem resposta é mantida e as marcações seguem uma mistura de distribuições de
+  Bernoulli ajustada por EM, que reproduz a coocorrência entre as opções,
+  junto com o número de opções marcadas em cada pergunta. As duas tabelas são
+  modeladas juntas, como as respostas de um mesmo respondente.
+
+As bases são geradas e gravadas em blocos, sem manter o conjunto inteiro em
+memória::
+
+    python sintetico.py --linhas 1000000 --destino sintetico/
+"""
+
+# Imports necessários
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from dados import caminho_dados
+
+# Colunas categóricas da base salarial modeladas pela árvore
+COLUNAS_ARVORE = ['Idade', 'Genero', 'Estados', 'Cargo', 'Carreira', 'Experiencia', 'Raça', 'Região']
+
+# Colunas que condicionam o salário, da mais para a menos específica
+CONDICIONANTES_SALARIO = [('Cargo', 'Carreira', 'Experiencia'), ('Cargo', 'Experiencia'),
+                          ('Experiencia',), ()]
+
+# Observações mínimas de uma combinação para usar sua distribuição de salários
+MINIMO_CELULA = 20
+
+# Componentes da mistura de Bernoulli e iterações do EM
+COMPONENTES = 12
+ITERACOES_EM = 100
+
+TAMANHO_BLOCO = 100_000
+
+
+def _codificar(serie):
+    # Códigos das categorias, com os valores ausentes como última categoria
+    categorias = pd.Categorical(serie)
+    codigos = categorias.codes.astype(np.int64)
+    valores = list(categorias.categories) + [np.nan]
+    codigos[codigos < 0] = len(valores) - 1
+    return codigos, valores
+
+
+def _acumuladas(contagens):
+    # Distribuições acumuladas de cada linha (linhas sem observações ficam uniformes)
+    contagens = np.asarray(contagens, dtype='float64')
+    totais = contagens.sum(axis=-1, keepdims=True)
+    probabilidades = np.where(totais > 0, contagens / np.where(totais > 0, totais, 1),
+                              1 / contagens.shape[-1])
+    return np.cumsum(probabilidades, axis=-1)
+
+
+def _sortear(acumuladas, rng):
+    # Um sorteio por linha de ``acumuladas`` (cada linha é uma distribuição)
+    u = rng.random(len(acumuladas))
+    return np.minimum((u[:, None] > acumuladas).sum(axis=1), acumuladas.shape[1] - 1)
+
+
+def _informacao_mutua(a, b, n_a, n_b):
+    conjunta = np.bincount(a * n_b + b, minlength=n_a * n_b).reshape(n_a, n_b) / len(a)
+    pa, pb = conjunta.sum(axis=1), conjunta.sum(axis=0)
+    positivos = conjunta > 0
+    return float((conjunta[positivos] * np.log(conjunta[positivos] / np.outer(pa, pb)[positivos])).sum())
+
+
+class ModeloSalarial:
+    """
+    Modelo gerador da base salarial.
+
+    Attributes:
+        colunas (list): Colunas da base de origem, na ordem do arquivo
+        valores (dict): Coluna -> valores de cada código (o último é NaN)
+        ordem (list): Colunas da árvore na ordem de amostragem
+        pais (dict): Coluna -> coluna pai na árvore (None para a raiz)
+        tabelas (dict): Coluna -> distribuições acumuladas (pai x valor)
+        salarios (np.ndarray): Distribuições acumuladas do salário para cada
+            combinação de (Cargo, Carreira, Experiencia)
+
+    Example:
+        >>> modelo = ModeloSalarial.ajustar(pd.read_csv('base2.csv', index_col=0))
+        >>> amostra = modelo.amostrar(10_000, np.random.default_rng(1))
+    """
+
+    def __init__(self, colunas, valores, ordem, pais, tabelas, salarios):
+        self.colunas = list(colunas)
+        self.valores = valores
+        self.ordem = ordem
+        self.pais = pais
+        self.tabelas = tabelas
+        self.salarios = salarios
+
+    @classmethod
+    def ajustar(cls, base):
+        """
+        Ajusta o modelo a uma base com o formato de ``base2.csv``.
+
+        Args:
+            base (pd.DataFrame): Base salarial lida do CSV (sem o índice)
+
+        Returns:
+            ModeloSalarial: Modelo ajustado
+        """
+        codigos, valores = {}, {}
+        for coluna in COLUNAS_ARVORE + ['Salario']:
+            codigos[coluna], valores[coluna] = _codificar(base[coluna])
+        tamanhos = {coluna: len(valores[coluna]) for coluna in valores}
+
+        # Árvore geradora máxima pela informação mútua entre pares (Prim)
+        ordem, pais = [COLUNAS_ARVORE[0]], {COLUNAS_ARVORE[0]: None}
+        restantes = COLUNAS_ARVORE[1:]
+        informacao = {(a, b): _informacao_mutua(codigos[a], codigos[b], tamanhos[a], tamanhos[b])
+                      for a in COLUNAS_ARVORE for b in COLUNAS_ARVORE if a != b}
+        while restantes:
+            pai, filho = max(((a, b) for a in ordem for b in restantes), key=informacao.get)
+            ordem.append(filho)
+            pais[filho] = pai
+            restantes.remove(filho)
+
+        # Distribuição da raiz e de cada coluna dado o valor do pai
+        tabelas = {}
+        for coluna in ordem:
+            pai = pais[coluna]
+            if pai is None:
+                contagens = np.bincount(codigos[coluna], minlength=tamanhos[coluna])[None, :]
+            else:
+                combinados = codigos[pai] * tamanhos[coluna] + codigos[coluna]
+                contagens = np.bincount(combinados, minlength=tamanhos[pai] * tamanhos[coluna])
+                contagens = contagens.reshape(tamanhos[pai], tamanhos[coluna])
+            tabelas[coluna] = _acumuladas(contagens)
+
+        salarios = cls._ajustar_salarios(codigos, tamanhos)
+        return cls(base.columns, valores, ordem, pais, tabelas, salarios)
+
+    @staticmethod
+    def _ajustar_salarios(codigos, tamanhos):
+        # Contagens dos salários em cada combinação dos condicionantes, do nível
+        # mais específico ao mais geral; cada combinação usa o primeiro nível em
+        # que tem observações suficientes
+        completos = CONDICIONANTES_SALARIO[0]
+        forma = tuple(tamanhos[coluna] for coluna in completos)
+        n_salarios = tamanhos['Salario']
+        escolhidas = np.zeros(forma + (n_salarios,))
+        definidas = np.zeros(forma, dtype=bool)
+
+        for condicionantes in CONDICIONANTES_SALARIO:
+            eixos = [completos.index(coluna) for coluna in condicionantes]
+            forma_nivel = tuple(forma[eixo] for eixo in eixos)
+            if condicionantes:
+                chave = np.ravel_multi_index([codigos[coluna] for coluna in condicionantes], forma_nivel)
+            else:
+                chave = np.zeros(len(codigos['Salario']), dtype=np.int64)
+            celulas = int(np.prod(forma_nivel))
+            contagens = np.bincount(chave * n_salarios + codigos['Salario'],
+                                    minlength=celulas * n_salarios).reshape(forma_nivel + (n_salarios,))
+
+            # Expande as contagens do nível para todas as combinações completas
+            expandidas = contagens.reshape(tuple(forma[e] if e in eixos else 1 for e in range(len(forma)))
+                                           + (n_salarios,))
+            expandidas = np.broadcast_to(expandidas, forma + (n_salarios,))
+            suficientes = (expandidas.sum(axis=-1) >= MINIMO_CELULA) | (len(condicionantes) == 0)
+            novas = suficientes & ~definidas
+            escolhidas[novas] = expandidas[novas]
+            definidas |= novas
+
+        return _acumuladas(escolhidas)
+
+    def amostrar(self, linhas, rng):
+        """
+        Gera linhas sintéticas com as mesmas colunas da base de origem.
+
+        Args:
+            linhas (int): Número de linhas
+            rng (np.random.Generator): Gerador de números aleatórios
+
+        Returns:
+            pd.DataFrame: Base sintética (sem as colunas de índice da origem)
+        """
+        codigos = {}
+        for coluna in self.ordem:
+            pai = self.pais[coluna]
+            tabela = self.tabelas[coluna]
+            linhas_tabela = np.zeros(linhas, dtype=np.int64) if pai is None else codigos[pai]
+            codigos[coluna] = _sortear(tabela[linhas_tabela], rng)
+
+        celula = tuple(codigos[coluna] for coluna in CONDICIONANTES_SALARIO[0])
+        codigos['Salario'] = _sortear(self.salarios[celula], rng)
+
+        dados = {}
+        for coluna in self.colunas:
+            if coluna in codigos:
+                valores = np.array(self.valores[coluna], dtype=object)
+                serie = pd.Series(valores[codigos[coluna]])
+                if coluna in ('Idade', 'Salario'):
+                    serie = serie.astype('float64')
+                dados[coluna] = serie
+        return pd.DataFrame(dados)[[coluna for coluna in self.colunas if coluna in dados]]
+
+
+class ModeloRespostas:
+    """
+    Modelo gerador das respostas de múltipla escolha.
+
+    Cada linha pertence a um componente de uma mistura de Bernoulli. Dentro do
+    componente, o número de opções marcadas em cada grupo de colunas (cada
+    pergunta) segue a distribuição observada, e as opções são escolhidas sem
+    reposição com peso proporcional às chances de marcação do componente. Assim
+    perguntas com limite de marcações (como "escolha até duas") são
+    respeitadas.
+
+    Attributes:
+        colunas (pd.Index): Opções de resposta (colunas da tabela de origem)
+        grupos (list): Posições das colunas de cada pergunta
+        taxa_resposta (float): Fração de linhas que responderam à pergunta
+        pesos (np.ndarray): Peso de cada componente da mistura
+        probabilidades (np.ndarray): Probabilidade de marcação de cada opção
+            em cada componente (componentes x opções)
+        marcacoes (list): Por grupo, distribuições acumuladas do número de
+            opções marcadas em cada componente
+    """
+
+    def __init__(self, colunas, grupos, taxa_resposta, pesos, probabilidades, marcacoes):
+        self.colunas = colunas
+        self.grupos = grupos
+        self.taxa_resposta = taxa_resposta
+        self.pesos = pesos
+        self.probabilidades = probabilidades
+        self.marcacoes = marcacoes
+
+    @classmethod
+    def ajustar(cls, tabela, componentes=COMPONENTES, iteracoes=ITERACOES_EM, semente=0):
+        """
+        Ajusta a mistura às linhas que responderam à pergunta.
+
+        Args:
+            tabela (pd.DataFrame): Uma coluna por opção, com 0, 1 ou NaN. Com
+                colunas em dois níveis (``pd.concat`` de várias tabelas), cada
+                tabela é tratada como uma pergunta
+            componentes (int): Número de componentes da mistura
+            iteracoes (int): Iterações do algoritmo EM
+            semente (int): Semente da inicialização
+
+        Returns:
+            ModeloRespostas: Modelo ajustado
+        """
+        valores = tabela.to_numpy(dtype='float64')
+        respondentes = ~np.isnan(valores).all(axis=1)
+        x = np.nan_to_num(valores[respondentes])
+
+        if isinstance(tabela.columns, pd.MultiIndex):
+            perguntas = tabela.columns.get_level_values(0)
+            grupos = [np.flatnonzero(perguntas == nome) for nome in perguntas.unique()]
+        else:
+            grupos = [np.arange(tabela.shape[1])]
+
+        rng = np.random.default_rng(semente)
+        responsabilidades = rng.dirichlet(np.ones(componentes), size=len(x))
+        for _ in range(iteracoes):
+            # Passo M: pesos e probabilidades (suavizadas) de cada componente
+            totais = responsabilidades.sum(axis=0)
+            pesos = totais / totais.sum()
+            probabilidades = (responsabilidades.T @ x + 0.5) / (totais[:, None] + 1)
+
+            # Passo E: responsabilidades pela verossimilhança em escala log
+            with np.errstate(divide='ignore'):
+                log_veross = (x @ np.log(probabilidades).T + (1 - x) @ np.log1p(-probabilidades).T
+                              + np.log(pesos))
+            log_veross -= log_veross.max(axis=1, keepdims=True)
+            responsabilidades = np.exp(log_veross)
+            responsabilidades /= responsabilidades.sum(axis=1, keepdims=True)
+
+        # Número de opções marcadas em cada pergunta, por componente
+        marcacoes = []
+        for grupo in grupos:
+            quantidades = x[:, grupo].sum(axis=1).astype(np.int64)
+            indicadoras = np.eye(len(grupo) + 1)[quantidades]
+            marcacoes.append(_acumuladas(responsabilidades.T @ indicadoras))
+
+        return cls(tabela.columns, grupos, float(respondentes.mean()), pesos,
+                   probabilidades, marcacoes)
+
+    def amostrar(self, linhas, rng):
+        """
+        Gera respostas sintéticas.
+
+        Args:
+            linhas (int): Número de linhas
+            rng (np.random.Generator): Gerador de números aleatórios
+
+        Returns:
+            pd.DataFrame: Uma coluna por opção, com 0.0, 1.0 ou NaN
+        """
+        componente = rng.choice(len(self.pesos), size=linhas, p=self.pesos)
+        chances = np.log(self.probabilidades) - np.log1p(-self.probabilidades)
+        valores = np.zeros((linhas, len(self.colunas)))
+
+        for grupo, acumuladas in zip(self.grupos, self.marcacoes):
+            quantidade = _sortear(acumuladas[componente], rng)
+
+            # Sorteio sem reposição pelo método de Gumbel: as ``quantidade``
+            # maiores chaves de cada linha são as opções marcadas
+            chaves = chances[componente][:, grupo] + rng.gumbel(size=(linhas, len(grupo)))
+            posicoes = np.argsort(np.argsort(-chaves, axis=1), axis=1)
+            valores[:, grupo] = posicoes < quantidade[:, None]
+
+        valores[rng.random(linhas) >= self.taxa_resposta] = np.nan
+        return pd.DataFrame(valores, columns=self.colunas)
+
+
+def gerar_em_blocos(modelo, linhas, tamanho_bloco=TAMANHO_BLOCO, semente=0):
+    """
+    Gera a base sintética em blocos, sem manter o total em memória.
+
+    Args:
+        modelo (ModeloSalarial | ModeloRespostas): Modelo ajustado
+        linhas (int): Total de linhas
+        tamanho_bloco (int): Linhas por bloco
+        semente (int): Semente do gerador (cada bloco recebe uma semente
+            derivada)
+
+    Yields:
+        pd.DataFrame: Blocos com índice contínuo a partir de 0
+    """
+    n_blocos = -(-linhas // tamanho_bloco)
+    for i, semente_bloco in enumerate(np.random.SeedSequence(semente).spawn(n_blocos)):
+        inicio = i * tamanho_bloco
+        tamanho = min(tamanho_bloco, linhas - inicio)
+        bloco = modelo.amostrar(tamanho, np.random.default_rng(semente_bloco))
+        bloco.index = pd.RangeIndex(inicio, inicio + tamanho)
+        yield bloco
+
+
+def gravar_csv(blocos, caminho, colunas_indice=()):
+    """
+    Grava os blocos em um CSV no formato dos arquivos originais.
+
+    Args:
+        blocos (iterable): Blocos de ``gerar_em_blocos``
+        caminho (str): Arquivo de destino
+        colunas_indice (tuple): Colunas da origem que repetem o número da
+            linha (como ``Unnamed: 0`` em ``base2.csv``)
+
+    Returns:
+        int: Número de linhas gravadas
+    """
+    total = 0
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        for i, bloco in enumerate(blocos):
+            for posicao, coluna in enumerate(colunas_indice):
+                bloco.insert(posicao, coluna, bloco.index.to_numpy())
+            bloco.to_csv(arquivo, header=(i == 0), index=True)
+            total += len(bloco)
+    return total
+
+
+def gerar_bases(destino, linhas, tamanho_bloco=TAMANHO_BLOCO, semente=0):
+    """
+    Ajusta os modelos às bases do projeto e grava as versões sintéticas.
+
+    Args:
+        destino (str): Diretório de destino (criado se não existir)
+        linhas (int): Linhas de cada base sintética
+        tamanho_bloco (int): Linhas geradas por bloco
+        semente (int): Semente do gerador
+
+    Returns:
+        dict: Arquivo gravado -> número de linhas
+    """
+    os.makedirs(destino, exist_ok=True)
+    gravados = {}
+
+    base = pd.read_csv(caminho_dados('base2.csv'), index_col=0)
+    colunas_indice = tuple(coluna for coluna in base.columns if coluna.startswith('Unnamed'))
+    modelo = ModeloSalarial.ajustar(base.drop(columns=list(colunas_indice)))
+    caminho = os.path.join(destino, 'base2.csv')
+    gravados[caminho] = gravar_csv(gerar_em_blocos(modelo, linhas, tamanho_bloco, semente),
+                                   caminho, colunas_indice)
+
+    # As duas tabelas do cientista são geradas juntas (as colunas ficam
+    # identificadas pelo arquivo, pois há opções com o mesmo nome nas duas) e
+    # separadas na gravação
+    tabelas = {nome: pd.read_csv(caminho_dados(nome), index_col=0)
+               for nome in ('cientista_a-c.csv', 'cientista_d.csv')}
+    respostas = ModeloRespostas.ajustar(pd.concat(tabelas, axis=1), semente=semente)
+    for nome in tabelas:
+        caminho = os.path.join(destino, nome)
+        blocos = (bloco[nome] for bloco in
+                  gerar_em_blocos(respostas, linhas, tamanho_bloco, semente + 1))
+        gravados[caminho] = gravar_csv(blocos, caminho)
+
+    return gravados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera bases sintéticas no formato das originais')
+    parser.add_argument('--linhas', type=int, required=True, help='Linhas de cada base')
+    parser.add_argument('--destino', default='sintetico', help='Diretório de destino')
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help='Linhas por bloco')
+    parser.add_argument('--semente', type=int, default=0)
+    argumentos = parser.parse_args()
+
+    gravados = gerar_bases(argumentos.destino, argumentos.linhas, argumentos.bloco, argumentos.semente)
+    for caminho, total in gravados.items():
+        print(f'{caminho}: {total} linhas')
+
+
+if __name__ == '__main__':
+    main()
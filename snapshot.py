@@ -0,0 +1,251 @@
+"""
+Snapshot Colunar das Bases de Dados
+===================================
+
+Este módulo converte as bases em CSV para um formato binário colunar: um
+arquivo ``.npy`` por coluna e um ``manifesto.json`` com os tipos, as categorias
+e a assinatura do CSV de origem. Na leitura os arquivos são mapeados em memória
+(``mmap``), então abrir um snapshot não envolve análise de texto nem cópia dos
+dados, independentemente do tamanho da base.
+
+Colunas numéricas são gravadas com o próprio dtype. Colunas categóricas são
+gravadas como códigos inteiros, com as categorias guardadas no manifesto.
+
+Cada gravação vai para um lote novo (``lote=<id>/``) e só então o manifesto é
+trocado para apontar para ele. Os arquivos de um lote nunca são reescritos:
+um servidor com as colunas antigas mapeadas continua lendo-as até reabrir o
+snapshot, e os lotes substituídos são apenas removidos do diretório (o que
+não invalida os mapeamentos abertos).
+
+Uso como etapa de build (gera os snapshots de todas as bases do projeto):
+
+    python snapshot.py
+"""
+
+# Imports necessários
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Diretório onde ficam os snapshots, relativo ao diretório do CSV de origem
+PASTA_SNAPSHOT = 'snapshot'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+VERSAO_FORMATO = 1
+
+# Cache dos manifestos já lidos: caminho -> (assinatura do arquivo, manifesto)
+_manifestos = {}
+_trava = threading.Lock()
+
+
+def diretorio_snapshot(caminho_csv):
+    """
+    Retorna o diretório do snapshot correspondente a um arquivo CSV.
+
+    Args:
+        caminho_csv (str): Caminho do arquivo CSV de origem
+
+    Returns:
+        str: Diretório ``snapshot/<nome do arquivo sem extensão>`` ao lado do CSV
+    """
+    pasta, arquivo = os.path.split(os.path.abspath(caminho_csv))
+    nome = os.path.splitext(arquivo)[0]
+    return os.path.join(pasta, PASTA_SNAPSHOT, nome)
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return (info.st_mtime_ns, info.st_size)
+
+
+def ler_manifesto(diretorio):
+    """
+    Lê o manifesto de um snapshot, reaproveitando a leitura anterior se o
+    arquivo não mudou.
+
+    Args:
+        diretorio (str): Diretório do snapshot
+
+    Returns:
+        dict | None: Manifesto, ou None se o snapshot não existir
+    """
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    try:
+        assinatura = _assinatura(caminho)
+    except FileNotFoundError:
+        return None
+
+    with _trava:
+        em_cache = _manifestos.get(caminho)
+        if em_cache is not None and em_cache[0] == assinatura:
+            return em_cache[1]
+
+        with open(caminho, encoding='utf-8') as arquivo:
+            manifesto = json.load(arquivo)
+        _manifestos[caminho] = (assinatura, manifesto)
+        return manifesto
+
+
+def snapshot_valido(caminho_csv):
+    """
+    Verifica se existe um snapshot atualizado para o arquivo CSV.
+
+    O snapshot é considerado válido quando a assinatura (data de modificação e
+    tamanho) registrada no manifesto é igual à do CSV atual. Se o CSV não
+    existir, o snapshot é usado como está.
+
+    Args:
+        caminho_csv (str): Caminho do arquivo CSV de origem
+
+    Returns:
+        tuple | None: Par (diretório, assinatura do manifesto) se o snapshot
+        puder ser usado, ou None caso contrário
+    """
+    diretorio = diretorio_snapshot(caminho_csv)
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is None or manifesto.get('versao') != VERSAO_FORMATO:
+        return None
+
+    if os.path.exists(caminho_csv):
+        if list(_assinatura(caminho_csv)) != manifesto['assinatura_origem']:
+            return None
+
+    return diretorio, _assinatura(os.path.join(diretorio, ARQUIVO_MANIFESTO))
+
+
+def salvar_snapshot(base, diretorio, caminho_origem=None):
+    """
+    Grava um DataFrame no formato colunar.
+
+    Args:
+        base (pd.DataFrame): Dados a gravar (colunas numéricas ou categóricas)
+        diretorio (str): Diretório de destino (criado se não existir)
+        caminho_origem (str): CSV de origem, cuja assinatura é registrada
+
+    Returns:
+        dict: Manifesto gravado
+    """
+    # Lote novo a cada gravação: arquivos possivelmente mapeados por outros
+    # processos nunca são truncados nem sobrescritos
+    lote = 'lote=' + format(time.time_ns(), 'x')
+    pasta_lote = os.path.join(diretorio, lote)
+    os.makedirs(pasta_lote)
+
+    colunas = []
+    for posicao, nome in enumerate(base.columns):
+        serie = base[nome]
+        arquivo = f'{posicao:03d}.npy'
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(pasta_lote, arquivo), serie.cat.codes.to_numpy())
+            colunas.append({'nome': nome, 'tipo': 'categoria', 'arquivo': arquivo,
+                            'categorias': serie.cat.categories.tolist()})
+        else:
+            np.save(os.path.join(pasta_lote, arquivo), serie.to_numpy())
+            colunas.append({'nome': nome, 'tipo': 'numerico', 'arquivo': arquivo})
+
+    # O índice só é gravado quando não é a numeração padrão 0..n-1
+    indice = None
+    if not base.index.equals(pd.RangeIndex(len(base))):
+        indice = 'indice.npy'
+        np.save(os.path.join(pasta_lote, indice), base.index.to_numpy())
+
+    manifesto = {
+        'versao': VERSAO_FORMATO,
+        'lote': lote,
+        'linhas': len(base),
+        'indice': indice,
+        'colunas': colunas,
+        'assinatura_origem': list(_assinatura(caminho_origem)) if caminho_origem else None,
+    }
+
+    # O manifesto é escrito por último e de forma atômica, para que um leitor
+    # nunca encontre um snapshot incompleto
+    temporario = os.path.join(diretorio, ARQUIVO_MANIFESTO + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, os.path.join(diretorio, ARQUIVO_MANIFESTO))
+
+    # Lotes substituídos (e colunas do formato sem lote) só são removidos
+    # depois da troca do manifesto
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if nome.startswith('lote=') and nome != lote:
+            shutil.rmtree(caminho, ignore_errors=True)
+        elif nome.endswith('.npy'):
+            os.remove(caminho)
+
+    return manifesto
+
+
+def pasta_colunas(diretorio, manifesto):
+    """
+    Localiza os arquivos de coluna da versão atual de um snapshot.
+
+    Args:
+        diretorio (str): Diretório do snapshot
+        manifesto (dict): Manifesto lido com ``ler_manifesto``
+
+    Returns:
+        str: Pasta do lote do manifesto, onde estão os ``.npy`` listados nele
+
+    Example:
+        >>> manifesto = ler_manifesto('snapshot/base2')
+        >>> os.path.join(pasta_colunas('snapshot/base2', manifesto), '000.npy')
+    """
+    # Snapshots gravados antes dos lotes têm as colunas no próprio diretório
+    return os.path.join(diretorio, manifesto.get('lote') or '')
+
+
+def abrir_snapshot(diretorio):
+    """
+    Abre um snapshot mapeando as colunas em memória, sem copiar os dados.
+
+    Args:
+        diretorio (str): Diretório do snapshot
+
+    Returns:
+        pd.DataFrame: Dados do snapshot (somente leitura)
+
+    Example:
+        >>> base = abrir_snapshot('snapshot/base2')
+    """
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is None:
+        raise FileNotFoundError(f'Snapshot não encontrado em {diretorio}')
+
+    pasta_lote = pasta_colunas(diretorio, manifesto)
+
+    dados = {}
+    for coluna in manifesto['colunas']:
+        valores = np.load(os.path.join(pasta_lote, coluna['arquivo']), mmap_mode='r')
+        if coluna['tipo'] == 'categoria':
+            dtype = pd.CategoricalDtype(coluna['categorias'])
+            dados[coluna['nome']] = pd.Categorical.from_codes(valores, dtype=dtype)
+        else:
+            dados[coluna['nome']] = valores
+
+    indice = None
+    if manifesto['indice']:
+        indice = np.load(os.path.join(pasta_lote, manifesto['indice']), mmap_mode='r')
+
+    return pd.DataFrame(dados, index=indice, copy=False)
+
+
+def main():
+    # Gera os snapshots de todas as bases usadas pelo dashboard
+    from dados import ARQUIVOS_DADOS, caminho_dados
+
+    for nome, leitor in ARQUIVOS_DADOS.items():
+        caminho = caminho_dados(nome)
+        base = leitor(caminho)
+        diretorio = diretorio_snapshot(caminho)
+        salvar_snapshot(base, diretorio, caminho)
+        print(f'{nome}: {len(base)} linhas x {base.shape[1]} colunas -> {diretorio}')
+
+
+if __name__ == '__main__':
+    main()
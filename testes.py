@@ -0,0 +1,287 @@
+"""
+Testes de Hipóteses entre Pares de Categorias
+=============================================
+
+Compara as médias salariais de pares de categorias de uma variável a partir
+de estatísticas suficientes de cada grupo. Cada grupo é resumido uma única vez
+(tamanho, média, variância e os momentos dos desvios absolutos em relação à
+mediana, usados no teste de Levene) e qualquer par, ou todos os pares de forma
+vetorizada, é avaliado a partir desses resumos, sem voltar às linhas da base.
+
+Como em ``hipoteses``, o teste de Levene decide entre o teste t de Student
+(variâncias iguais) e o de Welch. Os p-valores podem ser corrigidos para
+comparações múltiplas pelos métodos de Holm ou de Benjamini-Hochberg.
+"""
+
+# Imports necessários
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from importacao import importar_tardio
+
+# scipy.stats só é importado quando um teste é de fato executado
+stats = importar_tardio('scipy.stats')
+
+# Tamanho mínimo de cada grupo para que o par seja testado (como em hipoteses)
+MINIMO_GRUPO = 10
+
+# Métodos de correção disponíveis
+CORRECOES = {'holm': 'Holm', 'bh': 'Benjamini-Hochberg'}
+
+
+def momentos_ordenados(valores, codigos, limites):
+    """
+    Resume cada grupo pelos momentos usados nos testes de duas amostras, a
+    partir de valores já ordenados por grupo.
+
+    Args:
+        valores (np.ndarray): Valores ordenados por ``grupos.ordenar_por_grupo``
+        codigos (np.ndarray): Códigos ordenados correspondentes
+        limites (np.ndarray): Início do segmento de cada categoria
+
+    Returns:
+        dict: Vetores (um valor por categoria) ``n``, ``media``, ``variancia``
+        (amostral), ``mediana``, ``media_abs`` e ``variancia_abs`` (média e
+        variância amostral de ``|x - mediana|``)
+
+    Example:
+        >>> momentos_ordenados(*ordenar_por_grupo(valores, codigos, n_categorias))
+    """
+    n_categorias = len(limites) - 1
+    n = np.diff(limites)
+
+    # Mediana de cada segmento ordenado
+    inicio = limites[:-1]
+    meio = inicio + (n - 1) // 2
+    mediana = np.full(n_categorias, np.nan)
+    presentes = n > 0
+    mediana[presentes] = (valores[meio[presentes]] + valores[(inicio + n // 2)[presentes]]) / 2
+
+    def media_variancia(x):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.bincount(codigos, weights=x, minlength=n_categorias) / n
+            desvios = (x - media[codigos]) ** 2
+            variancia = np.bincount(codigos, weights=desvios, minlength=n_categorias) / (n - 1)
+        # Sem a correção, um grupo vazio teria variância -0.0 (0 / -1); como no
+        # var_samp do SQL, a variância só existe a partir de duas observações
+        variancia[n < 2] = np.nan
+        return media, variancia
+
+    media, variancia = media_variancia(valores)
+    media_abs, variancia_abs = media_variancia(np.abs(valores - mediana[codigos]))
+
+    return {'n': n, 'media': media, 'variancia': variancia, 'mediana': mediana,
+            'media_abs': media_abs, 'variancia_abs': variancia_abs}
+
+
+def levene_de_momentos(n1, media_abs1, var_abs1, n2, media_abs2, var_abs2):
+    """
+    Teste de Levene (centrado na mediana) para dois grupos a partir dos
+    momentos dos desvios absolutos. Aceita vetores para testar vários pares.
+
+    Returns:
+        np.ndarray: p-valor de cada par
+    """
+    n1, n2 = np.asarray(n1, dtype='float64'), np.asarray(n2, dtype='float64')
+    total = n1 + n2
+    media_geral = (n1 * media_abs1 + n2 * media_abs2) / total
+    entre = n1 * (media_abs1 - media_geral) ** 2 + n2 * (media_abs2 - media_geral) ** 2
+    dentro = (n1 - 1) * var_abs1 + (n2 - 1) * var_abs2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estatistica = (total - 2) * entre / dentro
+    return stats.f.sf(estatistica, 1, total - 2)
+
+
+def teste_de_momentos(grupo1, grupo2):
+    """
+    Teste t de duas amostras a partir dos momentos dos grupos.
+
+    O teste de Levene decide entre o teste de Student (variâncias iguais) e o de
+    Welch. Aceita linhas de ``PlanoConsulta.momentos`` ou vetores de pares.
+
+    Args:
+        grupo1: Momentos do primeiro grupo (``n``, ``media``, ``variancia``,
+            ``media_abs``, ``variancia_abs``)
+        grupo2: Momentos do segundo grupo
+
+    Returns:
+        dict: ``p_levene``, ``iguais`` (True quando foi usado o teste de
+        Student) e ``p_valor``
+    """
+    p_levene = levene_de_momentos(
+        grupo1['n'], grupo1['media_abs'], grupo1['variancia_abs'],
+        grupo2['n'], grupo2['media_abs'], grupo2['variancia_abs'])
+    iguais = p_levene > 0.05
+
+    argumentos = (grupo1['media'], np.sqrt(grupo1['variancia']), grupo1['n'],
+                  grupo2['media'], np.sqrt(grupo2['variancia']), grupo2['n'])
+    p_student = stats.ttest_ind_from_stats(*argumentos, equal_var=True).pvalue
+    p_welch = stats.ttest_ind_from_stats(*argumentos, equal_var=False).pvalue
+
+    return {'p_levene': p_levene, 'iguais': iguais,
+            'p_valor': np.where(iguais, p_student, p_welch)}
+
+
+def corrigir_pvalores(p_valores, metodo='holm'):
+    """
+    Ajusta p-valores para comparações múltiplas.
+
+    Args:
+        p_valores (np.ndarray): p-valores (NaN são ignorados)
+        metodo (str): 'holm' ou 'bh' (Benjamini-Hochberg)
+
+    Returns:
+        np.ndarray: p-valores ajustados, na mesma ordem
+    """
+    p_valores = np.asarray(p_valores, dtype='float64')
+    ajustados = np.full_like(p_valores, np.nan)
+    validos = np.flatnonzero(~np.isnan(p_valores))
+    m = len(validos)
+    if m == 0:
+        return ajustados
+
+    ordem = np.argsort(p_valores[validos])
+    ordenados = p_valores[validos][ordem]
+    if metodo == 'holm':
+        corrigidos = np.maximum.accumulate((m - np.arange(m)) * ordenados)
+    elif metodo == 'bh':
+        corrigidos = np.minimum.accumulate((m / np.arange(m, 0, -1)) * ordenados[::-1])[::-1]
+    else:
+        raise ValueError(f'Método de correção desconhecido: {metodo}')
+
+    ajustados[validos[ordem]] = np.minimum(corrigidos, 1)
+    return ajustados
+
+
+class MatrizTestes:
+    """
+    Resultado dos testes de todos os pares de categorias de uma variável.
+
+    Attributes:
+        variavel (str): Variável de análise
+        correcao (str): Método de correção usado em ``p_ajustado``
+        grupos (pd.DataFrame): Momentos de cada categoria
+        pares (pd.DataFrame): Uma linha por par, com ``p_levene``, ``metodo``,
+            ``p_valor``, ``p_ajustado`` e ``efeito`` (g de Hedges)
+    """
+
+    def __init__(self, variavel, correcao, grupos, pares):
+        self.variavel = variavel
+        self.correcao = correcao
+        self.grupos = grupos
+        self.pares = pares
+
+    def par(self, categoria1, categoria2):
+        """
+        Consulta o resultado de um par, em qualquer ordem.
+
+        Returns:
+            pd.Series | None: Linha do par, ou None se o par não foi testado
+        """
+        for chave in ((categoria1, categoria2), (categoria2, categoria1)):
+            if chave in self.pares.index:
+                return self.pares.loc[chave]
+        return None
+
+    def matriz(self, coluna='p_ajustado'):
+        """
+        Organiza uma coluna de ``pares`` como matriz simétrica categoria x categoria.
+
+        Args:
+            coluna (str): Coluna de ``pares`` a organizar
+
+        Returns:
+            pd.DataFrame: Matriz com NaN na diagonal e nos pares não testados
+        """
+        categorias = self.grupos.index
+        matriz = pd.DataFrame(np.nan, index=categorias, columns=categorias)
+        for (categoria1, categoria2), valor in self.pares[coluna].items():
+            matriz.loc[categoria1, categoria2] = valor
+            matriz.loc[categoria2, categoria1] = valor
+        return matriz
+
+
+def matriz_testes(grupos, variavel, correcao='holm'):
+    """
+    Testa a diferença de médias de todos os pares de categorias de uma vez.
+
+    Args:
+        grupos (pd.DataFrame): Momentos de cada categoria (``PlanoConsulta.momentos``)
+        variavel (str): Nome da variável
+        correcao (str): 'holm' ou 'bh'
+
+    Returns:
+        MatrizTestes: Resultados de todos os pares
+
+    Example:
+        >>> grupos = plano_consulta('Raça', base).momentos
+        >>> matriz = matriz_testes(grupos, 'Raça')
+        >>> matriz.matriz('p_ajustado')
+    """
+    ordem = grupos.index.tolist()
+    momentos = {coluna: grupos[coluna].to_numpy() for coluna in grupos.columns}
+
+    # Pares (i < j) em que os dois grupos têm dados suficientes
+    i, j = np.triu_indices(len(ordem), k=1)
+    n = momentos['n']
+    suficientes = (n[i] >= MINIMO_GRUPO) & (n[j] >= MINIMO_GRUPO)
+    i, j = i[suficientes], j[suficientes]
+
+    grupo1 = {coluna: valores[i] for coluna, valores in momentos.items()}
+    grupo2 = {coluna: valores[j] for coluna, valores in momentos.items()}
+    resultado = teste_de_momentos(grupo1, grupo2)
+
+    # Tamanho do efeito: g de Hedges com o desvio padrão combinado
+    media, variancia = momentos['media'], momentos['variancia']
+    graus = n[i] + n[j] - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        combinado = np.sqrt(((n[i] - 1) * variancia[i] + (n[j] - 1) * variancia[j]) / graus)
+        efeito = (media[i] - media[j]) / combinado * (1 - 3 / (4 * graus - 1))
+
+    indice = pd.MultiIndex.from_arrays([[ordem[k] for k in i], [ordem[k] for k in j]],
+                                       names=['categoria1', 'categoria2'])
+    pares = pd.DataFrame({
+        'n1': n[i], 'n2': n[j],
+        'p_levene': resultado['p_levene'],
+        'metodo': np.where(resultado['iguais'], 'Student', 'Welch'),
+        'p_valor': resultado['p_valor'],
+        'p_ajustado': corrigir_pvalores(resultado['p_valor'], correcao),
+        'efeito': efeito,
+    }, index=indice)
+
+    return MatrizTestes(variavel, correcao, grupos, pares)
+
+
+# Resultados já calculados (matrizes e momentos), por variável, filtros e versão
+_resultados = OrderedDict()
+_trava = threading.Lock()
+MAXIMO_RESULTADOS = 128
+
+
+def resultado_em_cache(chave, construtor):
+    """
+    Retorna o resultado guardado para a chave, calculando-o se necessário.
+
+    Args:
+        chave (tuple): Identifica o resultado, a variável, os filtros e a
+            versão dos dados
+        construtor (callable): Função sem argumentos que calcula o resultado
+
+    Returns:
+        Resultado da chave (``MatrizTestes`` ou tabela de momentos)
+    """
+    with _trava:
+        resultado = _resultados.get(chave)
+        if resultado is not None:
+            _resultados.move_to_end(chave)
+            return resultado
+
+    resultado = construtor()
+    with _trava:
+        _resultados[chave] = resultado
+        while len(_resultados) > MAXIMO_RESULTADOS:
+            _resultados.popitem(last=False)
+    return resultado